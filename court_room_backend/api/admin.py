@@ -1,5 +1,9 @@
+import json
+
 from django.contrib import admin
-from .models import Court, CaseType, CaseQuery, CaseDetail, CaseDocument
+from django.utils.html import format_html
+from .models import Court, CaseType, CaseQuery, CaseQueryPayload, CaseDetail, CaseChange, CaseDocument, WatchedCase, ArchivedCaseQuery
+from .services import invalidate_cached_result
 
 @admin.register(Court)
 class CourtAdmin(admin.ModelAdmin):
@@ -18,15 +22,60 @@ class CaseQueryAdmin(admin.ModelAdmin):
     list_display = ('case_number', 'filing_year', 'court', 'success', 'queried_at')
     list_filter = ('success', 'court', 'queried_at')
     search_fields = ('case_number', 'user_ip')
-    readonly_fields = ('id', 'queried_at', 'raw_response')
+    readonly_fields = ('id', 'queried_at', 'stored_response')
+    exclude = ('raw_response',)
+    raw_id_fields = ('snapshot',)
+    actions = ['invalidate_cached_results']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('raw_response')
+
+    @admin.display(description='Raw response')
+    def stored_response(self, obj):
+        try:
+            result = obj.payload.result
+        except CaseQueryPayload.DoesNotExist:
+            # Rows not yet moved by compact_raw_responses
+            result = obj.raw_response
+        if result is None:
+            return '-'
+        return format_html('<pre>{}</pre>', json.dumps(result, indent=2))
+
+    @admin.action(description='Invalidate cached results for selected cases')
+    def invalidate_cached_results(self, request, queryset):
+        for query in queryset.select_related('case_type'):
+            invalidate_cached_result(query)
+        self.message_user(request, f"Invalidated cached results for {queryset.count()} queries.")
 
 @admin.register(CaseDetail)
 class CaseDetailAdmin(admin.ModelAdmin):
     list_display = ('query', 'cnr_number', 'petitioner_name', 'case_status')
-    search_fields = ('cnr_number', 'petitioner_name', 'respondent_name')
+    # '=' makes CNR an exact (iexact) match that can use casedetail_cnr_upper_idx
+    search_fields = ('=cnr_number', 'petitioner_name', 'respondent_name')
+
+@admin.register(CaseChange)
+class CaseChangeAdmin(admin.ModelAdmin):
+    list_display = ('case_detail', 'field', 'old_value', 'new_value', 'changed_at')
+    list_filter = ('field',)
+    raw_id_fields = ('case_detail', 'query')
 
 @admin.register(CaseDocument)
 class CaseDocumentAdmin(admin.ModelAdmin):
-    list_display = ('case_detail', 'document_type', 'document_date', 'downloaded')
-    list_filter = ('document_type', 'downloaded')
-    search_fields = ('file_name',)
\ No newline at end of file
+    list_display = ('case_detail', 'document_type', 'document_date', 'download_status', 'file_size')
+    list_filter = ('document_type', 'download_status')
+    search_fields = ('file_name', '=checksum')
+
+@admin.register(WatchedCase)
+class WatchedCaseAdmin(admin.ModelAdmin):
+    list_display = ('case_number', 'filing_year', 'case_type', 'court', 'is_active', 'last_refreshed_at', 'next_refresh_at')
+    list_filter = ('is_active', 'court')
+    search_fields = ('case_number',)
+    readonly_fields = ('last_refreshed_at', 'last_query', 'created_at')
+
+
+@admin.register(ArchivedCaseQuery)
+class ArchivedCaseQueryAdmin(admin.ModelAdmin):
+    list_display = ('case_number', 'filing_year', 'court', 'success', 'queried_at', 'archived_at')
+    list_filter = ('success', 'month')
+    search_fields = ('case_number',)
+    readonly_fields = ('id', 'court', 'case_type', 'queried_at', 'month', 'archived_at')
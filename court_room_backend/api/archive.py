@@ -0,0 +1,134 @@
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import ArchivedCaseQuery, CaseQuery, CaseQueryPayload, WatchedCase
+from .serializers import CaseQuerySerializer
+
+logger = logging.getLogger(__name__)
+
+
+def hot_window_start(now=None):
+    """Oldest queried_at history shows by default; None when HISTORY_HOT_DAYS is 0"""
+    if not settings.HISTORY_HOT_DAYS:
+        return None
+    return (now or timezone.now()) - timedelta(days=settings.HISTORY_HOT_DAYS)
+
+
+def retained():
+    """
+    Queries kept hot however old: the latest successful lookup of each
+    case, queries whose CaseDetail another query shows as its snapshot
+    (incremental refreshes), and the last refresh of a watched case.
+    """
+    newer_success = CaseQuery.objects.filter(
+        court_id=OuterRef('court_id'), case_type_id=OuterRef('case_type_id'),
+        case_number=OuterRef('case_number'), filing_year=OuterRef('filing_year'),
+        success=True, queried_at__gt=OuterRef('queried_at'),
+    )
+    shared_snapshot = CaseQuery.objects.filter(snapshot__query_id=OuterRef('pk')).exclude(pk=OuterRef('pk'))
+    watched = WatchedCase.objects.filter(last_query_id=OuterRef('pk'))
+    return (Q(success=True) & ~Exists(newer_success)) | Exists(shared_snapshot) | Exists(watched)
+
+
+def archivable(before):
+    """Queries older than `before` that may leave the hot table: all but the retained() ones"""
+    return CaseQuery.objects.filter(queried_at__lt=before).exclude(retained())
+
+
+def in_hot_window(queryset, now=None):
+    """
+    Restrict CaseQuery rows to what history lists by default: the hot
+    window, plus the older queries the archiver keeps back, which would
+    otherwise show up neither there nor in the archive.
+    """
+    hot_start = hot_window_start(now)
+    if hot_start is None:
+        return queryset
+    return queryset.filter(Q(queried_at__gte=hot_start) | retained())
+
+
+class HistoryArchiver:
+    """
+    Moves old CaseQuery rows into ArchivedCaseQuery in small batches.
+
+    Each batch is its own short transaction: lock up to batch_size of the
+    oldest archivable rows (skipping rows another archiver holds), copy
+    them as history renders them, optionally append them with their raw
+    response to monthly gzipped JSON-lines files, then delete them with
+    their detail, documents and payload. Pausing between batches leaves
+    room for other writers.
+    """
+
+    def __init__(self, before, batch_size: int = 500, export_dir: str = '', pause: float = 0.0):
+        self.before = before
+        self.batch_size = batch_size
+        self.export_dir = export_dir
+        self.pause = pause
+
+    def run(self) -> int:
+        """Archive until nothing older than `before` is left to move; returns the row count"""
+        archived = 0
+        while True:
+            moved = self.archive_batch()
+            archived += moved
+            if moved < self.batch_size:
+                return archived
+            if self.pause:
+                time.sleep(self.pause)
+
+    def archive_batch(self) -> int:
+        with transaction.atomic():
+            ids = list(
+                archivable(self.before).order_by('queried_at', 'id')
+                .select_for_update(skip_locked=True).values_list('id', flat=True)[:self.batch_size]
+            )
+            if not ids:
+                return 0
+
+            queries = list(CaseQuery.objects.with_details().filter(id__in=ids))
+            rendered = CaseQuerySerializer(queries, many=True).data
+            archives = [
+                ArchivedCaseQuery(
+                    id=query.id, court_id=query.court_id, case_type_id=query.case_type_id,
+                    case_number=query.case_number, filing_year=query.filing_year,
+                    queried_at=query.queried_at, success=query.success,
+                    month=timezone.localtime(query.queried_at).date().replace(day=1),
+                    data=json.loads(json.dumps(data, cls=DjangoJSONEncoder)),
+                )
+                for query, data in zip(queries, rendered)
+            ]
+            ArchivedCaseQuery.objects.bulk_create(archives, ignore_conflicts=True)
+            if self.export_dir:
+                self._export(archives)
+
+            CaseQuery.objects.filter(id__in=ids).delete()
+        return len(ids)
+
+    def _export(self, archives):
+        payloads = {
+            payload.query_id: payload.result
+            for payload in CaseQueryPayload.objects.filter(query_id__in=[archive.id for archive in archives])
+        }
+        by_month = defaultdict(list)
+        for archive in archives:
+            by_month[archive.month].append(json.dumps(
+                {'query': archive.data, 'raw_response': payloads.get(archive.id)}, cls=DjangoJSONEncoder
+            ))
+
+        os.makedirs(self.export_dir, exist_ok=True)
+        for month, lines in by_month.items():
+            # Appending adds a gzip member; readers see one continuous stream
+            path = os.path.join(self.export_dir, f'case-history-{month:%Y-%m}.jsonl.gz')
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose data each process keeps to itself
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Cache alias settings that must reach every web and worker process, and what breaks if not
+SHARED_CACHE_SETTINGS = {
+    'CASE_CACHE_SHARED_ALIAS': (
+        'Each worker keeps its own case results, single-flight locks, portal rate-limit buckets and '
+        'form tokens, so N workers can scrape the same case N times and together exceed the portal rate.'
+    ),
+    'REFERENCE_CACHE_ALIAS': (
+        'Court and case type changes made by another process (seed_reference_data, the admin) '
+        'are only seen once REFERENCE_CACHE_VERSION_TTL expires.'
+    ),
+    'SEARCH_PROGRESS_CACHE_ALIAS': (
+        'Progress recorded by Celery workers never reaches case-search/<id>/events/, '
+        'which can then only report the final result, read from the database.'
+    ),
+}
+
+
+def is_process_local(alias: str) -> bool:
+    """Whether a cache alias keeps its data inside this process"""
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    """Warn about cache aliases that need sharing but point at a process-local backend"""
+    warnings = []
+    for setting, consequence in SHARED_CACHE_SETTINGS.items():
+        alias = getattr(settings, setting)
+        if is_process_local(alias):
+            backend = settings.CACHES[alias]['BACKEND']
+            warnings.append(Warning(
+                f"{setting} ('{alias}') uses {backend.rsplit('.', 1)[-1]}, which is not shared between processes.",
+                hint=f"{consequence} Point CACHE_BACKEND at a shared cache such as Redis.",
+                id='api.W001',
+            ))
+    return warnings
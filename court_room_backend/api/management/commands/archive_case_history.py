@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.archive import HistoryArchiver, archivable
+
+
+class Command(BaseCommand):
+    help = (
+        "Move search history older than the hot window into ArchivedCaseQuery "
+        "in short batches, keeping each case's latest successful lookup hot"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            help='Archive queries older than this (default: HISTORY_HOT_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=settings.HISTORY_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--export-dir', default=settings.HISTORY_ARCHIVE_EXPORT_DIR,
+                            help='Also append archived rows, with raw responses, to monthly .jsonl.gz files here')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the queries that would move')
+
+    def handle(self, *args, **options):
+        older_than_days = options['older_than_days']
+        if older_than_days is None:
+            # 0 means history is never archived; it must not turn into "archive everything"
+            if not settings.HISTORY_HOT_DAYS:
+                raise CommandError(
+                    'HISTORY_HOT_DAYS is 0, which keeps all history hot; pass --older-than-days to archive anyway'
+                )
+            older_than_days = settings.HISTORY_HOT_DAYS
+        if older_than_days < 0:
+            raise CommandError('--older-than-days cannot be negative')
+        before = timezone.now() - timedelta(days=older_than_days)
+        if options['dry_run']:
+            self.stdout.write(f"{archivable(before).count()} queries older than {before:%Y-%m-%d} would be archived")
+            return
+
+        archiver = HistoryArchiver(
+            before, batch_size=options['batch_size'], export_dir=options['export_dir'], pause=options['pause'],
+        )
+        self.stdout.write(f"Archived {archiver.run()} queries older than {before:%Y-%m-%d}")
@@ -0,0 +1,262 @@
+import json
+import os
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from court_room_backend.scrapers.ecourts_scraper import (
+    RESULTS_TABLE_ID,
+    ECourtsScraper,
+    ResultsPageFilter,
+)
+
+BENCHMARK_DIR = Path(settings.BASE_DIR) / 'benchmarks'
+
+# Environment name of the committed baseline; no real environment matches
+# it, so it gates allocations everywhere and timings nowhere
+REFERENCE_ENVIRONMENT = 'reference'
+
+# Date strings as they appear in GridView cells and order link text
+DATE_SAMPLES = [
+    '15/01/2023', '15-01-2023', '2023-01-15', '1/2/2024', '31/13/2022',
+    '-', '', '  12/11/2026 ', 'Not Listed', '29-02-2023',
+]
+
+
+def environment() -> str:
+    """
+    Name of the machine and interpreter timings were taken on. Baselines
+    are kept per environment; BENCHMARK_ENVIRONMENT names one explicitly
+    (e.g. a CI runner class).
+    """
+    name = os.environ.get('BENCHMARK_ENVIRONMENT') or '-'.join((
+        platform.node(), platform.python_implementation() + platform.python_version(), platform.machine(),
+    ))
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).lower()
+
+
+def percentile(sorted_values, percent: int) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the eCourts parse pipeline against the recorded page corpus "
+        "in benchmarks/fixtures and compare with the baseline recorded on this "
+        "environment, or else the committed benchmarks/baseline.json (runs offline)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Timed runs per case')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed runs per case')
+        parser.add_argument('--rounds', type=int, default=5,
+                            help='Split timed runs into rounds; the fastest round is compared with the baseline')
+        parser.add_argument('--filter', default='', help='Only run cases whose name contains this')
+        parser.add_argument('--fixtures', default=str(BENCHMARK_DIR / 'fixtures'))
+        parser.add_argument('--baseline', help='Baseline file; defaults to benchmarks/baselines/<environment>.json '
+                                               'if recorded, else benchmarks/baseline.json')
+        parser.add_argument('--allow-missing-baseline', action='store_true',
+                            help='Pass when there is no baseline to compare with instead of failing')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed slowdown of normalised p50 (0.5 = 50%%); '
+                                 'raise it on shared or throttled hosts')
+        parser.add_argument('--confirm', type=int, default=2,
+                            help='Re-measure cases over the tolerance this many times; only slowdowns '
+                                 'that repeat count as regressions')
+        parser.add_argument('--memory-tolerance', type=float, default=0.10,
+                            help='Allowed growth of peak allocations per call')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write results as the baseline of this environment; with '
+                                 '--baseline benchmarks/baseline.json, refresh the committed one')
+        parser.add_argument('--json', dest='json_output', help='Also write results to this file')
+
+    def handle(self, *args, **options):
+        cases = self._build_cases(Path(options['fixtures']))
+        cases = {name: fn for name, fn in cases.items() if options['filter'] in name}
+        if not cases:
+            raise CommandError('No benchmark cases selected')
+
+        results = {}
+        for name, fn in cases.items():
+            results[name] = self._measure(fn, options['iterations'], options['warmup'], options['rounds'])
+            self._report(name, results[name])
+
+        report = {'environment': environment(), 'cases': results}
+        if options['json_output']:
+            Path(options['json_output']).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+        local_path = BENCHMARK_DIR / 'baselines' / f"{report['environment']}.json"
+        if options['update_baseline']:
+            baseline_path = Path(options['baseline'] or local_path)
+            if baseline_path.resolve() == (BENCHMARK_DIR / 'baseline.json').resolve():
+                report['environment'] = REFERENCE_ENVIRONMENT
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        if options['baseline']:
+            baseline_path = Path(options['baseline'])
+        else:
+            baseline_path = local_path if local_path.exists() else BENCHMARK_DIR / 'baseline.json'
+        if not baseline_path.exists():
+            message = f'No baseline at {baseline_path}; run with --update-baseline'
+            if not options['allow_missing_baseline']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        timed = baseline.get('environment') == report['environment']
+        if not timed:
+            # Timings do not carry over between machines; allocations do
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded on {baseline.get('environment', 'an unknown environment')!r}, "
+                f"not {report['environment']!r}; comparing allocations only"
+            ))
+        tolerance = options['tolerance'] if timed else None
+        for _ in range(options['confirm'] if timed else 0):
+            slow = list(self._slow_cases(results, baseline['cases'], tolerance))
+            if not slow:
+                break
+            # A busy box slows a run now and then; keep each case's better run
+            for name in slow:
+                rerun = self._measure(cases[name], options['iterations'], options['warmup'], options['rounds'])
+                if rerun['p50_normalized'] < results[name]['p50_normalized']:
+                    results[name] = rerun
+
+        regressions = self._compare(results, baseline['cases'], tolerance, options['memory_tolerance'])
+        if regressions:
+            raise CommandError('Parser benchmark regressed:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def _build_cases(self, fixtures_dir: Path):
+        """One case per function and fixture that exercises it"""
+        if not fixtures_dir.is_dir():
+            raise CommandError(f'Fixture directory not found: {fixtures_dir}')
+
+        scraper = ECourtsScraper()
+        cases = {}
+        for path in sorted(fixtures_dir.glob('*.html')):
+            html = path.read_text(encoding='utf-8')
+            fixture = path.stem
+            cases[f'parse_case_details:{fixture}'] = lambda html=html: scraper._parse_case_details(html)
+
+            soup = scraper._make_soup(html, ResultsPageFilter())
+            table = soup.find('table', {'id': RESULTS_TABLE_ID})
+            if table is not None:
+                cases[f'extract_case_data:{fixture}'] = lambda table=table: scraper._extract_case_data(table)
+            if soup.find('a'):
+                cases[f'extract_documents:{fixture}'] = lambda soup=soup: scraper._extract_documents(soup)
+
+        cases['parse_date:samples'] = lambda: [scraper._parse_date(value) for value in DATE_SAMPLES]
+        return cases
+
+    def _calibrate(self) -> int:
+        """
+        Time a fixed pure-Python workload. Each round of a case is divided
+        by a calibration taken in the same round, so a box that slows down
+        mid-run slows both sides of the ratio.
+        """
+        def workload():
+            words = [f'row-{i:05d}' for i in range(1000)]
+            return sorted(words, key=str.lower)[::-1]
+
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter_ns()
+            workload()
+            timings.append(time.perf_counter_ns() - started)
+        # The fastest run is the least disturbed by other load on the box
+        return min(timings)
+
+    def _measure(self, fn, iterations: int, warmup: int, rounds: int):
+        for _ in range(warmup):
+            fn()
+
+        timings = []
+        round_size = max(1, iterations // max(rounds, 1))
+        round_medians = []
+        round_ratios = []
+        calibration_ns = self._calibrate()
+        for _ in range(iterations):
+            started = time.perf_counter_ns()
+            fn()
+            timings.append(time.perf_counter_ns() - started)
+            if len(timings) % round_size == 0:
+                round_medians.append(statistics.median(timings[-round_size:]))
+                # Bracket the round: the faster calibration is the less disturbed
+                next_calibration_ns = self._calibrate()
+                round_ratios.append(round_medians[-1] / min(calibration_ns, next_calibration_ns))
+                calibration_ns = next_calibration_ns
+        timings.sort()
+
+        # Allocations are measured separately; tracing slows every call down
+        tracemalloc.start()
+        try:
+            peaks = []
+            for _ in range(min(iterations, 20)):
+                tracemalloc.reset_peak()
+                current, _ = tracemalloc.get_traced_memory()
+                fn()
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            tracemalloc.stop()
+
+        p50 = percentile(timings, 50)
+        return {
+            'iterations': iterations,
+            'ops_per_sec': round(iterations / (sum(timings) / 1e9), 1),
+            'p50_us': round(p50 / 1000, 2),
+            'p95_us': round(percentile(timings, 95) / 1000, 2),
+            'p99_us': round(percentile(timings, 99) / 1000, 2),
+            'best_p50_us': round(min(round_medians or [p50]) / 1000, 2),
+            # Round p50 over the same round's calibration; what regressions are judged on
+            'p50_normalized': round(statistics.median(round_ratios or [0]), 4),
+            'peak_alloc_bytes': int(statistics.median(peaks)),
+        }
+
+    def _slow_cases(self, results, baseline, tolerance: float):
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is not None and result['p50_normalized'] / expected['p50_normalized'] - 1 > tolerance:
+                yield name
+
+    def _compare(self, results, baseline, tolerance: Optional[float], memory_tolerance: float):
+        regressions = []
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                self.stdout.write(self.style.WARNING(f'{name}: not in baseline'))
+                continue
+
+            slowdown = result['p50_normalized'] / expected['p50_normalized'] - 1
+            if tolerance is not None and slowdown > tolerance:
+                regressions.append(
+                    f"{name}: p50 {slowdown:+.0%} vs baseline "
+                    f"({result['best_p50_us']}us now, {expected['best_p50_us']}us recorded)"
+                )
+
+            growth = result['peak_alloc_bytes'] / max(expected['peak_alloc_bytes'], 1) - 1
+            if growth > memory_tolerance:
+                regressions.append(
+                    f"{name}: peak allocations {growth:+.0%} vs baseline "
+                    f"({result['peak_alloc_bytes']}B now, {expected['peak_alloc_bytes']}B recorded)"
+                )
+        return regressions
+
+    def _report(self, name: str, result):
+        self.stdout.write(
+            f"{name:<45} {result['ops_per_sec']:>10.1f} ops/s  "
+            f"p50 {result['p50_us']:>9.2f}us  p95 {result['p95_us']:>9.2f}us  "
+            f"p99 {result['p99_us']:>9.2f}us  peak {result['peak_alloc_bytes'] / 1024:>8.1f}KiB"
+        )
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import CaseQuery, CaseQueryPayload
+
+
+class Command(BaseCommand):
+    help = (
+        "Move raw_response JSON out of the CaseQuery table into compressed "
+        "CaseQueryPayload rows, keeping only what RAW_RESPONSE_RETENTION (or "
+        "--policy) retains, and clear the inline column"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', choices=CaseQueryPayload.RETENTION_POLICIES,
+                            help='Retention policy to apply (default: RAW_RESPONSE_RETENTION)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be kept and dropped')
+
+    def handle(self, *args, **options):
+        policy = options['policy'] or settings.RAW_RESPONSE_RETENTION
+        if policy not in CaseQueryPayload.RETENTION_POLICIES:
+            raise CommandError(f"Unknown retention policy {policy!r}")
+
+        kept = dropped = inline_bytes = stored_bytes = 0
+        last_id = None
+        while True:
+            # Keyset batches: compacted rows drop out of the filter, dry runs move past them
+            batch = CaseQuery.objects.filter(raw_response__isnull=False).order_by('id')
+            if last_id is not None:
+                batch = batch.filter(id__gt=last_id)
+            rows = list(batch.values_list('id', 'raw_response')[:options['batch_size']])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            payloads = []
+            for query_id, result in rows:
+                packed = CaseQueryPayload.pack(result)
+                inline_bytes += packed['size']
+                if CaseQueryPayload.retains(result, policy):
+                    payloads.append(CaseQueryPayload(query_id=query_id, **packed))
+                    stored_bytes += len(packed['data'])
+            kept += len(payloads)
+            dropped += len(rows) - len(payloads)
+
+            if not options['dry_run']:
+                with transaction.atomic():
+                    # A payload written since (a re-run search) is newer; keep it
+                    CaseQueryPayload.objects.bulk_create(payloads, ignore_conflicts=True)
+                    CaseQuery.objects.filter(id__in=[query_id for query_id, _ in rows]).update(raw_response=None)
+
+        keep, drop = ('Would keep', 'drop') if options['dry_run'] else ('Kept', 'dropped')
+        self.stdout.write(
+            f"{keep} {kept} and {drop} {dropped} raw responses under policy '{policy}': "
+            f"{inline_bytes // 1024} KiB of inline JSON -> {stored_bytes // 1024} KiB compressed"
+        )
+        if kept + dropped and not options['dry_run'] and connection.vendor == 'postgresql':
+            self.stdout.write(f"Run VACUUM on {CaseQuery._meta.db_table} to reuse the freed space")
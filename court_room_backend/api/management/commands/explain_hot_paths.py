@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from api.archive import archivable, hot_window_start, in_hot_window
+from api.models import CaseDetail, CaseQuery
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN plans for the queries behind case-history, case-detail, "
+        "prior-result lookups and CNR search, to check index use on real data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run the queries (EXPLAIN ANALYZE, BUFFERS); PostgreSQL only')
+
+    def handle(self, *args, **options):
+        sample = CaseQuery.objects.order_by('-queried_at').first()
+        detail = CaseDetail.objects.exclude(cnr_number='').only('cnr_number').first()
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        history = in_hot_window(CaseQuery.objects.with_details())
+        plans = [
+            ('case-history', history),
+            ('case-history ?success=true', history.filter(success=True)),
+            ('case-history ?date_from&date_to (last 7 days)', history.filter(
+                queried_at__gte=today - timedelta(days=7), queried_at__lt=today + timedelta(days=1),
+            )),
+            ('case-detail', CaseQuery.objects.with_details().filter(id=sample.id if sample else None)),
+            ('prior successful lookup of a case', CaseQuery.objects.filter(
+                court_id=sample.court_id if sample else 0,
+                case_type_id=sample.case_type_id if sample else 0,
+                case_number=sample.case_number if sample else '',
+                filing_year=sample.filing_year if sample else '',
+                success=True,
+            ).order_by('-queried_at')[:1]),
+            ('history archiver batch', archivable(hot_window_start() or timezone.now()).order_by('queried_at', 'id')[:500]),
+            ('admin CNR search', CaseDetail.objects.filter(
+                cnr_number__iexact=detail.cnr_number if detail else '',
+            )),
+        ]
+
+        explain_options = {}
+        if options['analyze']:
+            if connection.vendor == 'postgresql':
+                explain_options = {'analyze': True, 'buffers': True}
+            else:
+                self.stdout.write(self.style.WARNING('--analyze is only supported on PostgreSQL; showing plans'))
+
+        for label, queryset in plans:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models import CaseQuery, CaseType
+from court_room_backend.celery import app as celery_app
+from .benchmark_parser import percentile
+
+FINISHED = (CaseQuery.STATUS_COMPLETED, CaseQuery.STATUS_FAILED)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive case-search/ with concurrent searches (point the app at "
+        "run_fake_portal first) and report throughput, latency percentiles "
+        "and worker/DB saturation"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/', help='API root of the app under test')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--court-id', type=int, default=6)
+        parser.add_argument('--case-type-id', type=int, help='Defaults to the first case type of the court')
+        parser.add_argument('--unique', type=int, default=0,
+                            help='Distinct case numbers to cycle through (0: every request is distinct)')
+        parser.add_argument('--force-refresh', action='store_true', help='Bypass the result cache')
+        parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for a search to finish')
+        parser.add_argument('--poll-interval', type=float, default=0.5)
+        parser.add_argument('--sample-interval', type=float, default=1.0, help='Seconds between saturation samples')
+        parser.add_argument('--json', dest='json_output', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        case_type_id = options['case_type_id']
+        if case_type_id is None:
+            case_type = CaseType.objects.filter(court_id=options['court_id']).order_by('id').first()
+            if case_type is None:
+                raise CommandError(f"Court {options['court_id']} has no case types; pass --case-type-id")
+            case_type_id = case_type.id
+
+        self.started_at = timezone.now()
+        report = asyncio.run(self._run(options, case_type_id))
+        self._print_report(report)
+        if options['json_output']:
+            Path(options['json_output']).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+    async def _run(self, options, case_type_id: int):
+        api = options['url'].rstrip('/') + '/'
+        total = options['requests']
+        unique = options['unique'] or total
+        jobs = asyncio.Queue()
+        for i in range(total):
+            jobs.put_nowait({
+                'court_id': options['court_id'],
+                'case_type_id': case_type_id,
+                'case_number': str(100000 + i % unique),
+                'filing_year': '2023',
+                'force_refresh': options['force_refresh'],
+            })
+
+        submit_latencies, search_latencies = [], []
+        outcomes = Counter()
+        samples = []
+        limits = httpx.Limits(max_connections=options['concurrency'])
+
+        async def worker(client):
+            while True:
+                try:
+                    payload = jobs.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                outcome, submitted, finished = await self._search(client, api, payload, options)
+                outcomes[outcome] += 1
+                if submitted is not None:
+                    submit_latencies.append(submitted)
+                if finished is not None:
+                    search_latencies.append(finished)
+
+        async def sampler():
+            while True:
+                samples.append(await sync_to_async(self._sample)())
+                await asyncio.sleep(options['sample_interval'])
+
+        started = time.perf_counter()
+        async with httpx.AsyncClient(timeout=options['timeout'], limits=limits) as client:
+            sampling = asyncio.create_task(sampler())
+            try:
+                await asyncio.gather(*(worker(client) for _ in range(options['concurrency'])))
+            finally:
+                sampling.cancel()
+        elapsed = time.perf_counter() - started
+
+        return {
+            'requests': total,
+            'concurrency': options['concurrency'],
+            'elapsed_s': round(elapsed, 2),
+            'throughput_per_s': round(len(search_latencies) / elapsed, 2),
+            'outcomes': dict(outcomes),
+            'submit_latency_ms': self._latency_summary(submit_latencies),
+            'search_latency_ms': self._latency_summary(search_latencies),
+            'saturation': self._saturation_summary(samples),
+        }
+
+    async def _search(self, client, api: str, payload, options):
+        """
+        Submit one search and poll until it finishes. Returns the outcome and
+        the submit and end-to-end latencies in seconds (None if not reached).
+        """
+        started = time.perf_counter()
+        try:
+            response = await client.post(f'{api}case-search/', json=payload)
+        except httpx.HTTPError as e:
+            return f'submit_error:{type(e).__name__}', None, None
+        submitted = time.perf_counter() - started
+
+        if response.status_code == 200:
+            body = response.json()
+            return ('cached' if body.get('success') else 'cached_failure'), submitted, submitted
+        if response.status_code != 202:
+            return f'http_{response.status_code}', submitted, None
+
+        query_id = response.json()['query_id']
+        deadline = started + options['timeout']
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(options['poll_interval'])
+            try:
+                detail = await client.get(f'{api}case-detail/{query_id}/')
+            except httpx.HTTPError:
+                continue
+            if detail.status_code == 200 and detail.json().get('status') in FINISHED:
+                outcome = 'success' if detail.json().get('success') else 'failed'
+                return outcome, submitted, time.perf_counter() - started
+        return 'timeout', submitted, None
+
+    def _sample(self):
+        """One snapshot of queue backlog, worker and DB connection usage"""
+        statuses = dict(
+            CaseQuery.objects.filter(queried_at__gte=self.started_at)
+            .values_list('status').annotate(Count('id')).order_by()
+        )
+        sample = {
+            'pending': statuses.get(CaseQuery.STATUS_PENDING, 0),
+            'running': statuses.get(CaseQuery.STATUS_RUNNING, 0),
+        }
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FILTER (WHERE state = 'active'), count(*), "
+                    "current_setting('max_connections')::int "
+                    "FROM pg_stat_activity WHERE datname = current_database()"
+                )
+                sample['db_active'], sample['db_connections'], sample['db_max_connections'] = cursor.fetchone()
+
+        if celery_app.conf.task_always_eager:
+            # Searches run inside the web process; there are no workers to ask
+            return sample
+        try:
+            inspect = celery_app.control.inspect(timeout=0.5)
+            active = inspect.active() or {}
+            stats = inspect.stats() or {}
+        except Exception:
+            active, stats = {}, {}
+        if stats:
+            sample['worker_busy'] = sum(len(tasks) for tasks in active.values())
+            sample['worker_slots'] = sum(
+                worker.get('pool', {}).get('max-concurrency', 0) for worker in stats.values()
+            )
+        return sample
+
+    @staticmethod
+    def _latency_summary(latencies):
+        if not latencies:
+            return None
+        latencies = sorted(latencies)
+        return {
+            'p50': round(percentile(latencies, 50) * 1000, 1),
+            'p95': round(percentile(latencies, 95) * 1000, 1),
+            'p99': round(percentile(latencies, 99) * 1000, 1),
+            'max': round(latencies[-1] * 1000, 1),
+        }
+
+    @staticmethod
+    def _saturation_summary(samples):
+        summary = {'samples': len(samples)}
+        for field in ('pending', 'running', 'db_active', 'db_connections', 'worker_busy'):
+            values = [sample[field] for sample in samples if field in sample]
+            if values:
+                summary[f'{field}_max'] = max(values)
+                summary[f'{field}_avg'] = round(sum(values) / len(values), 1)
+
+        utilization = [
+            sample['worker_busy'] / sample['worker_slots']
+            for sample in samples if sample.get('worker_slots')
+        ]
+        if utilization:
+            summary['worker_utilization_max'] = round(max(utilization), 2)
+            summary['worker_utilization_avg'] = round(sum(utilization) / len(utilization), 2)
+        db_max = [sample['db_max_connections'] for sample in samples if 'db_max_connections' in sample]
+        if db_max:
+            summary['db_max_connections'] = db_max[-1]
+        return summary
+
+    def _print_report(self, report):
+        self.stdout.write(
+            f"{report['requests']} searches, concurrency {report['concurrency']}, "
+            f"{report['elapsed_s']}s: {report['throughput_per_s']} finished searches/s"
+        )
+        self.stdout.write('Outcomes: ' + ', '.join(f'{k}={v}' for k, v in sorted(report['outcomes'].items())))
+        for label, key in (('Submit', 'submit_latency_ms'), ('End-to-end', 'search_latency_ms')):
+            summary = report[key]
+            if summary:
+                self.stdout.write(
+                    f"{label} latency: p50 {summary['p50']}ms  p95 {summary['p95']}ms  "
+                    f"p99 {summary['p99']}ms  max {summary['max']}ms"
+                )
+        self.stdout.write('Saturation: ' + json.dumps(report['saturation'], sort_keys=True))
@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.scheduler import RefreshScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue one tick of watched case refreshes (what Celery beat runs every "
+        "WATCH_REFRESH_TICK seconds) and print the refresh backlog"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--report', action='store_true', help='Only print the backlog; queue nothing')
+
+    def handle(self, *args, **options):
+        scheduler = RefreshScheduler()
+        report = scheduler.backlog() if options['report'] else scheduler.run()
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from court_room_backend.scrapers.fake_portal import FakePortal
+
+
+class Command(BaseCommand):
+    help = "Serve a local stand-in for the eCourts case status portal, for load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.2, help='Seconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.1, help='Latency varies by up to this many seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered 502')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered 429')
+        parser.add_argument('--retry-after', type=int, default=5, help='Retry-After sent with 429s')
+        parser.add_argument('--captcha-rate', type=float, default=0.0, help='Fraction of searches shown a CAPTCHA')
+        parser.add_argument('--not-found-rate', type=float, default=0.0, help='Fraction of searches not found')
+        parser.add_argument('--documents', type=int, default=5, help='PDF links per results page')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible fault injection')
+
+    def handle(self, *args, **options):
+        portal = FakePortal(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            captcha_rate=options['captcha_rate'],
+            throttle_rate=options['throttle_rate'],
+            not_found_rate=options['not_found_rate'],
+            documents=options['documents'],
+            retry_after=options['retry_after'],
+            seed=options['seed'],
+        )
+        server = portal.serve(options['host'], options['port'])
+        self.stdout.write(f'Fake eCourts portal at {portal.base_url}')
+        self.stdout.write(f'Point the web app and workers at it with ECOURTS_BASE_URL={portal.base_url}')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(json.dumps(portal.stats, sort_keys=True))
@@ -0,0 +1,177 @@
+import csv
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from api.models import CaseType, Court
+from api.reference_cache import get_reference_cache
+
+DATA_FORMAT = 1
+COURT_FIELDS = ('name', 'location', 'base_url', 'is_active')
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert courts and case types from reference data files in a few bulk "
+        "statements. Rows missing from the files are never deleted, so search "
+        "history is kept. Re-running with unchanged data writes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files', nargs='*',
+            help='A JSON data file (see reference_data/ecourts.json), or CSV files of courts '
+                 '(id,name,location[,base_url,is_active]) and case types (court_id,code,name). '
+                 'Defaults to reference_data/ecourts.json',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Print the changes without writing them')
+        parser.add_argument('--deactivate-missing', action='store_true',
+                            help='Mark courts that are not in the files inactive')
+
+    def handle(self, *args, **options):
+        paths = [Path(path) for path in options['files']] or [settings.BASE_DIR / 'reference_data' / 'ecourts.json']
+        courts, case_types, versions = {}, set(), []
+        for path in paths:
+            versions.append(self._load(path, courts, case_types))
+
+        existing_courts = {row[0]: dict(zip(COURT_FIELDS, row[1:])) for row in Court.objects.values_list('id', *COURT_FIELDS)}
+        existing_case_types = set(CaseType.objects.values_list('court_id', 'code', 'name'))
+
+        unknown = {court_id for court_id, _, _ in case_types} - courts.keys() - existing_courts.keys()
+        if unknown:
+            raise CommandError(f"Case types refer to unknown courts: {sorted(unknown)}")
+
+        new_courts = [court_id for court_id in courts if court_id not in existing_courts]
+        changed_courts = {
+            court_id: {
+                field: (existing_courts[court_id][field], value)
+                for field, value in fields.items() if existing_courts[court_id][field] != value
+            }
+            for court_id, fields in courts.items() if court_id in existing_courts
+        }
+        changed_courts = {court_id: diff for court_id, diff in changed_courts.items() if diff}
+        missing_courts = sorted(
+            court_id for court_id, fields in existing_courts.items() if court_id not in courts and fields['is_active']
+        )
+        new_case_types = sorted(case_types - existing_case_types)
+        missing_case_types = len(existing_case_types - case_types)
+
+        self._report(paths, versions, courts, new_courts, changed_courts, missing_courts,
+                     new_case_types, missing_case_types, options)
+        if options['dry_run']:
+            return
+
+        with transaction.atomic():
+            Court.objects.bulk_create(
+                [Court(id=court_id, **courts[court_id]) for court_id in [*new_courts, *changed_courts]],
+                update_conflicts=True, unique_fields=['id'], update_fields=COURT_FIELDS, batch_size=BATCH_SIZE,
+            )
+            if options['deactivate_missing'] and missing_courts:
+                Court.objects.filter(id__in=missing_courts).update(is_active=False)
+            CaseType.objects.bulk_create(
+                [CaseType(court_id=court_id, code=code, name=name) for court_id, code, name in new_case_types],
+                ignore_conflicts=True, batch_size=BATCH_SIZE,
+            )
+
+            # Explicit IDs do not advance the primary key sequence on PostgreSQL
+            if new_courts:
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(no_style(), [Court]):
+                        cursor.execute(sql)
+
+            # Bulk writes skip the post_save signals that normally do this
+            if new_courts or changed_courts or new_case_types or (options['deactivate_missing'] and missing_courts):
+                transaction.on_commit(get_reference_cache().bump)
+
+    def _load(self, path: Path, courts: dict, case_types: set):
+        """Add a file's courts and case types; returns its data version (None for CSV)"""
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        if path.suffix.lower() == '.csv':
+            self._load_csv(path, courts, case_types)
+            return None
+
+        try:
+            data = json.loads(path.read_text())
+        except ValueError as e:
+            raise CommandError(f"{path}: {e}")
+        if data.get('format') != DATA_FORMAT:
+            raise CommandError(f"{path}: unsupported format {data.get('format')!r} (expected {DATA_FORMAT})")
+
+        defaults = data.get('defaults', {})
+        case_type_sets = data.get('case_type_sets', {})
+        for row in data.get('courts', []):
+            court_id = self._court(path, {**defaults, **row}, courts)
+            listed = row.get('case_types', [])
+            if isinstance(listed, str):
+                if listed not in case_type_sets:
+                    raise CommandError(f"{path}: court {court_id} uses unknown case type set {listed!r}")
+                listed = case_type_sets[listed]
+            for case_type in listed:
+                case_types.add((court_id, case_type['code'], case_type['name']))
+        return data.get('version')
+
+    def _load_csv(self, path: Path, courts: dict, case_types: set):
+        with path.open(newline='') as f:
+            reader = csv.DictReader(f)
+            columns = set(reader.fieldnames or ())
+            if {'court_id', 'code', 'name'} <= columns:
+                for row in reader:
+                    case_types.add((int(row['court_id']), row['code'].strip(), row['name'].strip()))
+            elif {'id', 'name', 'location'} <= columns:
+                for row in reader:
+                    self._court(path, {key: value for key, value in row.items() if value not in (None, '')}, courts)
+            else:
+                raise CommandError(
+                    f"{path}: expected court columns (id,name,location) or case type columns (court_id,code,name)"
+                )
+
+    def _court(self, path: Path, row: dict, courts: dict) -> int:
+        try:
+            court_id = int(row['id'])
+            fields = {
+                'name': row['name'].strip(),
+                'location': row['location'].strip(),
+                'base_url': row.get('base_url') or settings.ECOURTS_BASE_URL,
+                'is_active': _as_bool(row.get('is_active', True)),
+            }
+        except (KeyError, ValueError) as e:
+            raise CommandError(f"{path}: invalid court {row!r}: {e}")
+        courts[court_id] = fields
+        return court_id
+
+    def _report(self, paths, versions, courts, new_courts, changed_courts, missing_courts,
+                new_case_types, missing_case_types, options):
+        versions = ', '.join(str(version) for version in versions if version is not None)
+        self.stdout.write(
+            f"Reference data from {', '.join(str(path) for path in paths)}" + (f" (version {versions})" if versions else '')
+        )
+        missing = 'to deactivate' if options['deactivate_missing'] else 'only in the database'
+        self.stdout.write(
+            f"Courts: {len(new_courts)} new, {len(changed_courts)} changed, "
+            f"{len(courts) - len(new_courts) - len(changed_courts)} unchanged, {len(missing_courts)} {missing}"
+        )
+        self.stdout.write(f"Case types: {len(new_case_types)} new, {missing_case_types} only in the database")
+
+        if not (options['dry_run'] or options['verbosity'] > 1):
+            return
+        for court_id in new_courts:
+            self.stdout.write(f"  + court {court_id}: {courts[court_id]['name']}")
+        for court_id, diff in changed_courts.items():
+            changes = ', '.join(f"{field} {old!r} -> {new!r}" for field, (old, new) in diff.items())
+            self.stdout.write(f"  ~ court {court_id}: {changes}")
+        for court_id in missing_courts:
+            self.stdout.write(f"  - court {court_id}" if options['deactivate_missing'] else f"  ? court {court_id}")
+        for court_id, code, name in new_case_types:
+            self.stdout.write(f"  + case type {court_id}/{code}: {name}")
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_status(apps, schema_editor):
+    CaseQuery = apps.get_model('api', 'CaseQuery')
+    CaseQuery.objects.filter(success=True).update(status='completed')
+    CaseQuery.objects.filter(success=False).update(status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casequery',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='casedetail',
+            name='query',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='case_detail', to='api.casequery'),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+    ]
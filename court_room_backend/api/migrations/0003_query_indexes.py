@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:35
+
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL, so building indexes on the
+    large query tables does not block writes; a plain AddIndex elsewhere.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('api', '0002_casequery_status'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='casedetail',
+            index=models.Index(django.db.models.functions.text.Upper('cnr_number'), name='casedetail_cnr_upper_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='casedocument',
+            index=models.Index(fields=['case_detail', '-document_date'], name='casedocument_detail_date_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='casequery',
+            index=models.Index(fields=['-queried_at'], name='casequery_recent_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='casequery',
+            index=models.Index(fields=['success', '-queried_at'], name='casequery_success_recent_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='casequery',
+            index=models.Index(condition=models.Q(('success', True)), fields=['court', 'case_type', 'case_number', 'filing_year', '-queried_at'], name='casequery_case_success_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:39
+
+from django.db import migrations, models
+
+
+def backfill_download_status(apps, schema_editor):
+    CaseDocument = apps.get_model('api', 'CaseDocument')
+    CaseDocument.objects.filter(downloaded=True).update(download_status='downloaded')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casedocument',
+            name='checksum',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='casedocument',
+            name='download_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('downloading', 'Downloading'), ('downloaded', 'Downloaded'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='casedocument',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_download_status, migrations.RunPython.noop),
+    ]
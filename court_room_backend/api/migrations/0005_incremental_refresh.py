@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_snapshots(apps, schema_editor):
+    CaseQuery = apps.get_model('api', 'CaseQuery')
+    CaseDetail = apps.get_model('api', 'CaseDetail')
+    CaseQuery.objects.filter(case_detail__isnull=False).update(snapshot_id=models.Subquery(
+        CaseDetail.objects.filter(query_id=models.OuterRef('pk')).values('id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_casedocument_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casequery',
+            name='snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.casedetail'),
+        ),
+        migrations.CreateModel(
+            name='CaseChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=50)),
+                ('old_value', models.TextField(blank=True)),
+                ('new_value', models.TextField(blank=True)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('case_detail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='api.casedetail')),
+                ('query', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='changes', to='api.casequery')),
+            ],
+            options={
+                'ordering': ['-changed_at'],
+                'indexes': [models.Index(fields=['case_detail', '-changed_at'], name='casechange_detail_recent_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_incremental_refresh'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchedCase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('case_number', models.CharField(max_length=50)),
+                ('filing_year', models.CharField(max_length=4)),
+                ('is_active', models.BooleanField(default=True)),
+                ('next_refresh_at', models.DateTimeField(blank=True, null=True)),
+                ('last_refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('case_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.casetype')),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.court')),
+                ('last_query', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.casequery')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['next_refresh_at'], name='watchedcase_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('court', 'case_type', 'case_number', 'filing_year'), name='watchedcase_unique_case')],
+            },
+        ),
+    ]
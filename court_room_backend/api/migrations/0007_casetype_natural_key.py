@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+
+def merge_duplicate_case_types(apps, schema_editor):
+    """Fold repeated (court, code, name) rows into the oldest so the constraint can be added"""
+    CaseType = apps.get_model('api', 'CaseType')
+    CaseQuery = apps.get_model('api', 'CaseQuery')
+    WatchedCase = apps.get_model('api', 'WatchedCase')
+
+    duplicates = (
+        CaseType.objects.values('court_id', 'code', 'name')
+        .annotate(keep=models.Min('id'), rows=models.Count('id')).filter(rows__gt=1)
+    )
+    for group in duplicates:
+        extra = CaseType.objects.filter(
+            court_id=group['court_id'], code=group['code'], name=group['name'],
+        ).exclude(id=group['keep'])
+        CaseQuery.objects.filter(case_type__in=extra).update(case_type_id=group['keep'])
+        for watched in WatchedCase.objects.filter(case_type__in=extra):
+            if WatchedCase.objects.filter(
+                court_id=watched.court_id, case_type_id=group['keep'],
+                case_number=watched.case_number, filing_year=watched.filing_year,
+            ).exists():
+                watched.delete()
+            else:
+                watched.case_type_id = group['keep']
+                watched.save(update_fields=['case_type'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_watchedcase'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_case_types, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='casetype',
+            constraint=models.UniqueConstraint(fields=('court', 'code', 'name'), name='casetype_unique_court_code_name'),
+        ),
+    ]
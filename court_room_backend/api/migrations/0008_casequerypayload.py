@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_casetype_natural_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseQueryPayload',
+            fields=[
+                ('query', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='payload', serialize=False, to='api.casequery')),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_casequerypayload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedCaseQuery',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('case_number', models.CharField(max_length=50)),
+                ('filing_year', models.CharField(max_length=4)),
+                ('queried_at', models.DateTimeField()),
+                ('success', models.BooleanField(default=False)),
+                ('month', models.DateField()),
+                ('data', models.JSONField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('case_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.casetype')),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.court')),
+            ],
+            options={
+                'ordering': ['-queried_at'],
+                'indexes': [models.Index(fields=['-queried_at'], name='archivedquery_recent_idx'), models.Index(fields=['month'], name='archivedquery_month_idx')],
+            },
+        ),
+    ]
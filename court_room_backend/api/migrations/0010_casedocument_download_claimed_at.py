@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_archivedcasequery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casedocument',
+            name='download_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
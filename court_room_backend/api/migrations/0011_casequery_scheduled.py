@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:22
+
+from django.db import migrations, models
+
+
+def flag_scheduled_queries(apps, schema_editor):
+    # Earlier scheduler searches are told apart by the IP it records
+    CaseQuery = apps.get_model('api', 'CaseQuery')
+    WatchedCase = apps.get_model('api', 'WatchedCase')
+    watched = WatchedCase.objects.filter(
+        court_id=models.OuterRef('court_id'), case_type_id=models.OuterRef('case_type_id'),
+        case_number=models.OuterRef('case_number'), filing_year=models.OuterRef('filing_year'),
+    )
+    CaseQuery.objects.filter(user_ip='127.0.0.1').filter(models.Exists(watched)).update(scheduled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_casedocument_download_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casequery',
+            name='scheduled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(flag_scheduled_queries, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+import json
 import uuid
+import zlib
 
 class Court(models.Model):
     name = models.CharField(max_length=200)
@@ -16,11 +20,58 @@ class CaseType(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=20)
     court = models.ForeignKey(Court, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            # Natural key for seed_reference_data upserts; some codes are shared by two names
+            models.UniqueConstraint(fields=['court', 'code', 'name'], name='casetype_unique_court_code_name'),
+        ]
     
     def __str__(self):
         return self.name
 
+class CaseQueryQuerySet(models.QuerySet):
+    def latest_for_case(self, court_id, case_type_id, case_number, filing_year):
+        """Most recent successful lookup of a case (served by casequery_case_success_idx)"""
+        return self.filter(
+            court_id=court_id, case_type_id=case_type_id, case_number=case_number,
+            filing_year=filing_year, success=True,
+        ).order_by('-queried_at').first()
+
+    def with_details(self):
+        """
+        Everything CaseQuerySerializer renders, in two queries: the query row
+        joined to its court, case type and snapshot, plus one prefetch of
+        the documents. Unrendered columns (raw_response, user_ip) are skipped.
+        """
+        return self.select_related('court', 'case_type', 'snapshot').only(
+            'id', 'case_number', 'filing_year', 'queried_at', 'status', 'success', 'error_message',
+            'scheduled',
+            'court__name', 'case_type__name',
+            'snapshot__id', 'snapshot__query_id', 'snapshot__cnr_number',
+            'snapshot__petitioner_name', 'snapshot__respondent_name',
+            'snapshot__filing_date', 'snapshot__next_hearing_date',
+            'snapshot__case_status', 'snapshot__court_hall', 'snapshot__judge_name',
+        ).prefetch_related(models.Prefetch(
+            'snapshot__documents',
+            queryset=CaseDocument.objects.only(
+                'id', 'case_detail_id', 'document_type', 'document_date', 'pdf_url', 'file_name'
+            ),
+        ))
+
+
 class CaseQuery(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     court = models.ForeignKey(Court, on_delete=models.CASCADE)
     case_type = models.ForeignKey(CaseType, on_delete=models.CASCADE)
@@ -28,15 +79,73 @@ class CaseQuery(models.Model):
     filing_year = models.CharField(max_length=4)
     user_ip = models.GenericIPAddressField()
     queried_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     success = models.BooleanField(default=False)
     error_message = models.TextField(blank=True)
+    # Queued by the watch-list scheduler rather than by a user
+    scheduled = models.BooleanField(default=False)
+    # Legacy inline copy of the scraper result; new results go to CaseQueryPayload
     raw_response = models.JSONField(blank=True, null=True)
+    # The case's stored detail: the query's own CaseDetail, or the earlier
+    # one an incremental refresh updated in place. That detail is shared,
+    # so it shows the case as last refreshed, not as this query saw it;
+    # what changed since is in CaseChange.
+    snapshot = models.ForeignKey(
+        'CaseDetail', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+
+    objects = CaseQueryQuerySet.as_manager()
     
     class Meta:
         ordering = ['-queried_at']
+        indexes = [
+            # History, newest first, optionally filtered by outcome
+            models.Index(fields=['-queried_at'], name='casequery_recent_idx'),
+            models.Index(fields=['success', '-queried_at'], name='casequery_success_recent_idx'),
+            # Prior successful lookups of the same case (latest_for_case, the archiver)
+            models.Index(
+                fields=['court', 'case_type', 'case_number', 'filing_year', '-queried_at'],
+                condition=models.Q(success=True),
+                name='casequery_case_success_idx',
+            ),
+        ]
+
+class CaseQueryPayload(models.Model):
+    """
+    The scraper result a query received, zlib-compressed JSON kept out of
+    the hot CaseQuery table. Which results are kept is set by
+    RAW_RESPONSE_RETENTION.
+    """
+    RETAIN_NONE = 'none'
+    RETAIN_ERRORS = 'errors'
+    RETAIN_FULL = 'full'
+    RETENTION_POLICIES = (RETAIN_NONE, RETAIN_ERRORS, RETAIN_FULL)
+
+    query = models.OneToOneField(CaseQuery, on_delete=models.CASCADE, primary_key=True, related_name='payload')
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()  # uncompressed bytes
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def retains(result: dict, policy: str) -> bool:
+        if policy not in CaseQueryPayload.RETENTION_POLICIES:
+            raise ValueError(f"Unknown raw response retention policy {policy!r}")
+        return policy == CaseQueryPayload.RETAIN_FULL or (
+            policy == CaseQueryPayload.RETAIN_ERRORS and not (result or {}).get('success')
+        )
+
+    @staticmethod
+    def pack(result: dict) -> dict:
+        """Field values storing a result"""
+        raw = json.dumps(result, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+        return {'data': zlib.compress(raw), 'size': len(raw)}
+
+    @property
+    def result(self) -> dict:
+        return json.loads(zlib.decompress(self.data))
 
 class CaseDetail(models.Model):
-    query = models.OneToOneField(CaseQuery, on_delete=models.CASCADE)
+    query = models.OneToOneField(CaseQuery, on_delete=models.CASCADE, related_name='case_detail')
     cnr_number = models.CharField(max_length=50, blank=True)
     petitioner_name = models.CharField(max_length=200, blank=True)
     respondent_name = models.CharField(max_length=200, blank=True)
@@ -45,11 +154,48 @@ class CaseDetail(models.Model):
     case_status = models.CharField(max_length=100, blank=True)
     court_hall = models.CharField(max_length=50, blank=True)
     judge_name = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        indexes = [
+            # Case-insensitive exact CNR lookups (cnr_number__iexact)
+            models.Index(Upper('cnr_number'), name='casedetail_cnr_upper_idx'),
+        ]
     
     def __str__(self):
         return f"Case {self.query.case_number}/{self.query.filing_year}"
 
+class CaseChange(models.Model):
+    """One field of a case that an incremental refresh found changed"""
+    FIELD_DOCUMENT = 'document'
+
+    case_detail = models.ForeignKey(CaseDetail, on_delete=models.CASCADE, related_name='changes')
+    query = models.ForeignKey(CaseQuery, on_delete=models.SET_NULL, null=True, blank=True, related_name='changes')
+    field = models.CharField(max_length=50)  # CaseDetail field name, or 'document' for a new order
+    old_value = models.TextField(blank=True)
+    new_value = models.TextField(blank=True)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['case_detail', '-changed_at'], name='casechange_detail_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.field}: {self.old_value!r} -> {self.new_value!r}"
+
 class CaseDocument(models.Model):
+    DOWNLOAD_PENDING = 'pending'
+    DOWNLOAD_RUNNING = 'downloading'
+    DOWNLOAD_DONE = 'downloaded'
+    DOWNLOAD_FAILED = 'failed'
+    DOWNLOAD_STATUS_CHOICES = [
+        (DOWNLOAD_PENDING, 'Pending'),
+        (DOWNLOAD_RUNNING, 'Downloading'),
+        (DOWNLOAD_DONE, 'Downloaded'),
+        (DOWNLOAD_FAILED, 'Failed'),
+    ]
+
     case_detail = models.ForeignKey(CaseDetail, on_delete=models.CASCADE, related_name='documents')
     document_type = models.CharField(max_length=50)  # Order, Judgment, etc.
     document_date = models.DateField(null=True, blank=True)
@@ -57,6 +203,65 @@ class CaseDocument(models.Model):
     file_name = models.CharField(max_length=200, blank=True)
     downloaded = models.BooleanField(default=False)
     local_file_path = models.CharField(max_length=500, blank=True)
+    download_status = models.CharField(max_length=20, choices=DOWNLOAD_STATUS_CHOICES, default=DOWNLOAD_PENDING)
+    # When a prefetch worker claimed the download; stale claims are taken over
+    download_claimed_at = models.DateTimeField(null=True, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    # SHA-256 of the PDF; identical files share one blob in storage
+    checksum = models.CharField(max_length=64, blank=True, db_index=True)
     
     class Meta:
         ordering = ['-document_date']
+        indexes = [
+            models.Index(fields=['case_detail', '-document_date'], name='casedocument_detail_date_idx'),
+        ]
+
+class WatchedCase(models.Model):
+    """A case the refresh scheduler keeps current without user searches"""
+    court = models.ForeignKey(Court, on_delete=models.CASCADE)
+    case_type = models.ForeignKey(CaseType, on_delete=models.CASCADE)
+    case_number = models.CharField(max_length=50)
+    filing_year = models.CharField(max_length=4)
+    is_active = models.BooleanField(default=True)
+    # Jittered due time; null means never refreshed, so due now
+    next_refresh_at = models.DateTimeField(null=True, blank=True)
+    last_refreshed_at = models.DateTimeField(null=True, blank=True)
+    last_query = models.ForeignKey(CaseQuery, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['court', 'case_type', 'case_number', 'filing_year'], name='watchedcase_unique_case',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['next_refresh_at'], condition=models.Q(is_active=True), name='watchedcase_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.case_type.code} {self.case_number}/{self.filing_year} ({self.court})"
+
+class ArchivedCaseQuery(models.Model):
+    """
+    A CaseQuery moved out of the hot table by the history archiver, kept as
+    history rendered it (without the user's IP or raw response) so its
+    detail and document rows could be dropped.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)  # the original CaseQuery id
+    court = models.ForeignKey(Court, on_delete=models.CASCADE)
+    case_type = models.ForeignKey(CaseType, on_delete=models.CASCADE)
+    case_number = models.CharField(max_length=50)
+    filing_year = models.CharField(max_length=4)
+    queried_at = models.DateTimeField()
+    success = models.BooleanField(default=False)
+    month = models.DateField()  # first day of queried_at's month, to export or drop a month at a time
+    data = models.JSONField()  # CaseQuerySerializer output
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-queried_at']
+        indexes = [
+            models.Index(fields=['-queried_at'], name='archivedquery_recent_idx'),
+            models.Index(fields=['month'], name='archivedquery_month_idx'),
+        ]
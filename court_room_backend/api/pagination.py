@@ -0,0 +1,120 @@
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+def estimate_count(queryset) -> int:
+    """
+    Cheap row count for a queryset. On PostgreSQL this is the planner's
+    estimate (table statistics when unfiltered, EXPLAIN otherwise), which can
+    be off by a few percent but never scans the table; other backends count.
+    """
+    queryset = queryset.order_by()
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1 means the table has never been analyzed
+        if row and row[0] >= 0:
+            return row[0]
+
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CaseHistoryCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (-queried_at, -id): the cursor holds both
+    values of the row it continues from, so each page is an index range
+    scan from there, with no COUNT(*) and no OFFSET, even through runs of
+    equal timestamps, and pages don't shift when new searches arrive.
+    Pass total=approximate for an estimated result count.
+
+    DRF's CursorPagination keys on the first ordering field alone and
+    steps over ties with an offset; this replaces its filtering with the
+    composite comparison. Positions are unique, so its link building never
+    needs an offset either.
+    """
+    ordering = ('-queried_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.approximate_count = None
+        if request.query_params.get('total') == 'approximate':
+            self.approximate_count = estimate_count(queryset)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor is not None else None
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = queryset.filter(self._beyond(current_position, reverse))
+
+        # One extra row tells whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if len(results) > len(self.page) else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = current_position is not None, current_position
+            self.has_previous, self.previous_position = following_position is not None, following_position
+        else:
+            self.has_next, self.next_position = following_position is not None, following_position
+            self.has_previous, self.previous_position = current_position is not None, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _beyond(self, position: str, reverse: bool) -> Q:
+        """Rows after `position` in the (reversed when paging back) ordering"""
+        try:
+            queried_at, pk = position.split('|')
+            queried_at, pk = datetime.fromisoformat(queried_at), uuid.UUID(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        lookup = 'gt' if reverse else 'lt'
+        return Q(**{f'queried_at__{lookup}': queried_at}) | Q(queried_at=queried_at, **{f'id__{lookup}': pk})
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            return f"{instance['queried_at'].isoformat()}|{instance['id']}"
+        return f'{instance.queried_at.isoformat()}|{instance.id}'
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.approximate_count is not None:
+            payload['approximate_count'] = self.approximate_count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['approximate_count'] = {'type': 'integer', 'example': 1000}
+        return response_schema
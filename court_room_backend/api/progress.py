@@ -0,0 +1,83 @@
+import json
+import logging
+import time
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import CaseQuery
+from .serializers import CaseQuerySerializer
+
+logger = logging.getLogger(__name__)
+
+# Stages of a search, in the order they are reported
+QUEUED = 'queued'
+STARTED = 'started'
+RATE_LIMITED = 'rate_limited'  # reported by the scraper
+FETCHED = 'fetched'  # reported by the scraper
+PARSED = 'parsed'  # reported by the scraper
+PERSISTED = 'persisted'
+COMPLETED = 'completed'
+FAILED = 'failed'
+FINAL_STAGES = (COMPLETED, FAILED)
+
+
+def _key(query_id) -> str:
+    return f'search-progress:{query_id}'
+
+
+def publish(query_id, stage: str, **data) -> Dict:
+    """
+    Append a progress event for a search.
+
+    Events live as a short list in SEARCH_PROGRESS_CACHE_ALIAS so the
+    worker that scrapes and the process streaming case-search/<id>/events/
+    need not be the same. Each gets an increasing id, which clients send
+    back as Last-Event-ID to resume. A search has one writer at a time
+    (the view, then its worker), so appends are read-modify-write.
+    Progress is advisory: a cache outage is logged, never raised.
+    """
+    cache = caches[settings.SEARCH_PROGRESS_CACHE_ALIAS]
+    try:
+        events = cache.get(_key(query_id)) or []
+        event = {'id': len(events) + 1, 'stage': stage, 'at': time.time(), **data}
+        events.append(event)
+        cache.set(_key(query_id), events, timeout=settings.SEARCH_PROGRESS_TTL)
+    except Exception as e:
+        logger.warning(f"Could not record search progress: {str(e)}")
+        return {}
+    return event
+
+
+def reporter(query_id):
+    """A progress callback for ECourtsScraper: reporter(query_id)(stage, **data)"""
+    return lambda stage, **data: publish(query_id, stage, **data)
+
+
+def publish_final(query: CaseQuery) -> Dict:
+    """Report a finished search with the payload case-detail/<id>/ returns"""
+    return publish(query.id, COMPLETED if query.success else FAILED, result=final_payload(query))
+
+
+def final_payload(query: CaseQuery) -> Dict:
+    data = CaseQuerySerializer(query).data
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def events_since(query_id, last_id: int = 0) -> List[Dict]:
+    """Events after `last_id`, oldest first"""
+    try:
+        events = caches[settings.SEARCH_PROGRESS_CACHE_ALIAS].get(_key(query_id)) or []
+    except Exception as e:
+        logger.warning(f"Could not read search progress: {str(e)}")
+        return []
+    return [event for event in events if event['id'] > last_id]
+
+
+def format_event(event: Dict) -> str:
+    """An event as a text/event-stream message"""
+    name = 'result' if event['stage'] in FINAL_STAGES else 'progress'
+    body = json.dumps(event, cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {name}\ndata: {body}\n\n"
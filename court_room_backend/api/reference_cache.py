@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceCache:
+    """
+    Versioned cache of serialized reference data (courts, case types).
+
+    Entries are stored under the current data version, which lives in a
+    shared Django cache alias so every process sees a bump. The version
+    expires after REFERENCE_CACHE_VERSION_TTL, so a process that missed a
+    bump (say its cache is not actually shared) starts a new version and
+    stops serving old data within that time. Changing a
+    Court or CaseType bumps the version (see api.signals), which orphans
+    all entries at once instead of tracking which pages a row appears on.
+    An in-process copy of each entry saves the shared-cache round trip for
+    the payload; only the version is read from the shared cache per request.
+
+    The version is a millisecond timestamp of the last change, so it also
+    serves as Last-Modified.
+    """
+    VERSION_KEY = 'reference-data:version'
+
+    def __init__(self, alias: str, max_entries: int):
+        self.alias = alias
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def version(self) -> int:
+        """Current data version; starts a new one if the shared cache lost it"""
+        try:
+            version = self.shared.get(self.VERSION_KEY)
+            if version is None:
+                self.shared.add(self.VERSION_KEY, _now_ms(), timeout=settings.REFERENCE_CACHE_VERSION_TTL)
+                version = self.shared.get(self.VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Shared reference cache unavailable: {str(e)}")
+            version = None
+        # Without a shared version nothing can be trusted; a fresh one misses every entry
+        return version or _now_ms()
+
+    def bump(self):
+        """Invalidate every cached entry (call after reference data changes commit)"""
+        try:
+            current = self.shared.get(self.VERSION_KEY) or 0
+            self.shared.set(
+                self.VERSION_KEY, max(_now_ms(), current + 1), timeout=settings.REFERENCE_CACHE_VERSION_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Shared reference cache unavailable: {str(e)}")
+        self.clear_local()
+
+    def get(self, name: str, version: int) -> Optional[Dict]:
+        """The cached entry ({'data', 'etag', 'version'}) under a version, or None"""
+        key = self._key(name, version)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        try:
+            entry = self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Shared reference cache unavailable: {str(e)}")
+            return None
+        if entry is not None:
+            self._store_local(key, entry)
+        return entry
+
+    def set(self, name: str, data, version: int) -> Dict:
+        """
+        Cache data under `version`. Read the version before querying, so data
+        from before a concurrent change is never filed under the new one.
+        """
+        body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+        entry = {
+            'data': data,
+            'etag': '"{}"'.format(hashlib.sha256(body.encode()).hexdigest()[:32]),
+            'version': version,
+        }
+        key = self._key(name, version)
+        self._store_local(key, entry)
+        try:
+            self.shared.set(key, entry, timeout=settings.REFERENCE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Shared reference cache unavailable: {str(e)}")
+        return entry
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _key(name: str, version: int) -> str:
+        return f'reference-data:{version}:{name}'
+
+    def _store_local(self, key: str, entry: Dict):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Entries of old versions pile up here; starting over is cheap
+                self._entries.clear()
+            self._entries[key] = entry
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+_reference_cache = None
+
+
+def get_reference_cache() -> ReferenceCache:
+    """Return the process-wide reference data cache"""
+    global _reference_cache
+    if _reference_cache is None:
+        _reference_cache = ReferenceCache(
+            alias=settings.REFERENCE_CACHE_ALIAS,
+            max_entries=settings.REFERENCE_CACHE_MAX_ENTRIES,
+        )
+    return _reference_cache
@@ -0,0 +1,179 @@
+import calendar
+import logging
+import math
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, Func, Min, Q, Value, When
+from django.db.models.functions import Abs, Coalesce
+from django.utils import timezone
+
+from .models import CaseQuery, WatchedCase
+
+logger = logging.getLogger(__name__)
+
+# user_ip recorded on searches the scheduler makes
+SCHEDULER_IP = '127.0.0.1'
+
+# Priority of never refreshed cases; above any staleness
+NEVER_REFRESHED = 1e18
+
+HEARING_DATE = 'last_query__snapshot__next_hearing_date'
+
+
+class Epoch(Func):
+    """Seconds since 1970-01-01 of a date or datetime column (dates count from midnight UTC)"""
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='EXTRACT(EPOCH FROM %(expressions)s)', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, template='((julianday(%(expressions)s) - 2440587.5) * 86400.0)', **extra_context
+        )
+
+
+class RefreshScheduler:
+    """
+    Keeps watched cases current by queueing searches for them.
+
+    Each tick (WATCH_REFRESH_TICK seconds, run by Celery beat) queues the
+    most urgent due cases, up to the tick's share of
+    WATCH_REFRESH_DAILY_BUDGET, so upstream load is spread evenly over the
+    day however many cases fall due at once. A case's next due time is
+    its refresh interval (shorter around a hearing) with random jitter, so
+    cases added together drift apart instead of coming due together.
+
+    `clock` returns the current aware datetime; tests pass a fake one.
+    """
+
+    def __init__(self, clock=timezone.now, rng: random.Random = None):
+        self.clock = clock
+        self.random = rng or random.Random()
+
+    @property
+    def tick_budget(self) -> int:
+        """Searches per tick: the daily budget divided over the day's ticks"""
+        ticks_per_day = 24 * 60 * 60 / settings.WATCH_REFRESH_TICK
+        return max(1, math.ceil(settings.WATCH_REFRESH_DAILY_BUDGET / ticks_per_day))
+
+    def refresh_interval(self, hearing_date, today) -> timedelta:
+        """Cases with a hearing coming up (or just past) change often, so refresh them sooner"""
+        if hearing_date is not None and abs((hearing_date - today).days) <= settings.WATCH_HEARING_WINDOW_DAYS:
+            return timedelta(seconds=settings.WATCH_REFRESH_HEARING_INTERVAL)
+        return timedelta(seconds=settings.WATCH_REFRESH_INTERVAL)
+
+    def priority(self, now):
+        """
+        Urgency of a watched case as a query expression, higher first:
+        staleness measured in refresh intervals, plus up to 1 for hearing
+        proximity (1 on the hearing day, 1/2 a day away, and so on). Never
+        refreshed cases come first.
+        """
+        today = timezone.localdate(now)
+        window = timedelta(days=settings.WATCH_HEARING_WINDOW_DAYS)
+        hearing_days = Abs(Epoch(HEARING_DATE) - Value(float(calendar.timegm(today.timetuple())))) / Value(86400.0)
+        interval = Case(
+            When(Q(**{f'{HEARING_DATE}__range': (today - window, today + window)}),
+                 then=Value(float(settings.WATCH_REFRESH_HEARING_INTERVAL))),
+            default=Value(float(settings.WATCH_REFRESH_INTERVAL)),
+            output_field=FloatField(),
+        )
+        hearing_bonus = Case(
+            When(Q(**{f'{HEARING_DATE}__isnull': True}), then=Value(0.0)),
+            default=Value(1.0) / (Value(1.0) + hearing_days),
+            output_field=FloatField(),
+        )
+        staleness = (Value(now.timestamp()) - Epoch('last_refreshed_at')) / interval
+        return Case(
+            When(last_refreshed_at__isnull=True, then=Value(NEVER_REFRESHED)),
+            default=staleness + hearing_bonus,
+            output_field=FloatField(),
+        )
+
+    def next_refresh_at(self, hearing_date, now):
+        interval = self.refresh_interval(hearing_date, timezone.localdate(now))
+        jitter = settings.WATCH_REFRESH_JITTER
+        return now + interval * self.random.uniform(1 - jitter, 1 + jitter)
+
+    def due(self, now):
+        return WatchedCase.objects.filter(is_active=True).filter(
+            Q(next_refresh_at__isnull=True) | Q(next_refresh_at__lte=now)
+        )
+
+    def plan(self, now) -> dict:
+        """The watched case IDs to refresh this tick, mapped to their last known hearing date"""
+        # Ranked and cut to the budget in the database, however long the backlog
+        rows = (
+            self.due(now).annotate(priority=self.priority(now))
+            .order_by('-priority', 'id').values_list('id', HEARING_DATE)[:self.tick_budget]
+        )
+        return dict(rows)
+
+    def run(self) -> dict:
+        """Queue this tick's searches; returns how many were queued and the backlog after"""
+        now = self.clock()
+        hearing_dates = self.plan(now)
+
+        with transaction.atomic():
+            # Another scheduler running the same tick skips rows we hold
+            watched = list(
+                self.due(now).filter(id__in=hearing_dates).select_for_update(skip_locked=True)
+            )
+            queries = [
+                CaseQuery(
+                    court_id=case.court_id, case_type_id=case.case_type_id, case_number=case.case_number,
+                    filing_year=case.filing_year, user_ip=SCHEDULER_IP, scheduled=True,
+                )
+                for case in watched
+            ]
+            CaseQuery.objects.bulk_create(queries)
+            for case, query in zip(watched, queries):
+                case.last_query = query
+                case.last_refreshed_at = now
+                case.next_refresh_at = self.next_refresh_at(hearing_dates[case.id], now)
+            WatchedCase.objects.bulk_update(watched, ['last_query', 'last_refreshed_at', 'next_refresh_at'])
+
+            query_ids = [query.id for query in queries]
+            transaction.on_commit(lambda: _queue_searches(query_ids))
+
+        report = self.backlog()
+        report['queued'] = len(queries)
+        return report
+
+    def backlog(self) -> dict:
+        """How far refreshes have fallen behind their due times"""
+        now = self.clock()
+        stats = self.due(now).aggregate(
+            due=Count('id'),
+            never_refreshed=Count('id', filter=Q(next_refresh_at__isnull=True)),
+            oldest_due=Min(Coalesce('next_refresh_at', 'created_at')),
+        )
+        tick_budget = self.tick_budget
+        return {
+            'watched': WatchedCase.objects.filter(is_active=True).count(),
+            'due': stats['due'],
+            'never_refreshed': stats['never_refreshed'],
+            'lag_seconds': max(0, round((now - stats['oldest_due']).total_seconds())) if stats['oldest_due'] else 0,
+            'tick_budget': tick_budget,
+            # Time to clear the current backlog at this budget, ignoring cases that fall due meanwhile
+            'catch_up_seconds': math.ceil(stats['due'] / tick_budget) * settings.WATCH_REFRESH_TICK,
+        }
+
+
+def _queue_searches(query_ids):
+    from .tasks import run_case_search
+
+    for i, query_id in enumerate(query_ids):
+        try:
+            run_case_search.delay(str(query_id))
+        except Exception as e:
+            # The broker is down; the rest would fail the same way
+            logger.error(f"Error queueing scheduled searches: {str(e)}")
+            CaseQuery.objects.filter(id__in=query_ids[i:]).update(
+                status=CaseQuery.STATUS_FAILED, error_message=str(e),
+            )
+            return
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Court, CaseType, CaseQuery, CaseDetail, CaseDocument
 
@@ -28,7 +29,7 @@ class CaseDetailSerializer(serializers.ModelSerializer):
         ]
 
 class CaseQuerySerializer(serializers.ModelSerializer):
-    case_detail = CaseDetailSerializer(read_only=True)
+    case_detail = CaseDetailSerializer(source='snapshot', read_only=True)
     court_name = serializers.CharField(source='court.name', read_only=True)
     case_type_name = serializers.CharField(source='case_type.name', read_only=True)
     
@@ -36,12 +37,26 @@ class CaseQuerySerializer(serializers.ModelSerializer):
         model = CaseQuery
         fields = [
             'id', 'court_name', 'case_type_name', 'case_number',
-            'filing_year', 'queried_at', 'success', 'error_message',
-            'case_detail'
+            'filing_year', 'queried_at', 'status', 'success', 'error_message',
+            'scheduled', 'case_detail'
         ]
 
+class ArchivedCaseQuerySerializer(serializers.BaseSerializer):
+    """Archived history entries, as CaseQuerySerializer rendered them when archived"""
+    def to_representation(self, instance):
+        return instance.data
+
 class CaseSearchSerializer(serializers.Serializer):
     court_id = serializers.IntegerField()
     case_type_id = serializers.IntegerField()
     case_number = serializers.CharField(max_length=50)
-    filing_year = serializers.CharField(max_length=4)
\ No newline at end of file
+    filing_year = serializers.CharField(max_length=4)
+    force_refresh = serializers.BooleanField(default=False)
+
+class BulkCaseSearchItemSerializer(CaseSearchSerializer):
+    # force_refresh applies to the whole bulk request
+    force_refresh = None
+
+class BulkCaseSearchSerializer(serializers.Serializer):
+    items = BulkCaseSearchItemSerializer(many=True, allow_empty=False, max_length=settings.BULK_SEARCH_MAX_ITEMS)
+    force_refresh = serializers.BooleanField(default=False)
@@ -0,0 +1,406 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+import asyncio
+import logging
+import os
+import weakref
+from urllib.parse import urlsplit
+
+from . import progress
+from .models import CaseQuery, CaseQueryPayload, CaseDetail, CaseChange, CaseDocument
+from .storage import BlobWriter
+from court_room_backend.scrapers import runtime
+from court_room_backend.scrapers.ecourts_scraper import ECourtsScraper
+from court_room_backend.scrapers.http_client import get_http_client
+from court_room_backend.scrapers.rate_limiter import get_rate_limiter
+from court_room_backend.scrapers.result_cache import CaseResultCache, get_result_cache
+from court_room_backend.scrapers.singleflight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+
+def result_cache_key(query: CaseQuery) -> str:
+    """Result cache key for the case a query asks about"""
+    return CaseResultCache.make_key(
+        query.court_id, query.case_type.code, query.case_number, query.filing_year
+    )
+
+
+def serve_from_cache(query: CaseQuery) -> bool:
+    """Complete the query from the result cache; False on a cache miss"""
+    result = get_result_cache().get(result_cache_key(query))
+    if result is None:
+        return False
+
+    store_search_result(query, result)
+    return True
+
+
+def invalidate_cached_result(query: CaseQuery):
+    """Forget the cached result for the case a query asks about"""
+    get_result_cache().invalidate(result_cache_key(query))
+
+
+def execute_case_search(query: CaseQuery, force_refresh: bool = False) -> CaseQuery:
+    """
+    Scrape the case for a CaseQuery and store the outcome on it.
+
+    Fresh cached results are reused unless force_refresh is set.
+    Used by the Celery task; safe to call directly (e.g. in tests).
+    Each stage is reported to api.progress for case-search/<id>/events/.
+    """
+    query.status = CaseQuery.STATUS_RUNNING
+    query.save(update_fields=['status'])
+    progress.publish(query.id, progress.STARTED)
+
+    try:
+        cache = get_result_cache()
+        key = result_cache_key(query)
+        result = None if force_refresh else cache.get(key)
+
+        if result is None:
+            # Identical searches running anywhere share one scrape
+            result = get_single_flight().run(
+                key, lambda: _scrape(query, key, force_refresh)
+            )
+
+        store_search_result(query, result)
+        progress.publish(query.id, progress.PERSISTED)
+
+    except Exception as e:
+        logger.error(f"Error in case search: {str(e)}")
+        query.success = False
+        query.status = CaseQuery.STATUS_FAILED
+        query.error_message = str(e)
+        query.save(update_fields=['success', 'status', 'error_message'])
+
+    progress.publish_final(query)
+    return query
+
+
+def _scrape(query: CaseQuery, key: str, force_refresh: bool) -> dict:
+    """Scrape the portal for a query's case and cache the result"""
+    cache = get_result_cache()
+
+    # A flight that finished just before we took the lock may have cached it
+    result = None if force_refresh else cache.get(key)
+    if result is not None:
+        return result
+
+    scraper = ECourtsScraper(progress=progress.reporter(query.id))
+
+    # Run on the shared scraper loop so pooled resources are reused
+    result = runtime.run(
+        scraper.search_case(
+            query.court_id,
+            query.case_type.code,
+            query.case_number,
+            query.filing_year
+        )
+    )
+    cache.set(key, result)
+    return result
+
+
+async def asearch_case(query: CaseQuery, force_refresh: bool = False) -> dict:
+    """
+    Async counterpart of the scrape step in execute_case_search.
+
+    Returns the scraper result without storing it. The scrape itself runs
+    on the shared scraper loop, so its pooled browser and HTTP connections
+    are reused whichever loop the caller is on.
+    """
+    cache = get_result_cache()
+    key = result_cache_key(query)
+    result = None if force_refresh else await sync_to_async(cache.get, thread_sensitive=False)(key)
+    if result is not None:
+        return result
+
+    async def scrape():
+        result = None if force_refresh else await sync_to_async(cache.get, thread_sensitive=False)(key)
+        if result is not None:
+            return result
+
+        scraper = ECourtsScraper(progress=progress.reporter(query.id))
+        result = await asyncio.wrap_future(runtime.submit(
+            scraper.search_case(
+                query.court_id,
+                query.case_type.code,
+                query.case_number,
+                query.filing_year
+            )
+        ))
+        await sync_to_async(cache.set, thread_sensitive=False)(key, result)
+        return result
+
+    return await get_single_flight().arun(key, scrape)
+
+
+async def aexecute_case_search(query: CaseQuery, force_refresh: bool = False,
+                               raise_errors: bool = False) -> CaseQuery:
+    """
+    Async counterpart of execute_case_search for ASGI views.
+
+    With raise_errors, an unexpected error is re-raised after the query is
+    marked failed, so callers can tell it from an unsuccessful search.
+    """
+    await sync_to_async(progress.publish, thread_sensitive=False)(query.id, progress.STARTED)
+    try:
+        result = await asearch_case(query, force_refresh=force_refresh)
+
+        # The ORM has no async transactions, so the write step runs in a thread
+        await sync_to_async(store_search_result)(query, result)
+        await sync_to_async(progress.publish, thread_sensitive=False)(query.id, progress.PERSISTED)
+
+    except Exception as e:
+        logger.error(f"Error in case search: {str(e)}")
+        query.success = False
+        query.status = CaseQuery.STATUS_FAILED
+        query.error_message = str(e)
+        await query.asave(update_fields=['success', 'status', 'error_message'])
+        if raise_errors:
+            raise
+
+    finally:
+        await sync_to_async(progress.publish_final)(query)
+
+    return query
+
+
+_bulk_host_limits = weakref.WeakKeyDictionary()
+
+
+def bulk_host_limit(host: str) -> asyncio.Semaphore:
+    """Per-host cap on concurrent bulk searches, shared by all bulk requests"""
+    limits = _bulk_host_limits.setdefault(asyncio.get_running_loop(), {})
+    semaphore = limits.get(host)
+    if semaphore is None:
+        semaphore = limits[host] = asyncio.Semaphore(settings.BULK_SEARCH_PER_HOST_CONCURRENCY)
+    return semaphore
+
+
+# CaseDetail columns filled from the scraper's case_details
+CASE_DETAIL_FIELDS = (
+    'cnr_number', 'petitioner_name', 'respondent_name', 'filing_date',
+    'next_hearing_date', 'case_status', 'court_hall', 'judge_name',
+)
+
+
+def store_search_result(query: CaseQuery, result: dict) -> CaseQuery:
+    """
+    Persist a scraper result dict onto the query.
+
+    A case seen before is refreshed incrementally: its latest CaseDetail is
+    updated in place with only the fields that changed, only newly listed
+    documents are inserted, and each difference is logged as a CaseChange.
+    The query points at that detail as its snapshot. Otherwise a new detail
+    and its documents are written. Either way everything is built in memory
+    first and written in one short transaction. The raw result is kept in
+    CaseQueryPayload as RAW_RESPONSE_RETENTION allows.
+    """
+    query.success = result['success']
+
+    if not result['success']:
+        query.status = CaseQuery.STATUS_FAILED
+        query.error_message = result.get('error') or 'Search failed'
+        with transaction.atomic():
+            query.save(update_fields=['success', 'status', 'error_message'])
+            store_raw_response(query, result)
+        return query
+
+    query.status = CaseQuery.STATUS_COMPLETED
+
+    with transaction.atomic():
+        snapshot = _latest_snapshot(query) if settings.CASE_INCREMENTAL_REFRESH else None
+        if snapshot is None:
+            documents = _store_new_snapshot(query, result['data'])
+        else:
+            documents = _refresh_snapshot(query, snapshot, result['data'])
+        query.save(update_fields=['success', 'status', 'snapshot'])
+        store_raw_response(query, result)
+
+        if documents and settings.DOCUMENT_PREFETCH_ENABLED:
+            document_ids = [document.id for document in documents]
+            transaction.on_commit(lambda: queue_document_prefetch(document_ids))
+
+    return query
+
+
+def store_raw_response(query: CaseQuery, result: dict):
+    """Keep the scraper result, compressed, if RAW_RESPONSE_RETENTION asks for it"""
+    if CaseQueryPayload.retains(result, settings.RAW_RESPONSE_RETENTION):
+        CaseQueryPayload.objects.update_or_create(query=query, defaults=CaseQueryPayload.pack(result))
+
+
+def _latest_snapshot(query: CaseQuery):
+    """The stored detail of the query's case, locked for the refresh; None if never fetched"""
+    prior = CaseQuery.objects.exclude(id=query.id).filter(snapshot__isnull=False).latest_for_case(
+        query.court_id, query.case_type_id, query.case_number, query.filing_year
+    )
+    if prior is None:
+        return None
+    return CaseDetail.objects.select_for_update().filter(id=prior.snapshot_id).first()
+
+
+def _store_new_snapshot(query: CaseQuery, data: dict) -> list:
+    case_detail = CaseDetail(query=query, **_case_detail_values(data['case_details']))
+    documents = _build_documents(case_detail, data['documents'])
+
+    case_detail.save(force_insert=True)
+    # case_detail_id is resolved from the now-saved detail at insert time
+    CaseDocument.objects.bulk_create(documents)
+    query.snapshot = case_detail
+    return documents
+
+
+def _refresh_snapshot(query: CaseQuery, case_detail: CaseDetail, data: dict) -> list:
+    changes = []
+    for name, value in _case_detail_values(data['case_details']).items():
+        old = getattr(case_detail, name)
+        if old != value:
+            changes.append(CaseChange(
+                case_detail=case_detail, query=query, field=name,
+                old_value=_change_value(old), new_value=_change_value(value),
+            ))
+            setattr(case_detail, name, value)
+    if changes:
+        case_detail.save(update_fields=[change.field for change in changes])
+
+    known_urls = set(case_detail.documents.values_list('pdf_url', flat=True))
+    documents = _build_documents(case_detail, data['documents'], known_urls)
+    CaseDocument.objects.bulk_create(documents)
+    changes.extend(
+        CaseChange(case_detail=case_detail, query=query, field=CaseChange.FIELD_DOCUMENT,
+                   new_value=document.pdf_url)
+        for document in documents
+    )
+    CaseChange.objects.bulk_create(changes)
+
+    query.snapshot = case_detail
+    return documents
+
+
+def _case_detail_values(case_data: dict) -> dict:
+    """Scraped case_details as CaseDetail field values, so they compare equal to stored ones"""
+    values = {}
+    for name in CASE_DETAIL_FIELDS:
+        field = CaseDetail._meta.get_field(name)
+        value = case_data.get(name)
+        if value in (None, ''):
+            values[name] = None if field.null else ''
+        else:
+            values[name] = field.to_python(value)
+    return values
+
+
+def _build_documents(case_detail: CaseDetail, documents_data, known_urls=()) -> list:
+    """CaseDocuments for the listed orders whose URLs are not already stored"""
+    known_urls = set(known_urls)
+    return [
+        CaseDocument(
+            case_detail=case_detail,
+            document_type=doc_data.get('document_type', 'Document'),
+            document_date=doc_data.get('document_date'),
+            pdf_url=doc_data['pdf_url'],
+            file_name=doc_data.get('file_name', 'Document')
+        )
+        for doc_data in documents_data
+        if doc_data['pdf_url'] not in known_urls
+    ]
+
+
+def _change_value(value) -> str:
+    return '' if value is None else str(value)
+
+
+def record_document_blob(document: CaseDocument, path: str, checksum: str, size: int):
+    """Point a document at its blob in content-addressed storage"""
+    document.local_file_path = path
+    document.checksum = checksum
+    document.file_size = size
+    document.downloaded = True
+    document.download_status = CaseDocument.DOWNLOAD_DONE
+    document.save(update_fields=['local_file_path', 'checksum', 'file_size', 'downloaded', 'download_status'])
+
+
+def queue_document_prefetch(document_ids):
+    """Hand freshly stored documents to the prefetch worker"""
+    from .tasks import prefetch_documents
+
+    try:
+        prefetch_documents.delay(list(document_ids))
+    except Exception as e:
+        # Prefetch is an optimisation; download-pdf still fetches on demand
+        logger.warning(f"Could not queue document prefetch: {str(e)}")
+
+
+def prefetch_document_files(document_ids) -> dict:
+    """Download the given documents' PDFs into storage; returns outcome counts"""
+    return runtime.run(aprefetch_document_files(document_ids))
+
+
+async def aprefetch_document_files(document_ids) -> dict:
+    semaphore = asyncio.Semaphore(settings.DOCUMENT_PREFETCH_CONCURRENCY)
+    outcomes = {}
+
+    async def prefetch(document_id):
+        async with semaphore:
+            outcome = await _prefetch_document(document_id)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    await asyncio.gather(*(prefetch(document_id) for document_id in document_ids))
+    return outcomes
+
+
+async def _prefetch_document(document_id) -> str:
+    # Claim the document so concurrent prefetches and retries skip it. A
+    # claim older than DOCUMENT_PREFETCH_CLAIM_TIMEOUT belonged to a worker
+    # that died mid-download, so it is taken over.
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.DOCUMENT_PREFETCH_CLAIM_TIMEOUT)
+    claimed = await CaseDocument.objects.filter(id=document_id).filter(
+        Q(download_status__in=[CaseDocument.DOWNLOAD_PENDING, CaseDocument.DOWNLOAD_FAILED])
+        | Q(download_status=CaseDocument.DOWNLOAD_RUNNING, download_claimed_at__isnull=True)
+        | Q(download_status=CaseDocument.DOWNLOAD_RUNNING, download_claimed_at__lt=stale)
+    ).aupdate(download_status=CaseDocument.DOWNLOAD_RUNNING, download_claimed_at=now)
+    if not claimed:
+        return 'skipped'
+    document = await CaseDocument.objects.aget(id=document_id)
+
+    # The same order linked from another case: reuse its blob
+    existing = await CaseDocument.objects.filter(
+        pdf_url=document.pdf_url, download_status=CaseDocument.DOWNLOAD_DONE,
+    ).exclude(checksum='').afirst()
+    if existing is not None and os.path.exists(existing.local_file_path):
+        await sync_to_async(record_document_blob)(
+            document, existing.local_file_path, existing.checksum, existing.file_size
+        )
+        return 'deduplicated'
+
+    try:
+        blob = await _download_blob(document.pdf_url)
+    except Exception as e:
+        logger.warning(f"Prefetch of document {document_id} failed: {str(e)}")
+        await CaseDocument.objects.filter(id=document_id).aupdate(download_status=CaseDocument.DOWNLOAD_FAILED)
+        return 'failed'
+
+    await sync_to_async(record_document_blob)(document, blob.path, blob.checksum, blob.size)
+    return 'downloaded'
+
+
+async def _download_blob(url: str) -> BlobWriter:
+    """Stream a PDF into content-addressed storage"""
+    await get_rate_limiter().acquire(urlsplit(url).netloc)
+    with BlobWriter() as blob:
+        async with get_http_client().stream('GET', url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                blob.write(chunk)
+                if blob.size > settings.DOCUMENT_MAX_BYTES:
+                    raise ValueError(f"larger than DOCUMENT_MAX_BYTES ({settings.DOCUMENT_MAX_BYTES})")
+        blob.commit()
+    return blob
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CaseType, Court
+from .reference_cache import get_reference_cache
+
+
+@receiver([post_save, post_delete], sender=Court)
+@receiver([post_save, post_delete], sender=CaseType)
+def invalidate_reference_cache(sender, **kwargs):
+    """Courts and case types changed (admin, seeding); bump the cache version once committed"""
+    transaction.on_commit(get_reference_cache().bump)
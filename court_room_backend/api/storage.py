@@ -0,0 +1,63 @@
+import hashlib
+import os
+import tempfile
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def documents_root() -> str:
+    return os.path.join(settings.MEDIA_ROOT, 'court_documents')
+
+
+def blob_path(checksum: str) -> str:
+    """Where the PDF with this SHA-256 lives: court_documents/ab/cd/abcd....pdf"""
+    return os.path.join(documents_root(), checksum[:2], checksum[2:4], f'{checksum}.pdf')
+
+
+class BlobWriter:
+    """
+    Write a document into content-addressed storage as it streams in.
+
+    Bytes go to a temp file while being hashed; commit() moves the file to
+    its SHA-256 path, or drops it if an identical blob is already stored,
+    so the same order linked from many cases is kept once. Anything not
+    committed is removed on close().
+    """
+
+    def __init__(self):
+        os.makedirs(documents_root(), exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=documents_root(), suffix='.part', delete=False)
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.checksum = None
+        self.path = None
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> str:
+        self._file.close()
+        self.checksum = self._hash.hexdigest()
+        self.path = blob_path(self.checksum)
+        if os.path.exists(self.path):
+            os.remove(self._file.name)
+        else:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            os.replace(self._file.name, self.path)
+        return self.path
+
+    def close(self):
+        self._file.close()
+        if self.path is None and os.path.exists(self._file.name):
+            os.remove(self._file.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,53 @@
+from celery import shared_task
+from django.conf import settings
+import logging
+
+from .archive import HistoryArchiver, hot_window_start
+from .models import CaseQuery
+from .scheduler import RefreshScheduler
+from .services import execute_case_search, prefetch_document_files
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def run_case_search(query_id, force_refresh=False):
+    """Scrape and store the results for a pending CaseQuery"""
+    try:
+        query = CaseQuery.objects.select_related('case_type').get(id=query_id)
+    except CaseQuery.DoesNotExist:
+        logger.warning(f"Case query {query_id} no longer exists")
+        return None
+
+    if query.status not in (CaseQuery.STATUS_PENDING, CaseQuery.STATUS_RUNNING):
+        # Already processed (e.g. redelivered after acks_late)
+        return query.status
+
+    execute_case_search(query, force_refresh=force_refresh)
+    return query.status
+
+
+@shared_task
+def prefetch_documents(document_ids):
+    """Download stored documents' PDFs ahead of the first download-pdf click"""
+    return prefetch_document_files(document_ids)
+
+
+@shared_task
+def refresh_watched_cases():
+    """Queue searches for the most urgent watched cases; run by Celery beat every WATCH_REFRESH_TICK"""
+    report = RefreshScheduler().run()
+    if report['lag_seconds'] > settings.WATCH_REFRESH_TICK:
+        logger.warning(f"Watched case refreshes are behind: {report}")
+    return report
+
+
+@shared_task
+def archive_case_history():
+    """Move history older than HISTORY_HOT_DAYS into the archive; run daily by Celery beat"""
+    before = hot_window_start()
+    if before is None:
+        return 0
+    return HistoryArchiver(
+        before, batch_size=settings.HISTORY_ARCHIVE_BATCH_SIZE, export_dir=settings.HISTORY_ARCHIVE_EXPORT_DIR,
+    ).run()
@@ -1,3 +1,1852 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import hashlib
+import httpx
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from court_room_backend.celery import app as celery_app
+from bs4 import BeautifulSoup
+from court_room_backend.scrapers.browser_pool import BrowserPool, BrowserPoolBusy
+from court_room_backend.scrapers.ecourts_scraper import ECourtsScraper
+from court_room_backend.scrapers.fake_portal import FakePortal
+from court_room_backend.scrapers.form_tokens import FormTokenCache
+from court_room_backend.scrapers.http_client import PooledHTTPClient, get_http_client
+from court_room_backend.scrapers.rate_limiter import RateLimiter
+from court_room_backend.scrapers.result_cache import get_result_cache
+from court_room_backend.scrapers.singleflight import SingleFlight
+from .models import (
+    ArchivedCaseQuery, Court, CaseType, CaseQuery, CaseQueryPayload, CaseDetail, CaseChange, CaseDocument, WatchedCase,
+)
+from . import progress
+from .checks import check_shared_caches
+from .reference_cache import ReferenceCache, get_reference_cache
+from .scheduler import RefreshScheduler
+from .services import aexecute_case_search, aprefetch_document_files, store_search_result
+from .storage import blob_path
+
+
+SUCCESS_RESULT = {
+    'success': True,
+    'error': None,
+    'data': {
+        'case_details': {
+            'cnr_number': 'GJHC240012342023',
+            'petitioner_name': 'A. Petitioner',
+            'respondent_name': 'State of Gujarat',
+            'filing_date': '2023-01-15',
+            'next_hearing_date': '2024-02-01',
+            'case_status': 'Pending',
+        },
+        'documents': [
+            {
+                'document_type': 'Order',
+                'pdf_url': 'https://services.ecourts.gov.in/orders/1.pdf',
+                'file_name': 'Order 15/01/2023',
+                'document_date': '2023-01-15',
+            },
+        ],
+    },
+}
+
+SEARCH_FORM_PAGE = """
+<form>
+  <input type="hidden" name="__VIEWSTATE" value="vs-{n}" />
+  <input type="hidden" name="__EVENTVALIDATION" value="ev-{n}" />
+  <select name="ctl00$ContentPlaceHolder1$DropDownList1"></select>
+</form>
+"""
+
+RESULTS_PAGE = """
+<table id="ctl00_ContentPlaceHolder1_GridView1">
+  <tr><th>Field</th><th>Value</th></tr>
+  <tr><td>CNR Number</td><td>GJHC240012342023</td></tr>
+  <tr><td>Petitioner</td><td>A. Petitioner</td></tr>
+  <tr><td>Next Hearing Date</td><td>01/02/2024</td></tr>
+</table>
+<a href="/orders/1.pdf">Order 15/01/2023</a>
+"""
+
+
+class EagerCeleryMixin:
+    """Run Celery tasks in-process so tests don't need a broker"""
+
+    def setUp(self):
+        super().setUp()
+        previous = celery_app.conf.task_always_eager
+        celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=True)
+        self.addCleanup(celery_app.conf.update, CELERY_TASK_ALWAYS_EAGER=previous)
+
+
+class CaseDataMixin:
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        get_result_cache().clear_local()
+        get_reference_cache().clear_local()
+        self.client = APIClient()
+        self.court = Court.objects.create(
+            id=6, name='Gujarat High Court', location='Ahmedabad',
+            base_url='https://services.ecourts.gov.in/ecourtindia_v6/'
+        )
+        self.case_type = CaseType.objects.create(name='Writ Petition', code='WP', court=self.court)
+
+    def search_payload(self, **overrides):
+        payload = {
+            'court_id': self.court.id,
+            'case_type_id': self.case_type.id,
+            'case_number': '1234',
+            'filing_year': '2023',
+        }
+        payload.update(overrides)
+        return payload
+
+
+def mock_scraper_result(result):
+    return mock.patch(
+        'court_room_backend.scrapers.ecourts_scraper.ECourtsScraper.search_case',
+        new=mock.AsyncMock(return_value=result)
+    )
+
+
+class CaseSearchQueueTests(EagerCeleryMixin, CaseDataMixin, TestCase):
+
+    def test_search_returns_pending_query_and_detail_is_pollable(self):
+        with mock_scraper_result(SUCCESS_RESULT):
+            response = self.client.post(reverse('case-search'), self.search_payload(), format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], CaseQuery.STATUS_PENDING)
+
+        detail = self.client.get(reverse('case-detail', args=[response.data['query_id']]))
+        self.assertEqual(detail.data['status'], CaseQuery.STATUS_COMPLETED)
+        self.assertTrue(detail.data['success'])
+        self.assertEqual(detail.data['case_detail']['cnr_number'], 'GJHC240012342023')
+        self.assertEqual(len(detail.data['case_detail']['documents']), 1)
+
+    def test_failed_scrape_marks_query_failed(self):
+        result = {'success': False, 'error': 'Case not found', 'data': None}
+        with mock_scraper_result(result):
+            response = self.client.post(reverse('case-search'), self.search_payload(), format='json')
+
+        query = CaseQuery.objects.get(id=response.data['query_id'])
+        self.assertEqual(query.status, CaseQuery.STATUS_FAILED)
+        self.assertEqual(query.error_message, 'Case not found')
+
+    def test_broker_failure_returns_503(self):
+        with mock.patch('api.views.run_case_search.delay', side_effect=ConnectionError('no broker')):
+            response = self.client.post(reverse('case-search'), self.search_payload(), format='json')
+
+        self.assertEqual(response.status_code, 503)
+        query = CaseQuery.objects.get(id=response.data['query_id'])
+        self.assertEqual(query.status, CaseQuery.STATUS_FAILED)
+
+
+class CaseReadQueryCountTests(CaseDataMixin, TestCase):
+    """History and detail reads cost a fixed number of queries"""
+
+    def make_queries(self, count):
+        queries = []
+        for n in range(count):
+            query = CaseQuery.objects.create(
+                court=self.court, case_type=self.case_type, case_number=str(n),
+                filing_year='2023', user_ip='127.0.0.1', raw_response={'big': 'x' * 1000},
+            )
+            result = json.loads(json.dumps(SUCCESS_RESULT))
+            result['data']['documents'] *= 2
+            store_search_result(query, result)
+            queries.append(query)
+        return queries
+
+    def test_history_page_query_count_is_constant(self):
+        self.make_queries(3)
+        # page + documents prefetch; cursor pagination runs no COUNT
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('case-history'))
+        self.assertEqual(len(response.data['results']), 3)
+
+        self.make_queries(17)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('case-history'))
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(len(response.data['results'][0]['case_detail']['documents']), 2)
+        self.assertEqual(response.data['results'][0]['court_name'], 'Gujarat High Court')
+
+    def test_case_detail_query_count(self):
+        query = self.make_queries(1)[0]
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('case-detail', args=[query.id]))
+        self.assertEqual(response.data['case_detail']['cnr_number'], 'GJHC240012342023')
+
+    @override_settings(HISTORY_HOT_DAYS=0)  # the fixed dates are outside any hot window
+    def test_history_date_range_uses_local_day_bounds(self):
+        first, second, third = self.make_queries(3)
+        ist = timezone.get_current_timezone()
+        for query, stamp in (
+            (first, datetime(2024, 3, 9, 23, 59, tzinfo=ist)),
+            (second, datetime(2024, 3, 10, 0, 0, tzinfo=ist)),
+            (third, datetime(2024, 3, 10, 23, 59, 59, tzinfo=ist)),
+        ):
+            CaseQuery.objects.filter(id=query.id).update(queried_at=stamp)
+
+        response = self.client.get(reverse('case-history'), {'date_from': '2024-03-10', 'date_to': '2024-03-10'})
+        self.assertEqual({row['id'] for row in response.data['results']}, {str(second.id), str(third.id)})
+
+        response = self.client.get(reverse('case-history'), {'date_from': '10/03/2024'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_cursor_pages_are_stable_across_timestamp_ties(self):
+        queries = self.make_queries(25)
+        # Several rows share a timestamp; the id tiebreak keeps pages disjoint
+        CaseQuery.objects.filter(id__in=[q.id for q in queries[5:15]]).update(queried_at=timezone.now())
+
+        seen, url, params = [], reverse('case-history'), {'page_size': 10, 'success': 'true'}
+        while url:
+            response = self.client.get(url, params)
+            self.assertNotIn('count', response.data)
+            seen += [row['id'] for row in response.data['results']]
+            url, params = response.data['next'], None
+            # A search arriving mid-browse must not shift later pages
+            self.make_queries(1)
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(set(seen), {str(q.id) for q in queries})
+
+    def test_history_cursor_is_a_keyset_through_equal_timestamps(self):
+        queries = self.make_queries(25)
+        CaseQuery.objects.update(queried_at=timezone.now())
+        expected = [str(q.id) for q in sorted(queries, key=lambda q: q.id, reverse=True)]
+
+        pages, url, params = [], reverse('case-history'), {'page_size': 10}
+        while url:
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url, params)
+            self.assertNotIn('OFFSET', captured[0]['sql'])
+            pages.append([row['id'] for row in response.data['results']])
+            last, url, params = response, response.data['next'], None
+        self.assertEqual(sum(pages, []), expected)
+
+        # And back again from the last page
+        previous = self.client.get(last.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['results']], pages[-2])
+
+        self.assertEqual(self.client.get(reverse('case-history'), {'cursor': 'cD1ub3QtYS1wb3NpdGlvbg=='}).status_code, 404)
+
+    def test_history_approximate_total_and_page_mode(self):
+        self.make_queries(3)
+
+        response = self.client.get(reverse('case-history'), {'total': 'approximate'})
+        self.assertEqual(response.data['approximate_count'], 3)
+
+        response = self.client.get(reverse('case-history'), {'page': 1})
+        self.assertEqual(response.data['count'], 3)
+
+    def test_latest_for_case_returns_newest_success(self):
+        older, newer = self.make_queries(1) + self.make_queries(1)
+        CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='0',
+            filing_year='2023', user_ip='127.0.0.1', success=False,
+        )
+        latest = CaseQuery.objects.latest_for_case(self.court.id, self.case_type.id, '0', '2023')
+        self.assertEqual(latest.id, newer.id)
+
+    def test_explain_hot_paths_runs(self):
+        self.make_queries(1)
+        out = StringIO()
+        call_command('explain_hot_paths', stdout=out)
+        self.assertIn('admin CNR search', out.getvalue())
+
+    def test_storing_a_result_costs_the_same_for_any_number_of_documents(self):
+        def store(documents):
+            query = CaseQuery.objects.create(
+                court=self.court, case_type=self.case_type, case_number=str(documents),
+                filing_year='2023', user_ip='127.0.0.1',
+            )
+            result = json.loads(json.dumps(SUCCESS_RESULT))
+            result['data']['documents'] = [
+                dict(result['data']['documents'][0], pdf_url=f'https://example.com/{i}.pdf')
+                for i in range(documents)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                store_search_result(query, result)
+            self.assertEqual(query.case_detail.documents.count(), documents)
+            return [q['sql'] for q in queries.captured_queries]
+
+        few, many = store(1), store(40)
+        self.assertEqual(len(few), len(many))
+        updates = [sql for sql in many if sql.startswith('UPDATE "api_casequery"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('user_ip', updates[0])
+
+    def test_raw_response_is_not_loaded(self):
+        self.make_queries(1)
+        query = CaseQuery.objects.with_details().get()
+        self.assertIn('raw_response', query.get_deferred_fields())
+
+
+class HistoryArchiveTests(CaseDataMixin, TestCase):
+
+    def search(self, case_number, days_ago, result=SUCCESS_RESULT):
+        query = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number=case_number,
+            filing_year='2023', user_ip='127.0.0.1',
+        )
+        store_search_result(query, result)
+        CaseQuery.objects.filter(id=query.id).update(queried_at=timezone.now() - timedelta(days=days_ago))
+        return query
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_case_history', '--batch-size', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_old_history_moves_to_the_archive(self):
+        failure = {'success': False, 'error': 'Case not found', 'data': None}
+        old_failure = self.search('1', days_ago=400, result=failure)
+        superseded = self.search('2', days_ago=300)
+        latest_old = self.search('2', days_ago=250)
+        latest_other = self.search('3', days_ago=300)
+        recent = self.search('4', days_ago=1)
+        expected = {old_failure.id}
+        # superseded is the owner of the detail latest_old shows, so it stays too
+        kept = {superseded.id, latest_old.id, latest_other.id, recent.id}
+
+        self.assertIn('1 queries', self.archive('--dry-run'))
+        self.assertIn('Archived 1 queries', self.archive())
+
+        self.assertEqual(set(ArchivedCaseQuery.objects.values_list('id', flat=True)), expected)
+        self.assertEqual(set(CaseQuery.objects.values_list('id', flat=True)), kept)
+
+        # The old queries kept hot are still listed; only the moved one is in the archive
+        history = self.client.get(reverse('case-history'))
+        self.assertEqual(history.data['results'][0]['id'], str(recent.id))
+        self.assertEqual({row['id'] for row in history.data['results']}, {str(query_id) for query_id in kept})
+        archived = self.client.get(reverse('case-history'), {'archived': 'true'})
+        self.assertEqual([row['id'] for row in archived.data['results']], [str(old_failure.id)])
+        self.assertEqual(archived.data['results'][0]['error_message'], 'Case not found')
+        detail = self.client.get(reverse('case-detail', args=[old_failure.id]))
+        self.assertEqual(detail.data['id'], str(old_failure.id))
+
+    def test_history_lists_old_queries_until_they_are_archived_or_kept(self):
+        failure = {'success': False, 'error': 'Case not found', 'data': None}
+        old_failure = self.search('1', days_ago=400, result=failure)
+        latest_old = self.search('2', days_ago=250)
+        recent = self.search('3', days_ago=1)
+
+        history = self.client.get(reverse('case-history'))
+        self.assertEqual([row['id'] for row in history.data['results']], [str(recent.id), str(latest_old.id)])
+        self.assertNotIn(str(old_failure.id), [row['id'] for row in history.data['results']])
+
+    @override_settings(HISTORY_HOT_DAYS=0)
+    def test_no_hot_window_needs_an_explicit_age(self):
+        old = self.search('1', days_ago=400, result={'success': False, 'error': 'Case not found', 'data': None})
+
+        with self.assertRaisesMessage(CommandError, 'HISTORY_HOT_DAYS is 0'):
+            self.archive()
+        self.assertTrue(CaseQuery.objects.filter(id=old.id).exists())
+
+        self.assertIn('Archived 1 queries', self.archive('--older-than-days', '365'))
+
+    @override_settings(CASE_INCREMENTAL_REFRESH=False, RAW_RESPONSE_RETENTION='full')
+    def test_archived_rows_drop_their_details_and_can_be_exported(self):
+        old = self.search('1', days_ago=300)
+        self.search('1', days_ago=200)
+        export = tempfile.TemporaryDirectory()
+        self.addCleanup(export.cleanup)
+
+        self.archive('--export-dir', export.name)
+
+        self.assertEqual(CaseDetail.objects.count(), 1)
+        self.assertFalse(CaseQueryPayload.objects.filter(query_id=old.id).exists())
+        archived = ArchivedCaseQuery.objects.get()
+        self.assertEqual(archived.data['case_detail']['cnr_number'], 'GJHC240012342023')
+        self.assertNotIn('user_ip', archived.data)
+
+        [name] = os.listdir(export.name)
+        self.assertEqual(name, f'case-history-{archived.month:%Y-%m}.jsonl.gz')
+        with gzip.open(os.path.join(export.name, name), 'rt') as f:
+            [line] = f.read().splitlines()
+        self.assertEqual(json.loads(line)['raw_response'], SUCCESS_RESULT)
+
+
+class RawResponseRetentionTests(CaseDataMixin, TestCase):
+    FAILURE = {'success': False, 'error': 'Could not parse results', 'data': None}
+
+    def store(self, result, **fields):
+        query = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='1',
+            filing_year='2023', user_ip='127.0.0.1', **fields,
+        )
+        return store_search_result(query, result)
+
+    def test_errors_only_by_default(self):
+        succeeded = self.store(SUCCESS_RESULT)
+        failed = self.store(self.FAILURE)
+
+        self.assertFalse(CaseQueryPayload.objects.filter(query=succeeded).exists())
+        self.assertEqual(CaseQueryPayload.objects.get(query=failed).result, self.FAILURE)
+        self.assertEqual(
+            CaseQuery.objects.filter(raw_response__isnull=False).count(), 0
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('case-history'))
+        self.assertFalse([q for q in queries if 'api_casequerypayload' in q['sql']])
+
+    @override_settings(RAW_RESPONSE_RETENTION='full')
+    def test_full_retention_compresses_into_the_side_table(self):
+        result = json.loads(json.dumps(SUCCESS_RESULT))
+        result['data']['documents'] *= 50
+
+        with CaptureQueriesContext(connection) as queries:
+            query = self.store(result)
+
+        payload = CaseQueryPayload.objects.get(query=query)
+        self.assertEqual(payload.result, result)
+        self.assertLess(len(payload.data), payload.size / 5)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "api_casequery"')]
+        self.assertNotIn('raw_response', updates[0])
+
+    @override_settings(RAW_RESPONSE_RETENTION='none')
+    def test_no_retention(self):
+        self.store(self.FAILURE)
+        self.assertFalse(CaseQueryPayload.objects.exists())
+
+    def test_compact_command_moves_legacy_rows(self):
+        succeeded = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='1', filing_year='2023',
+            user_ip='127.0.0.1', success=True, raw_response=SUCCESS_RESULT,
+        )
+        failed = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='2', filing_year='2023',
+            user_ip='127.0.0.1', raw_response=self.FAILURE,
+        )
+
+        out = StringIO()
+        call_command('compact_raw_responses', '--dry-run', stdout=out)
+        self.assertIn('Would keep 1 and drop 1', out.getvalue())
+        self.assertEqual(CaseQuery.objects.filter(raw_response__isnull=False).count(), 2)
+
+        call_command('compact_raw_responses', '--batch-size', '1', stdout=StringIO())
+
+        self.assertEqual(CaseQuery.objects.filter(raw_response__isnull=False).count(), 0)
+        self.assertFalse(CaseQueryPayload.objects.filter(query=succeeded).exists())
+        self.assertEqual(CaseQueryPayload.objects.get(query=failed).result, self.FAILURE)
+
+
+class CaseResultCacheTests(EagerCeleryMixin, CaseDataMixin, TestCase):
+
+    def test_repeat_search_is_served_from_cache(self):
+        with mock_scraper_result(SUCCESS_RESULT) as scrape:
+            self.client.post(reverse('case-search'), self.search_payload(), format='json')
+            response = self.client.post(reverse('case-search'), self.search_payload(), format='json')
+
+        self.assertEqual(scrape.await_count, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], CaseQuery.STATUS_COMPLETED)
+        self.assertEqual(response.data['data']['case_detail']['cnr_number'], 'GJHC240012342023')
+
+    def test_force_refresh_bypasses_cache(self):
+        with mock_scraper_result(SUCCESS_RESULT) as scrape:
+            self.client.post(reverse('case-search'), self.search_payload(), format='json')
+            response = self.client.post(
+                reverse('case-search'), self.search_payload(force_refresh=True), format='json'
+            )
+
+        self.assertEqual(scrape.await_count, 2)
+        self.assertEqual(response.status_code, 202)
+
+    def test_cached_failure_says_why(self):
+        result = {'success': False, 'error': 'Case not found', 'data': None}
+        with mock_scraper_result(result) as scrape:
+            self.client.post(reverse('case-search'), self.search_payload(), format='json')
+            response = self.client.post(reverse('case-search'), self.search_payload(), format='json')
+
+        self.assertEqual(scrape.await_count, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['success'])
+        self.assertEqual(response.data['error'], 'Case not found')
+
+    def test_transient_failures_are_not_cached(self):
+        result = {'success': False, 'error': 'HTTP 503'}
+        with mock_scraper_result(result) as scrape:
+            self.client.post(reverse('case-search'), self.search_payload(), format='json')
+            self.client.post(reverse('case-search'), self.search_payload(), format='json')
+
+        self.assertEqual(scrape.await_count, 2)
+
+
+class AsyncCaseSearchTests(CaseDataMixin, TestCase):
+
+    async def test_async_search_returns_result_inline(self):
+        with mock_scraper_result(SUCCESS_RESULT):
+            response = await self.async_client.post(
+                reverse('case-search-async'), self.search_payload(), content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['data']['status'], CaseQuery.STATUS_COMPLETED)
+        self.assertEqual(body['data']['case_detail']['cnr_number'], 'GJHC240012342023')
+
+    async def test_async_search_reports_scraper_failure(self):
+        result = {'success': False, 'error': 'Case not found', 'data': None}
+        with mock_scraper_result(result):
+            response = await self.async_client.post(
+                reverse('case-search-async'), self.search_payload(), content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        query = await CaseQuery.objects.aget(id=response.json()['query_id'])
+        self.assertEqual(query.status, CaseQuery.STATUS_FAILED)
+
+    async def test_async_search_hides_internal_errors(self):
+        with mock.patch('api.services.asearch_case', side_effect=RuntimeError('connection string leaked')):
+            response = await self.async_client.post(
+                reverse('case-search-async'), self.search_payload(), content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['error'], 'Internal server error')
+        query = await CaseQuery.objects.aget(id=response.json()['query_id'])
+        self.assertEqual(query.status, CaseQuery.STATUS_FAILED)
+
+    async def test_async_search_is_throttled(self):
+        with mock_scraper_result(SUCCESS_RESULT), mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, {'anon': '1/hour'}):
+            first = await self.async_client.post(
+                reverse('case-search-async'), self.search_payload(), content_type='application/json'
+            )
+            second = await self.async_client.post(
+                reverse('case-search-async'), self.search_payload(), content_type='application/json'
+            )
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn('Retry-After', second)
+        self.assertEqual(await CaseQuery.objects.acount(), 1)
+
+
+class BulkCaseSearchTests(CaseDataMixin, TestCase):
+
+    async def read_lines(self, response):
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        return [json.loads(line) for line in body.decode().splitlines()]
+
+    async def test_bulk_search_streams_one_line_per_item(self):
+        items = [self.search_payload(case_number=str(n)) for n in range(3)]
+        items.append(self.search_payload(court_id=999))
+
+        with mock_scraper_result(SUCCESS_RESULT):
+            response = await self.async_client.post(
+                reverse('case-search-bulk'), {'items': items}, content_type='application/json'
+            )
+            lines = await self.read_lines(response)
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        results = sorted(lines[:-1], key=lambda line: line['index'])
+        self.assertEqual([line['success'] for line in results], [True, True, True, False])
+        self.assertIsNone(results[3]['query_id'])
+        self.assertEqual(lines[-1], {'done': True, 'total': 4, 'succeeded': 3})
+        self.assertEqual(await CaseQuery.objects.filter(status=CaseQuery.STATUS_COMPLETED).acount(), 3)
+
+    async def test_bulk_search_counts_each_item_against_throttle(self):
+        items = [self.search_payload(case_number=str(n)) for n in range(3)]
+
+        with mock_scraper_result(SUCCESS_RESULT), mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, {'anon': '4/hour'}):
+            first = await self.async_client.post(
+                reverse('case-search-bulk'), {'items': items}, content_type='application/json'
+            )
+            await self.read_lines(first)
+            second = await self.async_client.post(
+                reverse('case-search-bulk'), {'items': items[:2]}, content_type='application/json'
+            )
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(await CaseQuery.objects.acount(), 3)
+
+    async def test_bulk_search_rejects_empty_list(self):
+        response = await self.async_client.post(
+            reverse('case-search-bulk'), {'items': []}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchProgressTests(EagerCeleryMixin, CaseDataMixin, TestCase):
+
+    async def read_events(self, response):
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        events = []
+        for message in body.split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in message.splitlines() if not line.startswith(':'))
+            if 'data' in fields:
+                events.append((fields['event'], json.loads(fields['data'])))
+        return events
+
+    async def finished_query(self, result=SUCCESS_RESULT):
+        query = await CaseQuery.objects.acreate(
+            court=self.court, case_type=self.case_type, case_number='1234', filing_year='2023',
+            user_ip='127.0.0.1', status=CaseQuery.STATUS_RUNNING,
+        )
+        with mock_scraper_result(result):
+            await aexecute_case_search(query)
+        return query
+
+    def test_queued_search_records_each_stage(self):
+        with mock_scraper_result(SUCCESS_RESULT):
+            response = self.client.post(reverse('case-search'), self.search_payload(), format='json')
+
+        events = progress.events_since(response.data['query_id'])
+        self.assertEqual([event['stage'] for event in events], ['queued', 'started', 'persisted', 'completed'])
+        self.assertEqual([event['id'] for event in events], [1, 2, 3, 4])
+        self.assertEqual(events[-1]['result']['case_detail']['cnr_number'], 'GJHC240012342023')
+
+    async def test_stream_ends_with_result(self):
+        query = await self.finished_query()
+
+        response = await self.async_client.get(reverse('case-search-events', args=[query.id]))
+        events = await self.read_events(response)
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual([name for name, _ in events], ['progress', 'progress', 'result'])
+        self.assertEqual([data['stage'] for _, data in events], ['started', 'persisted', 'completed'])
+        self.assertEqual(events[-1][1]['result']['status'], CaseQuery.STATUS_COMPLETED)
+
+    async def test_reconnect_resumes_after_last_event_id(self):
+        query = await self.finished_query({'success': False, 'error': 'Case not found', 'data': None})
+
+        response = await self.async_client.get(
+            reverse('case-search-events', args=[query.id]), headers={'Last-Event-ID': '2'}
+        )
+        events = await self.read_events(response)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][1]['id'], 3)
+        self.assertEqual(events[0][1]['stage'], 'failed')
+        self.assertEqual(events[0][1]['result']['error_message'], 'Case not found')
+
+    async def test_finished_search_without_events_is_read_from_database(self):
+        query = await self.finished_query()
+        await sync_to_async(cache.clear)()
+
+        response = await self.async_client.get(reverse('case-search-events', args=[query.id]))
+        events = await self.read_events(response)
+
+        self.assertEqual([data['stage'] for _, data in events], ['completed'])
+        self.assertEqual(events[0][1]['result']['case_detail']['cnr_number'], 'GJHC240012342023')
+
+    @override_settings(SEARCH_EVENTS_POLL_INTERVAL=0.01, SEARCH_EVENTS_MAX_DURATION=5)
+    async def test_result_arrives_when_the_worker_cache_is_not_shared(self):
+        # A worker in another process records progress in its own cache, so this
+        # stream never sees an event; only the database shows the search finishing
+        query = await CaseQuery.objects.acreate(
+            court=self.court, case_type=self.case_type, case_number='1234', filing_year='2023',
+            user_ip='127.0.0.1', status=CaseQuery.STATUS_RUNNING,
+        )
+
+        async def finish_in_worker():
+            await asyncio.sleep(0.1)
+            await CaseQuery.objects.filter(id=query.id).aupdate(
+                status=CaseQuery.STATUS_FAILED, error_message='Case not found',
+            )
+
+        started = time.monotonic()
+        response = await self.async_client.get(reverse('case-search-events', args=[query.id]))
+        events, _ = await asyncio.gather(self.read_events(response), finish_in_worker())
+
+        self.assertEqual([data['stage'] for _, data in events], ['failed'])
+        self.assertEqual(events[0][1]['result']['error_message'], 'Case not found')
+        self.assertLess(time.monotonic() - started, settings.SEARCH_EVENTS_HEARTBEAT)
+        warnings = await sync_to_async(check_shared_caches)(None)
+        self.assertIn('SEARCH_PROGRESS_CACHE_ALIAS', ' '.join(warning.msg for warning in warnings))
+
+    async def test_unknown_query_is_404(self):
+        response = await self.async_client.get(
+            reverse('case-search-events', args=['00000000-0000-0000-0000-000000000000'])
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+class FakeBrowserContext:
+
+    def __init__(self):
+        self.crashed = False
+        self.closed = False
+        self.pages = 0
+
+    async def new_page(self):
+        if self.crashed:
+            raise RuntimeError('Target page, context or browser has been closed')
+        self.pages += 1
+        return mock.AsyncMock()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, user_agent):
+        self.contexts.append(FakeBrowserContext())
+        return self.contexts[-1]
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    """Stands in for async_playwright(); every launch gives a new FakeBrowser"""
+
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+    async def launch(self, headless):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+
+class BrowserPoolTests(TestCase):
+
+    def setUp(self):
+        self.playwright = FakePlaywright()
+        patcher = mock.patch('court_room_backend.scrapers.browser_pool.async_playwright', return_value=self.playwright)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_pool(self, **overrides):
+        options = {'size': 1, 'max_pages': 100, 'max_age': 3600, 'acquire_timeout': 5, 'max_waiters': 1}
+        options.update(overrides)
+        return BrowserPool(**options)
+
+    async def test_contexts_are_reused(self):
+        pool = self.make_pool()
+        for _ in range(3):
+            async with pool.page():
+                pass
+
+        self.assertEqual(len(self.playwright.browsers), 1)
+        self.assertEqual(len(self.playwright.browsers[0].contexts), 1)
+        self.assertEqual(self.playwright.browsers[0].contexts[0].pages, 3)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    async def test_context_is_recycled_after_max_pages(self):
+        pool = self.make_pool(max_pages=2)
+        for _ in range(3):
+            async with pool.page():
+                pass
+
+        first, second = self.playwright.browsers[0].contexts
+        self.assertTrue(first.closed)
+        self.assertEqual((first.pages, second.pages), (2, 1))
+        self.assertEqual(pool.stats()['recycled'], 1)
+
+    async def test_waiters_beyond_bound_are_refused(self):
+        pool = self.make_pool(max_waiters=1)
+        waiter_got_page = asyncio.Event()
+
+        async def wait_for_page():
+            async with pool.page():
+                waiter_got_page.set()
+
+        async with pool.page():
+            waiter = asyncio.create_task(wait_for_page())
+            await asyncio.sleep(0)
+            self.assertEqual(pool.stats()['waiting'], 1)
+            with self.assertRaises(BrowserPoolBusy):
+                async with pool.page():
+                    pass
+
+        await waiter
+        self.assertTrue(waiter_got_page.is_set())
+
+    async def test_acquire_times_out_when_pool_stays_busy(self):
+        pool = self.make_pool(acquire_timeout=0.01, max_waiters=5)
+
+        async with pool.page():
+            with self.assertRaises(BrowserPoolBusy):
+                async with pool.page():
+                    pass
+
+    async def test_crashed_context_is_replaced(self):
+        pool = self.make_pool()
+        async with pool.page():
+            pass
+        self.playwright.browsers[0].contexts[0].crashed = True
+
+        with self.assertRaises(RuntimeError):
+            async with pool.page():
+                pass
+        async with pool.page():
+            pass
+
+        crashed, replacement = self.playwright.browsers[0].contexts
+        self.assertTrue(crashed.closed)
+        self.assertEqual(replacement.pages, 1)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    async def test_browser_is_relaunched_after_disconnect(self):
+        pool = self.make_pool()
+        async with pool.page():
+            pass
+        self.playwright.browsers[0].connected = False
+
+        async with pool.page():
+            pass
+
+        self.assertEqual(len(self.playwright.browsers), 2)
+        self.assertEqual(self.playwright.browsers[1].contexts[0].pages, 1)
+        self.assertTrue(pool.stats()['browser_connected'])
+
+
+class PooledHTTPClientTests(TestCase):
+
+    def make_client(self, handler, per_host_limit=10):
+        return PooledHTTPClient(10, 10, 5, per_host_limit, 1.5, 7, http2=False,
+                                transport=httpx.MockTransport(handler))
+
+    async def test_requests_are_capped_per_host(self):
+        in_flight = {}
+        peak = {}
+
+        async def handler(request):
+            host = request.url.host
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), in_flight[host])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+            return httpx.Response(200)
+
+        client = self.make_client(handler, per_host_limit=2)
+        try:
+            await asyncio.gather(*(
+                client.get(f'https://{host}/{n}') for host in ('a.example', 'b.example') for n in range(6)
+            ))
+        finally:
+            await client.aclose()
+
+        self.assertEqual(peak, {'a.example': 2, 'b.example': 2})
+
+    async def test_calls_share_connection_state(self):
+        seen_cookies = []
+
+        def handler(request):
+            seen_cookies.append(request.headers.get('Cookie'))
+            return httpx.Response(200, headers={'Set-Cookie': 'ASP.NET_SessionId=abc; path=/'})
+
+        client = self.make_client(handler)
+        try:
+            await client.get('https://portal.example/form')
+            await client.post('https://portal.example/form', data={'q': '1'})
+        finally:
+            await client.aclose()
+
+        self.assertEqual(seen_cookies, [None, 'ASP.NET_SessionId=abc'])
+        self.assertEqual(client.get_cookies('portal.example'), {'ASP.NET_SessionId': 'abc'})
+
+    async def test_timeouts_reach_requests(self):
+        timeouts = []
+
+        def handler(request):
+            timeouts.append(request.extensions['timeout'])
+            return httpx.Response(200)
+
+        client = self.make_client(handler)
+        try:
+            await client.get('https://portal.example/')
+        finally:
+            await client.aclose()
+
+        self.assertEqual(timeouts[0]['connect'], 1.5)
+        self.assertEqual(timeouts[0]['read'], 7)
+
+    @override_settings(HTTP_MAX_CONNECTIONS=7, HTTP_MAX_KEEPALIVE_CONNECTIONS=3, HTTP_KEEPALIVE_EXPIRY=11,
+                       HTTP_CONNECT_TIMEOUT=2, HTTP_READ_TIMEOUT=9, HTTP2_ENABLED=False)
+    async def test_one_client_per_loop_built_from_settings(self):
+        with mock.patch('court_room_backend.scrapers.http_client.httpx.AsyncClient', wraps=httpx.AsyncClient) as factory:
+            client = get_http_client()
+        try:
+            self.assertIs(get_http_client(), client)
+        finally:
+            await client.aclose()
+
+        factory.assert_called_once()
+        options = factory.call_args.kwargs
+        self.assertEqual(options['limits'], httpx.Limits(max_connections=7, max_keepalive_connections=3, keepalive_expiry=11))
+        self.assertEqual(options['timeout'], httpx.Timeout(9, connect=2))
+        self.assertFalse(options['http2'])
+
+
+class SingleFlightTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def make_single_flight(self):
+        # Separate instances stand in for separate worker processes
+        return SingleFlight(alias='default', lock_timeout=10, wait_timeout=5, poll_interval=0.01)
+
+    def test_concurrent_callers_share_one_fetch(self):
+        calls = []
+        started = threading.Event()
+
+        def slow_fetch():
+            calls.append('leader')
+            started.set()
+            time.sleep(0.2)
+            return SUCCESS_RESULT
+
+        def follower_fetch():
+            calls.append('follower')
+            return {'success': False}
+
+        results = {}
+        leader = threading.Thread(
+            target=lambda: results.setdefault('leader', self.make_single_flight().run('case', slow_fetch))
+        )
+        leader.start()
+        started.wait()
+        results['follower'] = self.make_single_flight().run('case', follower_fetch)
+        leader.join()
+
+        self.assertEqual(calls, ['leader'])
+        self.assertEqual(results['follower'], SUCCESS_RESULT)
+        self.assertEqual(results['leader'], SUCCESS_RESULT)
+
+    def test_follower_fetches_itself_after_leader_failure(self):
+        single_flight = self.make_single_flight()
+
+        with self.assertRaises(RuntimeError):
+            single_flight.run('case', mock.Mock(side_effect=RuntimeError('boom')))
+
+        self.assertEqual(single_flight.run('case', lambda: SUCCESS_RESULT), SUCCESS_RESULT)
+
+    async def test_async_callers_share_one_fetch(self):
+        fetch = mock.AsyncMock(return_value=SUCCESS_RESULT)
+        single_flight = self.make_single_flight()
+
+        results = await asyncio.gather(*(single_flight.arun('case', fetch) for _ in range(5)))
+
+        self.assertEqual(fetch.await_count, 1)
+        self.assertEqual(results, [SUCCESS_RESULT] * 5)
+
+    def test_process_local_coordination_cache_is_reported(self):
+        caches_setting = {
+            'default': settings.CACHES['default'],
+            'per-worker': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'per-worker'},
+        }
+        with override_settings(CACHES=caches_setting, CASE_CACHE_SHARED_ALIAS='per-worker'):
+            warnings = [warning.msg for warning in check_shared_caches(None)]
+        self.assertTrue(any(message.startswith("CASE_CACHE_SHARED_ALIAS ('per-worker')") for message in warnings))
+
+        with override_settings(CASE_CACHE_SHARED_ALIAS=''):  # explicitly not shared
+            warnings = [warning.msg for warning in check_shared_caches(None)]
+        self.assertFalse(any(message.startswith('CASE_CACHE_SHARED_ALIAS') for message in warnings))
+
+    def test_async_callers_on_different_loops(self):
+        # Under WSGI each async view runs on an event loop of its own
+        single_flight = self.make_single_flight()
+        started = threading.Event()
+        calls = []
+
+        async def slow_fetch():
+            calls.append('fetch')
+            started.set()
+            await asyncio.sleep(0.2)
+            return SUCCESS_RESULT
+
+        results, errors = [], []
+
+        def call():
+            try:
+                results.append(asyncio.run(single_flight.arun('case', slow_fetch)))
+            except Exception as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [SUCCESS_RESULT] * 2)
+        self.assertEqual(calls, ['fetch'])
+
+
+class RateLimiterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = RateLimiter(rate=20, burst=2, alias='default', backoff_base=0.2)
+
+    async def test_burst_is_free_then_requests_are_spaced(self):
+        waits = [await self.limiter.acquire('portal') for _ in range(3)]
+
+        self.assertLess(waits[0] + waits[1], 0.02)
+        self.assertGreaterEqual(waits[2], 0.04)
+
+    async def test_throttling_blocks_and_slows_the_bucket(self):
+        await self.limiter.penalize('portal')
+
+        waited = await self.limiter.acquire('portal')
+        snapshot = self.limiter.snapshot()['portal']
+
+        self.assertGreaterEqual(waited, 0.19)
+        self.assertEqual(snapshot['rate'], 10)
+
+        await self.limiter.reward('portal')
+        self.assertAlmostEqual(self.limiter.snapshot()['portal']['rate'], 11)
+
+    async def test_status_shows_buckets_only_workers_have_used(self):
+        await Court.objects.acreate(name='Gujarat High Court', location='Ahmedabad', base_url='https://example.com/')
+        host = urlsplit(settings.ECOURTS_BASE_URL).netloc
+        # A Celery worker's limiter; this process never touches the bucket
+        worker = RateLimiter(rate=20, burst=2, alias='default', backoff_base=30)
+        await worker.penalize(host)
+
+        with mock.patch('api.views.get_rate_limiter', return_value=self.limiter):
+            response = await self.async_client.get(reverse('scraper-status'))
+
+        bucket = response.json()['rate_limits'][host]
+        self.assertEqual(bucket['rate'], 10)
+        self.assertGreater(bucket['expected_wait'], 20)
+        self.assertTrue(bucket['shared'])
+        self.assertEqual(bucket['this_process'], {'waiting': 0, 'last_wait': 0.0})
+
+
+class FormTokenReuseTests(TestCase):
+    """Scraper HTTP path against a mocked portal"""
+
+    def setUp(self):
+        cache.clear()
+        self.requests = []
+        self.reject_viewstates = set()
+        self.token_cache = FormTokenCache(ttl=60, alias='default')
+        self.limiter = RateLimiter(rate=1000, burst=1000)
+        patches = [
+            mock.patch('court_room_backend.scrapers.ecourts_scraper.get_form_token_cache', return_value=self.token_cache),
+            mock.patch('court_room_backend.scrapers.ecourts_scraper.get_rate_limiter', return_value=self.limiter),
+            mock.patch('court_room_backend.scrapers.ecourts_scraper.get_http_client', side_effect=self.http_client),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def http_client(self):
+        if not hasattr(self, '_http'):
+            self._http = PooledHTTPClient(10, 10, 5, 10, 1, 1, http2=False)
+            self._http._client = httpx.AsyncClient(transport=httpx.MockTransport(self.portal))
+        return self._http
+
+    def portal(self, request):
+        self.requests.append(request.method)
+        if request.method == 'GET':
+            n = self.requests.count('GET')
+            return httpx.Response(200, text=SEARCH_FORM_PAGE.format(n=n), headers={'Set-Cookie': f'ASP.NET_SessionId=s{n}'})
+        form = dict(httpx.QueryParams(request.content.decode()))
+        if form['__VIEWSTATE'] in self.reject_viewstates:
+            return httpx.Response(500, text='Validation of viewstate MAC failed.')
+        return httpx.Response(200, text=RESULTS_PAGE)
+
+    async def search(self):
+        return await ECourtsScraper()._search_with_requests(6, 'WP', '1234', '2023')
+
+    async def test_second_search_reuses_cached_tokens(self):
+        first = await self.search()
+        second = await self.search()
+
+        self.assertTrue(first['success'])
+        self.assertTrue(second['success'])
+        self.assertEqual(self.requests, ['GET', 'POST', 'POST'])
+
+    async def test_rejected_tokens_are_refreshed_once(self):
+        await self.search()
+        self.reject_viewstates.add('vs-1')
+
+        result = await self.search()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.requests, ['GET', 'POST', 'POST', 'GET', 'POST'])
+        key = self.token_cache.make_key(ECourtsScraper().base_url, 'casestatus/caseno')
+        self.assertEqual(self.token_cache.get(key)['fields']['__VIEWSTATE'], 'vs-2')
+
+
+class ParserBackendTests(TestCase):
+
+    PAGES = [
+        RESULTS_PAGE,
+        '<div class="box error">Case <b>not found</b></div>' + RESULTS_PAGE,
+        '<ul><li><a href="/help.html">Help</a></li></ul><span color="red">Invalid captcha</span>',
+        '<table id="ctl00_ContentPlaceHolder1_GridView1"><tr><td>CNR<td>X1<tr><td>Status<td>Disposed',
+    ]
+
+    def full_parse(self, html):
+        """Reference output: whole-document html.parser tree, as before filtering"""
+        scraper = ECourtsScraper()
+        with mock.patch.object(scraper, '_make_soup', lambda markup, element_filter=None: BeautifulSoup(markup, 'html.parser')):
+            return scraper._parse_case_details(html)
+
+    def test_filtered_parsing_matches_full_parse(self):
+        for parser in ('html.parser', 'lxml'):
+            for html in self.PAGES:
+                with self.subTest(parser=parser, html=html[:40]), override_settings(HTML_PARSER=parser):
+                    self.assertEqual(ECourtsScraper()._parse_case_details(html), self.full_parse(html))
+
+
+class BenchmarkParserTests(TestCase):
+
+    def run_benchmark(self, baseline, **options):
+        call_command(
+            'benchmark_parser', iterations=4, warmup=0, rounds=2,
+            baseline=str(baseline), stdout=StringIO(), **options,
+        )
+
+    def test_runs_offline_over_the_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            self.run_benchmark(baseline, update_baseline=True)
+            cases = json.loads(baseline.read_text())['cases']
+
+        self.assertIn('parse_case_details:results_many_pdfs', cases)
+        self.assertIn('extract_documents:results_many_pdfs', cases)
+        self.assertIn('parse_date:samples', cases)
+        for result in cases.values():
+            self.assertGreater(result['peak_alloc_bytes'], 0)
+
+    def test_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            self.run_benchmark(baseline, update_baseline=True, filter='extract_documents:results_basic')
+            recorded = json.loads(baseline.read_text())
+            for result in recorded['cases'].values():
+                result['peak_alloc_bytes'] //= 2
+            baseline.write_text(json.dumps(recorded))
+
+            with self.assertRaisesMessage(CommandError, 'peak allocations'):
+                self.run_benchmark(baseline, filter='extract_documents:results_basic')
+
+    def test_fails_on_repeated_slowdown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            self.run_benchmark(baseline, update_baseline=True, filter='parse_date')
+            recorded = json.loads(baseline.read_text())
+            for result in recorded['cases'].values():
+                result['p50_normalized'] /= 10
+            baseline.write_text(json.dumps(recorded))
+
+            with self.assertRaisesMessage(CommandError, 'p50'):
+                self.run_benchmark(baseline, filter='parse_date')
+
+    def test_timings_from_another_environment_are_not_compared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            self.run_benchmark(baseline, update_baseline=True, filter='parse_date')
+            recorded = json.loads(baseline.read_text())
+            recorded['environment'] = 'another-host'
+            for result in recorded['cases'].values():
+                result['p50_normalized'] /= 10
+            baseline.write_text(json.dumps(recorded))
+
+            output = StringIO()
+            call_command('benchmark_parser', iterations=4, warmup=0, rounds=2, filter='parse_date',
+                         baseline=str(baseline), stdout=output)
+
+        self.assertIn('comparing allocations only', output.getvalue())
+
+    def test_missing_baseline_fails_unless_allowed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            with self.assertRaisesMessage(CommandError, 'No baseline'):
+                self.run_benchmark(baseline, filter='parse_date')
+            self.run_benchmark(baseline, filter='parse_date', allow_missing_baseline=True)
+
+    def test_committed_baseline_is_used_without_a_local_one(self):
+        fixtures = str(Path(settings.BASE_DIR) / 'benchmarks' / 'fixtures')
+        with tempfile.TemporaryDirectory() as tmp:
+            benchmarks = Path(tmp)
+            with mock.patch('api.management.commands.benchmark_parser.BENCHMARK_DIR', benchmarks):
+                self.run_benchmark(
+                    benchmarks / 'baseline.json', update_baseline=True, filter='parse_date', fixtures=fixtures,
+                )
+                recorded = json.loads((benchmarks / 'baseline.json').read_text())
+                self.assertEqual(recorded['environment'], 'reference')
+
+                output = StringIO()
+                call_command('benchmark_parser', iterations=4, warmup=0, rounds=2, filter='parse_date',
+                             fixtures=fixtures, stdout=output)
+
+        self.assertIn("recorded on 'reference'", output.getvalue())
+        self.assertIn('No regressions', output.getvalue())
+
+
+class FakePortalTests(TestCase):
+    """Scraper HTTP path end to end against the local portal stand-in"""
+
+    def setUp(self):
+        cache.clear()
+        self.portal = FakePortal(latency=0, jitter=0, documents=3, seed=1)
+        self.base_url = self.portal.start()
+        self.addCleanup(self.portal.stop)
+        patches = [
+            mock.patch('court_room_backend.scrapers.ecourts_scraper.get_form_token_cache',
+                       return_value=FormTokenCache(ttl=60, alias='default')),
+            mock.patch('court_room_backend.scrapers.ecourts_scraper.get_rate_limiter',
+                       return_value=RateLimiter(rate=1000, burst=1000)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def search(self, case_number='1234', progress=None):
+        http = PooledHTTPClient(10, 10, 5, 10, 1, 5, http2=False)
+        try:
+            with mock.patch('court_room_backend.scrapers.ecourts_scraper.get_http_client', return_value=http):
+                scraper = ECourtsScraper(self.base_url, progress=progress)
+                return await scraper._search_with_requests(6, 'WP', case_number, '2023')
+        finally:
+            await http.aclose()
+
+    async def test_search_parses_portal_results(self):
+        result = await self.search()
+
+        self.assertTrue(result['success'])
+        self.assertTrue(result['data']['case_details']['cnr_number'].startswith('FAKE'))
+        self.assertEqual(len(result['data']['documents']), 3)
+        self.assertTrue(result['data']['documents'][0]['pdf_url'].startswith(self.base_url.split('/ecourtindia_v6')[0]))
+        self.assertEqual(self.portal.stats['results'], 1)
+
+    async def test_expired_session_is_refreshed(self):
+        await self.search()
+        self.portal._sessions.clear()
+
+        result = await self.search()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.portal.stats['stale'], 1)
+
+    async def test_search_reports_progress(self):
+        stages = []
+        with mock.patch('court_room_backend.scrapers.ecourts_scraper.get_rate_limiter',
+                        return_value=RateLimiter(rate=50, burst=1)):
+            await self.search(progress=lambda stage, **data: stages.append(stage))
+
+        # The form GET takes the only token, so the POST waits for the next
+        self.assertEqual(stages, ['rate_limited', 'fetched', 'parsed'])
+
+    async def test_throttling_is_reported(self):
+        self.portal.throttle_rate = 1.0
+
+        result = await self.search()
+
+        self.assertTrue(result['throttled'])
+        self.assertEqual(result['error'], 'HTTP 429')
+
+    @override_settings(ECOURTS_BASE_URL='http://127.0.0.1:1/ecourtindia_v6/')
+    def test_base_url_is_configurable(self):
+        self.assertEqual(ECourtsScraper().base_url, 'http://127.0.0.1:1/ecourtindia_v6/')
+
+    async def test_browser_fallback_waits_for_token_before_borrowing_a_page(self):
+        order = []
+        limiter = mock.Mock(acquire=mock.AsyncMock(side_effect=lambda *args, **kwargs: order.append('acquire')))
+        pool = mock.Mock(page=mock.Mock(side_effect=lambda: order.append('page') or BrowserPoolBusy('full')))
+        with mock.patch('court_room_backend.scrapers.ecourts_scraper.get_rate_limiter', return_value=limiter), \
+                mock.patch('court_room_backend.scrapers.ecourts_scraper.get_browser_pool', return_value=pool):
+            result = await ECourtsScraper(self.base_url)._search_with_playwright(6, 'WP', '1234', '2023')
+
+        self.assertFalse(result['success'])
+        self.assertEqual(order, ['acquire', 'page'])
+
+
+class FakeUpstreamPDF:
+    """Stand-in for a streamed requests.Response"""
+
+    def __init__(self, body, content_length=None, status_code=200, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {'Content-Length': str(len(body) if content_length is None else content_length), **(headers or {})}
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class DownloadPDFTests(CaseDataMixin, TestCase):
+
+    BODY = b'%PDF-1.4 ' + bytes(range(256)) * 600
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        query = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='1',
+            filing_year='2023', user_ip='127.0.0.1',
+        )
+        store_search_result(query, SUCCESS_RESULT)
+        self.document = CaseDocument.objects.get()
+        self.url = reverse('download-pdf', args=[self.document.id])
+
+    def download(self, upstream=None, **headers):
+        with mock.patch('api.views.requests.get', return_value=upstream) as get:
+            response = self.client.get(self.url, **headers)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            response.close()
+        return response, content, get
+
+    def test_miss_streams_to_client_and_disk(self):
+        upstream = FakeUpstreamPDF(self.BODY)
+        response, content, get = self.download(upstream)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(content, self.BODY)
+        self.assertTrue(get.call_args.kwargs['stream'])
+        self.assertTrue(upstream.closed)
+        self.document.refresh_from_db()
+        self.assertTrue(self.document.downloaded)
+        self.assertEqual(self.document.checksum, hashlib.sha256(self.BODY).hexdigest())
+        self.assertEqual(self.document.file_size, len(self.BODY))
+        self.assertEqual(self.document.local_file_path, blob_path(self.document.checksum))
+        with open(self.document.local_file_path, 'rb') as f:
+            self.assertEqual(f.read(), self.BODY)
+
+    def test_truncated_upstream_is_not_kept(self):
+        response, content, _ = self.download(FakeUpstreamPDF(self.BODY[:100], content_length=len(self.BODY)))
+
+        self.assertEqual(content, self.BODY[:100])
+        self.document.refresh_from_db()
+        self.assertFalse(self.document.downloaded)
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'court_documents')), [])
+
+    def test_oversized_upstream_is_not_kept(self):
+        with override_settings(DOCUMENT_MAX_BYTES=len(self.BODY) - 1):
+            response, _, _ = self.download(FakeUpstreamPDF(self.BODY))
+            self.assertEqual(response.status_code, 502)
+
+            # Without a usable Content-Length the cap applies as bytes arrive
+            upstream = FakeUpstreamPDF(self.BODY, headers={'Content-Encoding': 'gzip'})
+            response, content, _ = self.download(upstream)
+
+        self.assertLess(len(content), len(self.BODY))
+        self.assertTrue(upstream.closed)
+        self.document.refresh_from_db()
+        self.assertFalse(self.document.downloaded)
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'court_documents')), [])
+
+    def test_content_encoded_upstream_is_kept(self):
+        # iter_content yields the decoded body; the header counts gzip bytes
+        upstream = FakeUpstreamPDF(self.BODY, content_length=1000, headers={'Content-Encoding': 'gzip'})
+        response, content, _ = self.download(upstream)
+
+        self.assertEqual(content, self.BODY)
+        self.assertFalse(response.has_header('Content-Length'))
+        self.document.refresh_from_db()
+        self.assertTrue(self.document.downloaded)
+        self.assertEqual(self.document.file_size, len(self.BODY))
+
+    def test_local_copy_supports_etag_and_ranges(self):
+        self.download(FakeUpstreamPDF(self.BODY))
+
+        response, content, get = self.download()
+        get.assert_not_called()
+        self.assertEqual(content, self.BODY)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{hashlib.sha256(self.BODY).hexdigest()}"')
+
+        response, content, _ = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(content, b'')
+
+        response, content, _ = self.download(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.BODY)}')
+        self.assertEqual(content, self.BODY[100:200])
+
+        response, content, _ = self.download(HTTP_RANGE='bytes=-10')
+        self.assertEqual(content, self.BODY[-10:])
+
+        response, content, _ = self.download(HTTP_RANGE='bytes=100-', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, self.BODY)
+
+        response, _, _ = self.download(HTTP_RANGE=f'bytes={len(self.BODY)}-')
+        self.assertEqual(response.status_code, 416)
+
+
+class IncrementalRefreshTests(CaseDataMixin, TestCase):
+
+    def store(self, result):
+        query = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='1234',
+            filing_year='2023', user_ip='127.0.0.1',
+        )
+        return store_search_result(query, result)
+
+    def test_unchanged_case_writes_no_new_rows(self):
+        first = self.store(SUCCESS_RESULT)
+        second = self.store(json.loads(json.dumps(SUCCESS_RESULT)))
+
+        self.assertEqual(second.snapshot_id, first.case_detail.id)
+        self.assertEqual(CaseDetail.objects.count(), 1)
+        self.assertEqual(CaseDocument.objects.count(), 1)
+        self.assertFalse(CaseChange.objects.exists())
+
+        response = self.client.get(reverse('case-detail', args=[second.id]))
+        self.assertEqual(response.data['case_detail']['cnr_number'], 'GJHC240012342023')
+        self.assertEqual(len(response.data['case_detail']['documents']), 1)
+
+    def test_changes_are_applied_in_place_and_logged(self):
+        first = self.store(SUCCESS_RESULT)
+        result = json.loads(json.dumps(SUCCESS_RESULT))
+        result['data']['case_details']['next_hearing_date'] = '2024-03-01'
+        result['data']['documents'].append({
+            'document_type': 'Order',
+            'pdf_url': 'https://services.ecourts.gov.in/orders/2.pdf',
+            'file_name': 'Order 01/02/2024',
+            'document_date': '2024-02-01',
+        })
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.store(result)
+
+        detail = CaseDetail.objects.get()
+        self.assertEqual(detail.id, first.case_detail.id)
+        self.assertEqual(str(detail.next_hearing_date), '2024-03-01')
+        self.assertEqual(detail.documents.count(), 2)
+        detail_updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "api_casedetail"')]
+        self.assertEqual(len(detail_updates), 1)
+        self.assertNotIn('petitioner_name', detail_updates[0])
+
+        changes = {(c.field, c.old_value, c.new_value, c.query_id) for c in CaseChange.objects.all()}
+        self.assertEqual(changes, {
+            ('next_hearing_date', '2024-02-01', '2024-03-01', second.id),
+            ('document', '', 'https://services.ecourts.gov.in/orders/2.pdf', second.id),
+        })
+
+        # The detail is shared, so the earlier lookup shows the latest values too
+        response = self.client.get(reverse('case-detail', args=[first.id]))
+        self.assertEqual(response.data['case_detail']['next_hearing_date'], '2024-03-01')
+
+    @override_settings(CASE_INCREMENTAL_REFRESH=False)
+    def test_full_refresh_when_disabled(self):
+        self.store(SUCCESS_RESULT)
+        second = self.store(SUCCESS_RESULT)
+
+        self.assertEqual(second.snapshot_id, second.case_detail.id)
+        self.assertEqual(CaseDetail.objects.count(), 2)
+
+
+class ReferenceDataCacheTests(CaseDataMixin, TestCase):
+
+    def test_courts_are_served_from_cache_with_validators(self):
+        first = self.client.get(reverse('court-list'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('court-list'))
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertTrue(second['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', second)
+        self.assertEqual(second['Cache-Control'], f'public, max-age={settings.REFERENCE_CACHE_MAX_AGE}')
+
+        revalidated = self.client.get(reverse('court-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+        self.assertEqual(
+            self.client.get(reverse('court-list'), HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304
+        )
+
+    def test_saving_reference_data_invalidates_the_cache(self):
+        before = self.client.get(reverse('court-list'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Court.objects.create(name='Bombay High Court', location='Mumbai', base_url='https://example.com/')
+        after = self.client.get(reverse('court-list'), HTTP_IF_NONE_MATCH=before['ETag'])
+
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.data['count'], 2)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+
+    def test_case_types_are_cached_per_court(self):
+        other = Court.objects.create(id=7, name='Delhi High Court', location='New Delhi', base_url='https://example.com/')
+        CaseType.objects.create(name='Civil Suit', code='CS', court=other)
+
+        gujarat = self.client.get(reverse('case-type-list'), {'court_id': self.court.id})
+        delhi = self.client.get(reverse('case-type-list'), {'court_id': other.id})
+
+        self.assertEqual([row['code'] for row in gujarat.data['results']], ['WP'])
+        self.assertEqual([row['code'] for row in delhi.data['results']], ['CS'])
+        with self.assertNumQueries(0):
+            again = self.client.get(reverse('case-type-list'), {'court_id': other.id, 'ignored': '1'})
+        self.assertEqual(again.data, delhi.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CaseType.objects.filter(code='CS').get().delete()
+        self.assertEqual(self.client.get(reverse('case-type-list'), {'court_id': other.id}).data['count'], 0)
+
+    @override_settings(CACHES={
+        'default': settings.CACHES['default'],
+        'seeder': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'seeder'},
+        'server': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'server'},
+    })
+    def test_a_bump_through_another_cache_is_seen_once_the_version_expires(self):
+        # Two processes whose caches are not shared: the seed command bumps its own
+        seeder, server = ReferenceCache('seeder', max_entries=8), ReferenceCache('server', max_entries=8)
+        version = server.version()
+        server.set('courts', ['Gujarat High Court'], version)
+
+        seeder.bump()
+        self.assertEqual(server.version(), version)
+        self.assertEqual(server.get('courts', version)['data'], ['Gujarat High Court'])
+
+        later = time.time() + settings.REFERENCE_CACHE_VERSION_TTL + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertGreater(server.version(), version)
+            self.assertIsNone(server.get('courts', server.version()))
+
+    def test_process_local_reference_cache_is_reported(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertIn('api.W001', [warning.id for warning in check_shared_caches(None)])
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379',
+        }}):
+            self.assertEqual(check_shared_caches(None), [])
+
+
+class SeedReferenceDataTests(CaseDataMixin, TestCase):
+
+    def seed(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_reference_data', *args, stdout=out)
+        return out.getvalue()
+
+    def test_seeding_upserts_without_touching_history(self):
+        query = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='1',
+            filing_year='2023', user_ip='127.0.0.1',
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            output = self.seed()
+
+        self.assertIn('Courts: 33 new, 1 changed, 0 unchanged', output)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(Court.objects.count(), 34)
+        self.assertEqual(CaseType.objects.count(), 34 * 74)
+        self.assertEqual(Court.objects.get(id=6).location, 'Ahmedabad, GJ')
+        query.refresh_from_db()
+        self.assertEqual(query.case_type_id, self.case_type.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            output = self.seed()
+        self.assertIn('Courts: 0 new, 0 changed, 34 unchanged', output)
+        self.assertIn('Case types: 0 new', output)
+        self.assertFalse([q for q in queries if q['sql'].startswith(('INSERT', 'UPDATE'))])
+
+    def test_dry_run_prints_the_diff_and_writes_nothing(self):
+        output = self.seed('--dry-run')
+
+        self.assertIn("~ court 6: location 'Ahmedabad' -> 'Ahmedabad, GJ'", output)
+        self.assertIn('+ court 701: District Court Kolkata', output)
+        self.assertIn('+ case type 6/CS: Civil Suit', output)
+        self.assertEqual(Court.objects.count(), 1)
+        self.assertEqual(CaseType.objects.count(), 1)
+
+    def test_csv_files_and_deactivation(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        courts = Path(directory.name, 'courts.csv')
+        courts.write_text('id,name,location\n900,District Court Test,Testville\n')
+        case_types = Path(directory.name, 'case_types.csv')
+        case_types.write_text('court_id,code,name\n900,CS,Civil Suit\n6,WP,Writ Petition\n')
+        self.client.get(reverse('court-list'))
+
+        self.seed(str(courts), str(case_types), '--deactivate-missing')
+
+        self.assertEqual(Court.objects.get(id=900).base_url, settings.ECOURTS_BASE_URL)
+        self.assertFalse(Court.objects.get(id=6).is_active)
+        self.assertEqual(CaseType.objects.count(), 2)
+        # The bulk writes bypass signals but still invalidate cached reference data
+        names = [court['name'] for court in self.client.get(reverse('court-list')).data['results']]
+        self.assertEqual(names, ['District Court Test'])
+
+        case_types.write_text('court_id,code,name\n999,CS,Civil Suit\n')
+        with self.assertRaises(CommandError):
+            self.seed(str(case_types))
+
+
+class FakeClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+@override_settings(
+    WATCH_REFRESH_TICK=300, WATCH_REFRESH_DAILY_BUDGET=576,  # 2 per tick
+    WATCH_REFRESH_INTERVAL=24 * 3600, WATCH_REFRESH_HEARING_INTERVAL=4 * 3600,
+    WATCH_HEARING_WINDOW_DAYS=2, WATCH_REFRESH_JITTER=0.2,
+)
+class RefreshSchedulerTests(CaseDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock(timezone.make_aware(datetime(2024, 2, 1, 10, 0)))
+        self.scheduler = RefreshScheduler(clock=self.clock, rng=random.Random(1))
+        self.delay = self.enterContext(mock.patch('api.tasks.run_case_search.delay'))
+
+    def watch(self, case_number, refreshed_hours_ago=None, hearing_date=None):
+        watched = WatchedCase.objects.create(
+            court=self.court, case_type=self.case_type, case_number=case_number, filing_year='2023',
+        )
+        if refreshed_hours_ago is not None:
+            query = CaseQuery.objects.create(
+                court=self.court, case_type=self.case_type, case_number=case_number,
+                filing_year='2023', user_ip='127.0.0.1',
+            )
+            result = json.loads(json.dumps(SUCCESS_RESULT))
+            result['data']['case_details']['next_hearing_date'] = hearing_date
+            store_search_result(query, result)
+            watched.last_query = query
+            watched.last_refreshed_at = self.clock() - timedelta(hours=refreshed_hours_ago)
+            watched.next_refresh_at = watched.last_refreshed_at + timedelta(hours=20)
+            watched.save()
+        return watched
+
+    def run_tick(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.scheduler.run()
+
+    def queued_case_numbers(self):
+        ids = [call.args[0] for call in self.delay.call_args_list]
+        return sorted(CaseQuery.objects.filter(id__in=ids).values_list('case_number', flat=True))
+
+    def test_budget_goes_to_new_then_hearing_then_stalest_cases(self):
+        self.watch('new')
+        self.watch('hearing', refreshed_hours_ago=22, hearing_date='2024-02-02')
+        self.watch('stale', refreshed_hours_ago=30)
+        self.watch('fresh', refreshed_hours_ago=1)
+
+        report = self.run_tick()
+
+        self.assertEqual(self.queued_case_numbers(), ['hearing', 'new'])
+        self.assertEqual(report['queued'], 2)
+        self.assertEqual(report['due'], 1)
+        self.assertEqual(report['lag_seconds'], 10 * 3600)
+
+        self.delay.reset_mock()
+        self.run_tick()
+        self.assertEqual(self.queued_case_numbers(), ['stale'])
+
+    def test_plan_is_ranked_and_cut_in_the_database(self):
+        self.watch('far hearing', refreshed_hours_ago=30, hearing_date='2024-02-11')
+        self.watch('no hearing', refreshed_hours_ago=30)
+        self.watch('staler', refreshed_hours_ago=50)
+        self.watch('near hearing', refreshed_hours_ago=21, hearing_date='2024-02-03')
+
+        with CaptureQueriesContext(connection) as queries:
+            plan = self.scheduler.plan(self.clock())
+
+        # 21h of a 4h hearing interval plus 1/3 beats 50h of 24h; a distant hearing only adds its bonus
+        planned = WatchedCase.objects.in_bulk(plan)
+        self.assertEqual(sorted(planned[watched_id].case_number for watched_id in plan), ['near hearing', 'staler'])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIMIT 2', queries[0]['sql'])
+
+        with override_settings(WATCH_REFRESH_DAILY_BUDGET=4 * 288):
+            ranked = [WatchedCase.objects.get(id=watched_id).case_number for watched_id in self.scheduler.plan(self.clock())]
+        self.assertEqual(ranked, ['near hearing', 'staler', 'far hearing', 'no hearing'])
+
+    def test_scheduled_searches_are_left_out_of_history(self):
+        self.watch('watched')
+        self.run_tick()
+        CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='user', filing_year='2023', user_ip='10.0.0.1',
+        )
+
+        with override_settings(HISTORY_HOT_DAYS=0):
+            default = self.client.get(reverse('case-history'))
+            scheduled = self.client.get(reverse('case-history'), {'scheduled': 'true'})
+            both = self.client.get(reverse('case-history'), {'scheduled': 'all'})
+
+        self.assertEqual([row['case_number'] for row in default.data['results']], ['user'])
+        self.assertEqual([row['case_number'] for row in scheduled.data['results']], ['watched'])
+        self.assertTrue(scheduled.data['results'][0]['scheduled'])
+        self.assertEqual(len(both.data['results']), 2)
+
+    def test_next_refresh_is_jittered_around_the_interval(self):
+        watched = [self.watch(str(n)) for n in range(2)]
+        hearing = self.watch('hearing', refreshed_hours_ago=30, hearing_date='2024-02-01')
+        with override_settings(WATCH_REFRESH_DAILY_BUDGET=10 ** 6):
+            self.run_tick()
+
+        due_in = [
+            (case.next_refresh_at - self.clock()).total_seconds() / 3600
+            for case in WatchedCase.objects.filter(id__in=[case.id for case in watched])
+        ]
+        self.assertEqual(len(set(due_in)), 2)
+        for hours in due_in:
+            self.assertTrue(24 * 0.8 <= hours <= 24 * 1.2)
+        hearing.refresh_from_db()
+        self.assertLessEqual(hearing.next_refresh_at - self.clock(), timedelta(hours=4 * 1.2))
+
+    def test_cases_fall_due_again_as_the_clock_moves(self):
+        self.watch('a')
+        self.run_tick()
+        self.assertEqual(self.scheduler.backlog()['due'], 0)
+
+        self.clock.advance(hours=30)
+        backlog = self.scheduler.backlog()
+        self.assertEqual(backlog['due'], 1)
+        self.assertGreaterEqual(backlog['lag_seconds'], 6 * 3600)
+        self.assertEqual(backlog['catch_up_seconds'], 300)
+
+    def test_broker_outage_fails_the_queued_searches(self):
+        self.watch('a')
+        self.watch('b')
+        self.delay.side_effect = ConnectionError('no broker')
+
+        self.run_tick()
+
+        self.assertEqual(self.delay.call_count, 1)
+        self.assertEqual(
+            set(CaseQuery.objects.values_list('status', flat=True)), {CaseQuery.STATUS_FAILED}
+        )
+
+
+class DocumentPrefetchTests(CaseDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, DOCUMENT_PREFETCH_CONCURRENCY=2))
+        self.portal = FakePortal(latency=0, jitter=0)
+        base_url = self.portal.start()
+        self.addCleanup(self.portal.stop)
+        self.enterContext(mock.patch('api.services.get_rate_limiter', return_value=RateLimiter(rate=1000, burst=1000)))
+
+        result = json.loads(json.dumps(SUCCESS_RESULT))
+        # Three links, two of them to the same order; the portal serves identical bytes for all
+        result['data']['documents'] = [
+            dict(result['data']['documents'][0], pdf_url=f'{base_url}orders/{name}.pdf')
+            for name in ('a', 'b', 'a')
+        ]
+        query = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='1',
+            filing_year='2023', user_ip='127.0.0.1',
+        )
+        store_search_result(query, result)
+        self.document_ids = list(CaseDocument.objects.values_list('id', flat=True))
+
+    async def prefetch(self):
+        http = PooledHTTPClient(10, 10, 5, 10, 1, 5, http2=False)
+        try:
+            with mock.patch('api.services.get_http_client', return_value=http):
+                return await aprefetch_document_files(self.document_ids)
+        finally:
+            await http.aclose()
+
+    async def test_prefetch_stores_one_blob_per_content(self):
+        outcomes = await self.prefetch()
+
+        self.assertEqual(sum(outcomes.values()), 3)
+        documents = [document async for document in CaseDocument.objects.all()]
+        self.assertEqual({document.download_status for document in documents}, {CaseDocument.DOWNLOAD_DONE})
+        self.assertEqual(len({document.checksum for document in documents}), 1)
+        self.assertEqual(len({document.local_file_path for document in documents}), 1)
+        blobs = [name for _, _, names in os.walk(settings.MEDIA_ROOT) for name in names]
+        self.assertEqual(blobs, [os.path.basename(documents[0].local_file_path)])
+
+        # Already downloaded documents are skipped on a repeat run
+        self.assertEqual(await self.prefetch(), {'skipped': 3})
+
+    async def test_failed_download_is_recorded(self):
+        self.portal.error_rate = 1.0
+
+        outcomes = await self.prefetch()
+
+        self.assertEqual(outcomes, {'failed': 3})
+        statuses = {document.download_status async for document in CaseDocument.objects.all()}
+        self.assertEqual(statuses, {CaseDocument.DOWNLOAD_FAILED})
+
+    async def test_stale_claims_are_taken_over(self):
+        crashed, running = self.document_ids[:2]
+        self.document_ids = [crashed, running]
+        await CaseDocument.objects.filter(id=crashed).aupdate(
+            download_status=CaseDocument.DOWNLOAD_RUNNING, download_claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        await CaseDocument.objects.filter(id=running).aupdate(
+            download_status=CaseDocument.DOWNLOAD_RUNNING, download_claimed_at=timezone.now(),
+        )
+
+        outcomes = await self.prefetch()
+
+        self.assertEqual(outcomes, {'downloaded': 1, 'skipped': 1})
+        self.assertEqual((await CaseDocument.objects.aget(id=crashed)).download_status, CaseDocument.DOWNLOAD_DONE)
+        self.assertEqual((await CaseDocument.objects.aget(id=running)).download_status, CaseDocument.DOWNLOAD_RUNNING)
+
+    @override_settings(DOCUMENT_PREFETCH_ENABLED=True)
+    def test_storing_results_queues_prefetch(self):
+        query = CaseQuery.objects.create(
+            court=self.court, case_type=self.case_type, case_number='2',
+            filing_year='2023', user_ip='127.0.0.1',
+        )
+        with mock.patch('api.tasks.prefetch_documents.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            store_search_result(query, SUCCESS_RESULT)
+
+        delay.assert_called_once_with([query.case_detail.documents.get().id])
@@ -5,7 +5,11 @@ urlpatterns = [
     path('courts/', views.CourtListView.as_view(), name='court-list'),
     path('case-types/', views.CaseTypeListView.as_view(), name='case-type-list'),
     path('case-search/', views.search_case, name='case-search'),
+    path('case-search/async/', views.search_case_async, name='case-search-async'),
+    path('case-search/bulk/', views.search_case_bulk, name='case-search-bulk'),
+    path('case-search/<uuid:query_id>/events/', views.search_case_events, name='case-search-events'),
     path('case-history/', views.CaseHistoryView.as_view(), name='case-history'),
     path('case-detail/<uuid:query_id>/', views.case_detail, name='case-detail'),
     path('download-pdf/<int:document_id>/', views.download_pdf, name='download-pdf'),
+    path('scraper-status/', views.scraper_status, name='scraper-status'),
 ]
\ No newline at end of file
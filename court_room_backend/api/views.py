@@ -1,32 +1,97 @@
 from rest_framework import generics, status
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.http import HttpResponse, Http404
-from django.shortcuts import get_object_or_404
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, aget_object_or_404
 from django.utils import timezone
-from django.db import transaction
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from datetime import date, datetime, time, timedelta
+from urllib.parse import urlencode, urlsplit
 import asyncio
+import json
+import math
+import os
 import requests
 import logging
 
-from .models import Court, CaseType, CaseQuery, CaseDetail, CaseDocument
+from . import progress
+from .archive import in_hot_window
+from .checks import is_process_local
+from .models import Court, CaseType, CaseQuery, CaseDocument, ArchivedCaseQuery
+from .pagination import CaseHistoryCursorPagination
+from .reference_cache import get_reference_cache
+from .scheduler import RefreshScheduler
 from .serializers import (
-    CourtSerializer, CaseTypeSerializer, CaseQuerySerializer, 
-    CaseSearchSerializer, CaseDetailSerializer
+    CourtSerializer, CaseTypeSerializer, CaseQuerySerializer, ArchivedCaseQuerySerializer,
+    CaseSearchSerializer, BulkCaseSearchSerializer
 )
+from .services import aexecute_case_search, bulk_host_limit, record_document_blob, serve_from_cache
+from .storage import BlobWriter
+from .tasks import run_case_search
 from court_room_backend.scrapers.ecourts_scraper import ECourtsScraper
+from court_room_backend.scrapers.rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
-class CourtListView(generics.ListAPIView):
+class ReferenceCacheMixin:
+    """
+    Serve a list view of reference data from the versioned reference cache,
+    with a strong ETag, Last-Modified and a long Cache-Control so clients
+    and CDNs revalidate with cheap 304s. Only cache_params of the query
+    string vary the cached response.
+    """
+    cache_params = ('page',)
+
+    def list(self, request, *args, **kwargs):
+        reference_cache = get_reference_cache()
+        version = reference_cache.version()
+        params = urlencode([
+            (name, request.query_params[name]) for name in self.cache_params if name in request.query_params
+        ])
+        name = f'{self.cache_name}?{params}'
+
+        entry = reference_cache.get(name, version)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            entry = reference_cache.set(name, response.data, version)
+
+        headers = {
+            'ETag': entry['etag'],
+            'Last-Modified': http_date(entry['version'] // 1000),
+            'Cache-Control': f'public, max-age={settings.REFERENCE_CACHE_MAX_AGE}',
+        }
+        if _reference_not_modified(request, entry):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['data'], headers=headers)
+
+
+def _reference_not_modified(request, entry):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, entry['etag'])
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+    return if_modified_since is not None and entry['version'] // 1000 <= if_modified_since
+
+class CourtListView(ReferenceCacheMixin, generics.ListAPIView):
     """List all available courts"""
     queryset = Court.objects.filter(is_active=True)
     serializer_class = CourtSerializer
+    cache_name = 'courts'
 
-class CaseTypeListView(generics.ListAPIView):
+class CaseTypeListView(ReferenceCacheMixin, generics.ListAPIView):
     """List case types for a specific court"""
     serializer_class = CaseTypeSerializer
+    cache_name = 'case-types'
+    cache_params = ('court_id', 'page')
     
     def get_queryset(self):
         court_id = self.request.query_params.get('court_id')
@@ -35,12 +100,48 @@ class CaseTypeListView(generics.ListAPIView):
         return CaseType.objects.all()
 
 class CaseHistoryView(generics.ListAPIView):
-    """View search history with pagination"""
-    serializer_class = CaseQuerySerializer
-    pagination_class = PageNumberPagination
+    """
+    View search history with pagination.
+
+    Only the hot window (the last HISTORY_HOT_DAYS) is listed, so the
+    history scan stays short however large the table grows, along with
+    the older entries the archiver keeps hot (each case's latest successful
+    lookup, for one); ?archived=true lists the entries it has moved out
+    instead.
+
+    With CASE_INCREMENTAL_REFRESH, every lookup of a case shows the case's
+    shared detail, so older entries show the latest known values; the
+    values they originally saw are kept in CaseChange.
+    """
+
+    @property
+    def archived(self):
+        return self.request.query_params.get('archived', '').lower() == 'true'
+
+    def get_serializer_class(self):
+        return ArchivedCaseQuerySerializer if self.archived else CaseQuerySerializer
+
+    @property
+    def pagination_class(self):
+        # Page numbers stay available for clients that ask for ?page=N
+        if settings.CASE_HISTORY_PAGINATION == 'page' or 'page' in self.request.query_params:
+            return PageNumberPagination
+        return CaseHistoryCursorPagination
     
     def get_queryset(self):
-        queryset = CaseQuery.objects.all()
+        if self.archived:
+            queryset = ArchivedCaseQuery.objects.all()
+        else:
+            queryset = in_hot_window(CaseQuery.objects.with_details())
+        
+        # Watch-list refreshes would crowd out user searches, so they are
+        # left out unless asked for: ?scheduled=true for only them, =all for both
+        scheduled = self.request.query_params.get('scheduled', '').lower()
+        scheduled_field = 'data__scheduled' if self.archived else 'scheduled'
+        if scheduled == 'true':
+            queryset = queryset.filter(**{scheduled_field: True})
+        elif scheduled != 'all':
+            queryset = queryset.exclude(**{scheduled_field: True})
         
         # Filter by success status
         success = self.request.query_params.get('success')
@@ -51,17 +152,30 @@ class CaseHistoryView(generics.ListAPIView):
         date_from = self.request.query_params.get('date_from')
         date_to = self.request.query_params.get('date_to')
         
+        # Compare the raw timestamp against day boundaries rather than
+        # casting it to a date, so the queried_at indexes stay usable
         if date_from:
-            queryset = queryset.filter(queried_at__date__gte=date_from)
+            queryset = queryset.filter(queried_at__gte=self._day_start(date_from, 'date_from'))
         if date_to:
-            queryset = queryset.filter(queried_at__date__lte=date_to)
+            queryset = queryset.filter(
+                queried_at__lt=self._day_start(date_to, 'date_to') + timedelta(days=1)
+            )
             
         return queryset
 
+    @staticmethod
+    def _day_start(value, param):
+        """Start of a YYYY-MM-DD day in the current time zone"""
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({param: 'Use YYYY-MM-DD.'})
+        return timezone.make_aware(datetime.combine(day, time.min))
+
 @api_view(['POST'])
 def search_case(request):
     """
-    Search for case details
+    Queue a case search and return the query ID immediately
     """
     serializer = CaseSearchSerializer(data=request.data)
     if not serializer.is_valid():
@@ -86,87 +200,340 @@ def search_case(request):
         user_ip=client_ip
     )
     
-    try:
-        # Perform scraping
-        scraper = ECourtsScraper()
-        
-        # Run async scraper in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            result = loop.run_until_complete(
-                scraper.search_case(
-                    court.id,
-                    case_type.code,
-                    data['case_number'],
-                    data['filing_year']
-                )
-            )
-        finally:
-            loop.close()
-        
-        # Update query with results
-        query.success = result['success']
-        query.raw_response = result
-        
-        if not result['success']:
-            query.error_message = result.get('error', 'Unknown error')
-            query.save()
-            
-            return Response({
-                'success': False,
-                'error': result.get('error', 'Search failed'),
-                'query_id': str(query.id)
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Save case details if successful
-        with transaction.atomic():
-            case_data = result['data']['case_details']
-            
-            case_detail = CaseDetail.objects.create(
-                query=query,
-                cnr_number=case_data.get('cnr_number', ''),
-                petitioner_name=case_data.get('petitioner_name', ''),
-                respondent_name=case_data.get('respondent_name', ''),
-                filing_date=case_data.get('filing_date'),
-                next_hearing_date=case_data.get('next_hearing_date'),
-                case_status=case_data.get('case_status', ''),
-                court_hall=case_data.get('court_hall', ''),
-                judge_name=case_data.get('judge_name', '')
-            )
-            
-            # Save documents
-            for doc_data in result['data']['documents']:
-                CaseDocument.objects.create(
-                    case_detail=case_detail,
-                    document_type=doc_data.get('document_type', 'Document'),
-                    document_date=doc_data.get('document_date'),
-                    pdf_url=doc_data['pdf_url'],
-                    file_name=doc_data.get('file_name', 'Document')
-                )
-        
-        query.save()
-        
-        # Return formatted response
+    # Repeat lookups are answered from the result cache without a scrape
+    if not data['force_refresh'] and serve_from_cache(query):
         response_serializer = CaseQuerySerializer(query)
-        return Response({
-            'success': True,
+        payload = {
+            'success': query.success,
+            'status': query.status,
             'data': response_serializer.data,
             'query_id': str(query.id)
-        })
-        
+        }
+        if not query.success:
+            # A cached "not found" and the like; say why, as other failures do
+            payload['error'] = query.error_message
+        return Response(payload)
+    
+    # Scraping runs in a Celery worker; clients follow case-search/<id>/events/
+    # or poll case-detail/<id>/
+    progress.publish(query.id, progress.QUEUED)
+    try:
+        run_case_search.delay(str(query.id), force_refresh=data['force_refresh'])
     except Exception as e:
-        logger.error(f"Error in case search: {str(e)}")
-        query.success = False
+        logger.error(f"Error queueing case search: {str(e)}")
+        query.status = CaseQuery.STATUS_FAILED
         query.error_message = str(e)
-        query.save()
+        query.save(update_fields=['status', 'error_message'])
+        progress.publish_final(query)
         
         return Response({
+            'success': False,
+            'error': 'Search queue unavailable',
+            'query_id': str(query.id)
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    return Response({
+        'success': True,
+        'status': CaseQuery.STATUS_PENDING,
+        'query_id': str(query.id)
+    }, status=status.HTTP_202_ACCEPTED)
+
+@require_GET
+async def search_case_events(request, query_id):
+    """
+    Progress of a search as server-sent events (text/event-stream).
+
+    Each stage api.progress records is sent as a `progress` event; the
+    stream ends with a `result` event carrying what case-detail/<id>/
+    returns. Reconnecting with Last-Event-ID (or ?last_event_id=) resumes
+    after that event and never starts another scrape. A stream closes
+    after SEARCH_EVENTS_MAX_DURATION seconds so proxies and workers are
+    not tied up; EventSource reconnects by itself. Serve under ASGI, WSGI
+    servers buffer the whole stream, so nothing arrives until it closes.
+
+    Events only reach this stream if SEARCH_PROGRESS_CACHE_ALIAS is shared
+    with the Celery workers; with a process-local cache it checks the
+    database every poll instead, and reports just the final result.
+    """
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0)
+    except ValueError:
+        last_id = 0
+    
+    exists = (
+        await CaseQuery.objects.filter(id=query_id).aexists()
+        or await ArchivedCaseQuery.objects.filter(id=query_id).aexists()
+    )
+    if not exists:
+        return JsonResponse({'error': 'Case not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    response = StreamingHttpResponse(
+        _stream_search_events(query_id, last_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+# Milliseconds EventSource waits before reconnecting
+SEARCH_EVENTS_RETRY = 2000
+
+async def _stream_search_events(query_id, last_id):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SEARCH_EVENTS_MAX_DURATION
+    # Progress from workers in other processes never reaches a process-local cache
+    db_check_interval = (
+        settings.SEARCH_EVENTS_POLL_INTERVAL if is_process_local(settings.SEARCH_PROGRESS_CACHE_ALIAS)
+        else settings.SEARCH_EVENTS_HEARTBEAT
+    )
+    quiet_since = check_at = loop.time()
+    yield f"retry: {SEARCH_EVENTS_RETRY}\n\n"
+    
+    while loop.time() < deadline:
+        events = await sync_to_async(progress.events_since, thread_sensitive=False)(query_id, last_id)
+        for event in events:
+            yield progress.format_event(event)
+            last_id = event['id']
+            if event['stage'] in progress.FINAL_STAGES:
+                return
+        
+        now = loop.time()
+        if events:
+            quiet_since = now
+        elif now >= check_at:
+            # Searches answered from the result cache, or whose events expired,
+            # have nothing in the progress store: finish from the database
+            event = await sync_to_async(_finished_search_event)(query_id, last_id + 1)
+            if event is not None:
+                yield progress.format_event(event)
+                return
+            check_at = now + db_check_interval
+        
+        if now - quiet_since >= settings.SEARCH_EVENTS_HEARTBEAT:
+            yield ": keep-alive\n\n"
+            quiet_since = now
+        await asyncio.sleep(settings.SEARCH_EVENTS_POLL_INTERVAL)
+
+def _finished_search_event(query_id, event_id):
+    """The final event for a search that has finished, from the database; None while it runs"""
+    query = CaseQuery.objects.with_details().filter(id=query_id).first()
+    if query is None:
+        archived = ArchivedCaseQuery.objects.filter(id=query_id).first()
+        if archived is None:
+            return None
+        stage, result = progress.COMPLETED if archived.success else progress.FAILED, archived.data
+    elif query.status in (CaseQuery.STATUS_COMPLETED, CaseQuery.STATUS_FAILED):
+        stage, result = progress.COMPLETED if query.success else progress.FAILED, progress.final_payload(query)
+    else:
+        return None
+    return {'id': event_id, 'stage': stage, 'at': timezone.now().timestamp(), 'result': result}
+
+def _throttle_wait(request, cost=1):
+    """
+    DRF's DEFAULT_THROTTLE_CLASSES for plain Django views, which DRF never
+    throttles. `cost` searches are counted against each rate, and are
+    recorded only if every throttle has room for all of them. Returns
+    None if allowed, otherwise the seconds until enough room frees up.
+    Reads request.user, so call it from a thread in async views.
+    """
+    allowed = []
+    for throttle in (throttle_class() for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES):
+        if not isinstance(throttle, SimpleRateThrottle):
+            if not throttle.allow_request(request, None):
+                return throttle.wait() or 0
+            continue
+        key = throttle.get_cache_key(request, None) if throttle.rate else None
+        if key is None:
+            continue
+        now = throttle.timer()
+        history = [t for t in throttle.cache.get(key, []) if t > now - throttle.duration]
+        room = throttle.num_requests - cost
+        if len(history) > room:
+            # Newest first: entry `room` is the one that has to expire
+            return history[room] + throttle.duration - now if room >= 0 else throttle.duration
+        allowed.append((throttle, key, [now] * cost + history))
+
+    for throttle, key, history in allowed:
+        throttle.cache.set(key, history, throttle.duration)
+    return None
+
+def _throttled_response(wait):
+    wait = math.ceil(wait)
+    response = JsonResponse(
+        {'detail': f'Request was throttled. Expected available in {wait} seconds.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(wait)
+    return response
+
+@csrf_exempt
+@require_POST
+async def search_case_async(request):
+    """
+    Search for case details within the request, without queueing.
+
+    Native async view for ASGI deployments: the request waits on the
+    scrape without holding a thread, so one process can keep many
+    searches in flight. Throttled like case-search/.
+    """
+    wait = await sync_to_async(_throttle_wait)(request)
+    if wait is not None:
+        return _throttled_response(wait)
+    
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = CaseSearchSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse(
+            {'error': 'Invalid input data', 'details': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    data = serializer.validated_data
+    try:
+        court = await aget_object_or_404(Court, id=data['court_id'])
+        case_type = await aget_object_or_404(CaseType, id=data['case_type_id'])
+    except Http404 as e:
+        return JsonResponse({'detail': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    
+    query = await CaseQuery.objects.acreate(
+        court=court,
+        case_type=case_type,
+        case_number=data['case_number'],
+        filing_year=data['filing_year'],
+        user_ip=get_client_ip(request),
+        status=CaseQuery.STATUS_RUNNING
+    )
+    
+    try:
+        await aexecute_case_search(query, force_refresh=data['force_refresh'], raise_errors=True)
+    except Exception:
+        return JsonResponse({
             'success': False,
             'error': 'Internal server error',
             'query_id': str(query.id)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    if not query.success:
+        return JsonResponse({
+            'success': False,
+            'error': query.error_message,
+            'query_id': str(query.id)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    response_data = await sync_to_async(lambda: CaseQuerySerializer(query).data)()
+    return JsonResponse({
+        'success': True,
+        'data': response_data,
+        'query_id': str(query.id)
+    })
+
+@csrf_exempt
+@require_POST
+async def search_case_bulk(request):
+    """
+    Search many cases at once, streaming results as NDJSON.
+
+    Items are fanned out with at most BULK_SEARCH_CONCURRENCY searches per
+    request and BULK_SEARCH_PER_HOST_CONCURRENCY per upstream host across
+    all bulk requests. Each item gets its own CaseQuery; one JSON line is
+    written per item as it completes, then a summary line. Each item
+    counts as one search against the case-search/ throttle rates. Serve
+    under ASGI, WSGI servers buffer the whole stream.
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = BulkCaseSearchSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse(
+            {'error': 'Invalid input data', 'details': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    items = serializer.validated_data['items']
+    force_refresh = serializer.validated_data['force_refresh']
+    
+    # Every item is a search, so each counts against the throttle rates
+    wait = await sync_to_async(_throttle_wait)(request, cost=len(items))
+    if wait is not None:
+        return _throttled_response(wait)
+    
+    courts = await Court.objects.ain_bulk({item['court_id'] for item in items})
+    case_types = await CaseType.objects.ain_bulk({item['case_type_id'] for item in items})
+    client_ip = get_client_ip(request)
+    
+    queries = {}
+    errors = {}
+    for index, item in enumerate(items):
+        court = courts.get(item['court_id'])
+        case_type = case_types.get(item['case_type_id'])
+        if court is None or case_type is None:
+            errors[index] = 'Unknown court or case type'
+            continue
+        queries[index] = CaseQuery(
+            court=court,
+            case_type=case_type,
+            case_number=item['case_number'],
+            filing_year=item['filing_year'],
+            user_ip=client_ip,
+            status=CaseQuery.STATUS_RUNNING
+        )
+    await CaseQuery.objects.abulk_create(queries.values())
+    
+    return StreamingHttpResponse(
+        _stream_bulk_results(queries, errors, force_refresh),
+        content_type='application/x-ndjson'
+    )
+
+# Keeps bulk searches alive (and referenced) if the client disconnects
+_bulk_tasks = set()
+
+async def _stream_bulk_results(queries, errors, force_refresh):
+    limit = asyncio.Semaphore(settings.BULK_SEARCH_CONCURRENCY)
+    host = urlsplit(ECourtsScraper().base_url).netloc
+    
+    async def run(index, query):
+        async with limit, bulk_host_limit(host):
+            await aexecute_case_search(query, force_refresh=force_refresh)
+        data = await sync_to_async(lambda: CaseQuerySerializer(query).data)()
+        return {
+            'index': index,
+            'query_id': str(query.id),
+            'success': query.success,
+            'status': query.status,
+            'error': query.error_message or None,
+            'data': data if query.success else None
+        }
+    
+    for index, error in errors.items():
+        yield _ndjson_line({'index': index, 'query_id': None, 'success': False, 'error': error})
+    
+    tasks = [asyncio.ensure_future(run(index, query)) for index, query in queries.items()]
+    for task in tasks:
+        _bulk_tasks.add(task)
+        task.add_done_callback(_bulk_tasks.discard)
+    
+    succeeded = 0
+    for next_done in asyncio.as_completed(tasks):
+        line = await next_done
+        succeeded += line['success']
+        yield _ndjson_line(line)
+    
+    yield _ndjson_line({
+        'done': True,
+        'total': len(queries) + len(errors),
+        'succeeded': succeeded
+    })
+
+def _ndjson_line(data):
+    return json.dumps(data, cls=DjangoJSONEncoder) + '\n'
 
 @api_view(['GET'])
 def download_pdf(request, document_id):
@@ -178,36 +545,28 @@ def download_pdf(request, document_id):
         
         # If file is already downloaded locally, serve it
         if document.local_file_path and os.path.exists(document.local_file_path):
-            with open(document.local_file_path, 'rb') as f:
-                response = HttpResponse(f.read(), content_type='application/pdf')
-                response['Content-Disposition'] = f'attachment; filename="{document.file_name}.pdf"'
-                return response
+            return _serve_local_pdf(request, document)
+        
+        # Otherwise, stream it from the court server, saving a copy as it passes
+        pdf_response = requests.get(document.pdf_url, timeout=30, stream=True)
         
-        # Otherwise, download from court server
-        pdf_response = requests.get(document.pdf_url, timeout=30)
+        length = _decoded_length(pdf_response)
+        if pdf_response.status_code == 200 and length is not None and length > settings.DOCUMENT_MAX_BYTES:
+            pdf_response.close()
+            return Response({
+                'error': 'PDF from court server is too large'
+            }, status=status.HTTP_502_BAD_GATEWAY)
         
         if pdf_response.status_code == 200:
-            # Save locally for future use
-            import os
-            from django.conf import settings
-            
-            media_dir = os.path.join(settings.MEDIA_ROOT, 'court_documents')
-            os.makedirs(media_dir, exist_ok=True)
-            
-            filename = f"{document.id}_{document.file_name}.pdf"
-            filepath = os.path.join(media_dir, filename)
-            
-            with open(filepath, 'wb') as f:
-                f.write(pdf_response.content)
-            
-            document.local_file_path = filepath
-            document.downloaded = True
-            document.save()
-            
-            response = HttpResponse(pdf_response.content, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{document.file_name}.pdf"'
+            response = StreamingHttpResponse(
+                _tee_to_disk(pdf_response, document), content_type='application/pdf'
+            )
+            if length is not None:
+                response['Content-Length'] = str(length)
+            response['Content-Disposition'] = content_disposition_header(True, _pdf_filename(document))
             return response
         else:
+            pdf_response.close()
             return Response({
                 'error': 'PDF not available from court server'
             }, status=status.HTTP_404_NOT_FOUND)
@@ -218,13 +577,148 @@ def download_pdf(request, document_id):
             'error': 'Error downloading PDF'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+PDF_CHUNK_SIZE = 64 * 1024
+
+def _pdf_filename(document):
+    return f"{document.file_name or 'document'}.pdf"
+
+def _serve_local_pdf(request, document):
+    """
+    Serve a saved PDF without reading it into memory: FileResponse (sendfile
+    where the server supports it), a strong ETag for If-None-Match, and
+    single byte ranges for resumed downloads and PDF viewers.
+    """
+    path = document.local_file_path
+    stat = os.stat(path)
+    if document.checksum:
+        etag = f'"{document.checksum}"'
+    else:
+        etag = f'"{document.id:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    
+    if _etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+    
+    byte_range = None
+    if request.headers.get('Range') and request.headers.get('If-Range', etag) == etag:
+        byte_range = _parse_byte_range(request.headers['Range'], stat.st_size)
+    
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_file_range(path, start, end - start + 1),
+            status=status.HTTP_206_PARTIAL_CONTENT, content_type='application/pdf'
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = content_disposition_header(True, _pdf_filename(document))
+    else:
+        response = FileResponse(
+            open(path, 'rb'), as_attachment=True, filename=_pdf_filename(document),
+            content_type='application/pdf'
+        )
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+def _etag_matches(header, etag):
+    """If-None-Match comparison (weak, so W/ prefixes are ignored)"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in (tag.strip().removeprefix('W/') for tag in header.split(','))
+
+def _parse_byte_range(header, size):
+    """
+    (start, end) for a single `bytes=` range, 'unsatisfiable', or None to
+    ignore the header and send the whole file (multi-range, malformed).
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return 'unsatisfiable'
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return 'unsatisfiable'
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+def _read_file_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(PDF_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+def _decoded_length(pdf_response):
+    """
+    Upstream Content-Length if it is also the length of the body
+    iter_content yields; a Content-Encoding (gzip etc.) is decoded away,
+    so the header then counts different bytes.
+    """
+    length = pdf_response.headers.get('Content-Length', '')
+    encoding = pdf_response.headers.get('Content-Encoding', 'identity').strip().lower()
+    if not length.isdigit() or encoding not in ('', 'identity'):
+        return None
+    return int(length)
+
+def _tee_to_disk(pdf_response, document):
+    """
+    Yield the upstream body to the client while writing it into
+    content-addressed storage, which the document points at only once the
+    body is complete. If either side goes away first, the partial file is
+    discarded; so is a body over DOCUMENT_MAX_BYTES, which also ends the
+    download there, as it fails a prefetch.
+    """
+    expected = _decoded_length(pdf_response)
+    try:
+        with BlobWriter() as blob:
+            for chunk in pdf_response.iter_content(PDF_CHUNK_SIZE):
+                blob.write(chunk)
+                if blob.size > settings.DOCUMENT_MAX_BYTES:
+                    logger.warning(
+                        f"Upstream PDF for document {document.id} is larger than DOCUMENT_MAX_BYTES "
+                        f"({settings.DOCUMENT_MAX_BYTES}); not kept"
+                    )
+                    return
+                yield chunk
+            if expected is not None and blob.size != expected:
+                logger.warning(f"Upstream PDF for document {document.id} truncated ({blob.size}/{expected} bytes)")
+                return
+            blob.commit()
+            record_document_blob(document, blob.path, blob.checksum, blob.size)
+    finally:
+        pdf_response.close()
+
 @api_view(['GET'])
 def case_detail(request, query_id):
     """
-    Get detailed case information by query ID
+    Get detailed case information by query ID. The case detail is the
+    latest known state of the case (see CaseHistoryView).
     """
     try:
-        query = get_object_or_404(CaseQuery, id=query_id)
+        query = CaseQuery.objects.with_details().filter(id=query_id).first()
+        if query is None:
+            # Old searches live on in the archive
+            return Response(get_object_or_404(ArchivedCaseQuery, id=query_id).data)
         serializer = CaseQuerySerializer(query)
         return Response(serializer.data)
     except Exception as e:
@@ -232,6 +726,20 @@ def case_detail(request, query_id):
             'error': 'Case not found'
         }, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+def scraper_status(request):
+    """
+    Upstream rate limiter state of the portal's buckets (as the workers
+    share them, when CASE_CACHE_SHARED_ALIAS is shared), and the watched
+    case refresh backlog
+    """
+    scraper = ECourtsScraper()
+    keys = {scraper._rate_limit_key(court_id) for court_id in Court.objects.values_list('id', flat=True)}
+    return Response({
+        'rate_limits': get_rate_limiter().snapshot(keys),
+        'watchlist': RefreshScheduler().backlog(),
+    })
+
 def get_client_ip(request):
     """Get client IP address"""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
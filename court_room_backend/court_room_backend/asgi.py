@@ -2,6 +2,8 @@
 ASGI config for court_room_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Needed for the async endpoints (e.g. case-search/async/); serve with
+    gunicorn court_room_backend.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -0,0 +1,21 @@
+"""
+Celery application for court_room_backend.
+
+Workers are started with:
+    celery -A court_room_backend worker -l info
+
+and the periodic tasks in CELERY_BEAT_SCHEDULE with (one instance):
+    celery -A court_room_backend beat -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'court_room_backend.settings')
+
+app = Celery('court_room_backend')
+
+# All CELERY_* settings in settings.py configure the app
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from django.conf import settings
+from playwright.async_api import async_playwright
+
+from . import runtime
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class BrowserPoolBusy(Exception):
+    """Raised when no browser context becomes free in time"""
+
+
+class _PooledContext:
+    """One slot of the pool; the browser context is (re)created lazily"""
+
+    def __init__(self):
+        self.context = None
+        self.created_at = 0.0
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium instance with a fixed number of warm browser contexts.
+
+    Contexts are recycled after `max_pages` pages or `max_age` seconds, and
+    replaced if the browser has died. When every context is busy, callers
+    wait up to `acquire_timeout` seconds; at most `max_waiters` callers may
+    wait at once, beyond that BrowserPoolBusy is raised immediately.
+
+    A pool belongs to the event loop it is first used on.
+    """
+
+    def __init__(self, size: int, max_pages: int, max_age: float,
+                 acquire_timeout: float, max_waiters: int, headless: bool = True):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.acquire_timeout = acquire_timeout
+        self.max_waiters = max_waiters
+        self.headless = headless
+
+        self._playwright = None
+        self._browser = None
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._start_lock = asyncio.Lock()
+        self._browser_lock = asyncio.Lock()
+        self._started = False
+        self._warming = 0
+        self._waiters = 0
+        self._recycled = 0
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a context and yield a fresh page in it"""
+        slot = await self._acquire()
+        page = None
+        try:
+            try:
+                page = await slot.context.new_page()
+            except Exception:
+                # A crashed context is replaced on its next use
+                await self._close_context(slot)
+                raise
+            yield page
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            slot.pages_served += 1
+            self._idle.put_nowait(slot)
+
+    async def start(self):
+        """Launch the browser and warm up all contexts"""
+        async with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            self._warming = self.size
+
+        # Warm contexts concurrently; failures are retried on first acquire
+        slots = [_PooledContext() for _ in range(self.size)]
+        results = await asyncio.gather(*(self._renew(slot) for slot in slots), return_exceptions=True)
+        for slot, result in zip(slots, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not warm browser context: {str(result)}")
+            self._idle.put_nowait(slot)
+        self._warming = 0
+
+    async def close(self):
+        """Close all contexts, the browser and Playwright"""
+        while not self._idle.empty():
+            slot = self._idle.get_nowait()
+            await self._close_context(slot)
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._started = False
+
+    def stats(self) -> Dict:
+        """Current pool occupancy, for monitoring"""
+        idle = self._idle.qsize()
+        return {
+            'size': self.size,
+            'idle': idle,
+            'busy': self.size - idle - self._warming if self._started else 0,
+            'waiting': self._waiters,
+            'recycled': self._recycled,
+            'browser_connected': bool(self._browser and self._browser.is_connected()),
+        }
+
+    async def _acquire(self) -> _PooledContext:
+        if not self._started:
+            await self.start()
+
+        # Callers waiting on contexts that are still warming up don't count
+        if self._idle.empty() and self._waiters - self._warming >= self.max_waiters:
+            raise BrowserPoolBusy('Browser pool wait queue is full')
+
+        self._waiters += 1
+        try:
+            slot = await asyncio.wait_for(self._idle.get(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise BrowserPoolBusy(f'No browser context free after {self.acquire_timeout}s')
+        finally:
+            self._waiters -= 1
+
+        if not self._is_healthy(slot):
+            try:
+                await self._renew(slot)
+            except Exception:
+                # Keep the slot in the pool so capacity is not lost
+                self._idle.put_nowait(slot)
+                raise
+        return slot
+
+    def _is_healthy(self, slot: _PooledContext) -> bool:
+        if slot.context is None:
+            return False
+        if self._browser is None or not self._browser.is_connected():
+            return False
+        if slot.pages_served >= self.max_pages:
+            return False
+        return time.monotonic() - slot.created_at < self.max_age
+
+    async def _renew(self, slot: _PooledContext):
+        """Replace the slot's context, relaunching the browser if it died"""
+        if slot.context is not None:
+            self._recycled += 1
+        await self._close_context(slot)
+
+        browser = await self._ensure_browser()
+        slot.context = await browser.new_context(user_agent=USER_AGENT)
+        slot.created_at = time.monotonic()
+        slot.pages_served = 0
+
+    async def _ensure_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            logger.info("Launching pooled Chromium browser")
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            return self._browser
+
+    async def _close_context(self, slot: _PooledContext):
+        if slot.context is None:
+            return
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        slot.context = None
+
+
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the browser pool for the running event loop"""
+    loop = asyncio.get_running_loop()
+    pool: Optional[BrowserPool] = _pools.get(loop)
+    if pool is None:
+        pool = BrowserPool(
+            size=settings.PLAYWRIGHT_POOL_SIZE,
+            max_pages=settings.PLAYWRIGHT_CONTEXT_MAX_PAGES,
+            max_age=settings.PLAYWRIGHT_CONTEXT_MAX_AGE,
+            acquire_timeout=settings.PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT,
+            max_waiters=settings.PLAYWRIGHT_POOL_MAX_WAITERS,
+            headless=settings.PLAYWRIGHT_HEADLESS,
+        )
+        _pools[loop] = pool
+        if runtime.on_scraper_loop():
+            runtime.register_cleanup(pool.close)
+    return pool
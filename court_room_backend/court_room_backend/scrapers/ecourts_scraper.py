@@ -1,22 +1,78 @@
-import asyncio
-import random
-import time
-import requests
+from urllib.parse import urlsplit
+from asgiref.sync import sync_to_async
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+from bs4.filter import ElementFilter
 from django.conf import settings
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import logging
 
+from .browser_pool import get_browser_pool
+from .form_tokens import get_form_token_cache
+from .http_client import get_http_client
+from .rate_limiter import get_rate_limiter
+
 logger = logging.getLogger(__name__)
 
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Upstream responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+SEARCH_FORM = 'casestatus/caseno'
+
+# Page text the portal shows when a posted viewstate/session has expired
+STALE_TOKEN_MARKERS = (
+    'validation of viewstate mac failed',
+    'the state information is invalid',
+    'invalid viewstate',
+    'session expired',
+    'session has expired',
+)
+
+RESULTS_TABLE_ID = 'ctl00_ContentPlaceHolder1_GridView1'
+
+
+class ResultsPageFilter(ElementFilter):
+    """
+    Build only the parts of a results page _parse_case_details reads: error
+    markers, the GridView table and PDF links (each with its subtree).
+    """
+    
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        attrs = attrs or {}
+        if name == 'table':
+            return attrs.get('id') == RESULTS_TABLE_ID
+        if name == 'a':
+            href = attrs.get('href')
+            return bool(href) and '.pdf' in href.lower()
+        if name == 'div':
+            return 'error' in attrs.get('class', '').split()
+        if name == 'span':
+            return attrs.get('color') == 'red'
+        return False
+
+
+class FormTokenFilter(ElementFilter):
+    """Build only the ASP.NET hidden state inputs of the search form"""
+    
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return name == 'input' and (attrs or {}).get('name', '').startswith('__')
+
+
 class ECourtsScraper:
-    def __init__(self):
-        self.base_url = "https://services.ecourts.gov.in/ecourtindia_v6/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, base_url: Optional[str] = None, progress: Optional[Callable] = None):
+        """
+        `progress(stage, **data)`, if given, is called (in a worker thread)
+        as a search moves along: 'rate_limited' before waiting on the rate
+        limiter, 'fetched' when the results page arrives and 'parsed' once
+        it has been read.
+        """
+        self.base_url = base_url or settings.ECOURTS_BASE_URL
+        self.progress = progress
         
     async def search_case(self, court_id: int, case_type: str, case_number: str, filing_year: str) -> Dict:
         """
@@ -25,7 +81,7 @@ class ECourtsScraper:
         try:
             # First try with requests for speed
             result = await self._search_with_requests(court_id, case_type, case_number, filing_year)
-            if result.get('success'):
+            if result.get('success') or result.get('throttled'):
                 return result
                 
             # Fallback to Playwright for JavaScript-heavy pages
@@ -42,42 +98,54 @@ class ECourtsScraper:
     
     async def _search_with_requests(self, court_id: int, case_type: str, case_number: str, filing_year: str) -> Dict:
         """
-        Attempt search using requests library
+        Attempt search over plain HTTP using the shared async client
         """
         try:
-            # Simulate human behavior with delays
-            await asyncio.sleep(random.uniform(
-                settings.REQUEST_DELAY_MIN, 
-                settings.REQUEST_DELAY_MAX
-            ))
-            
             # Build search URL
             search_url = f"{self.base_url}?p=casestatus/caseno"
             
-            # Get initial page to capture viewstate and other tokens
-            response = self.session.get(search_url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract form tokens
-            viewstate = self._extract_viewstate(soup)
-            if not viewstate:
-                return {'success': False, 'error': 'Could not extract viewstate'}
+            http = get_http_client()
+            limiter = get_rate_limiter()
+            limit_key = self._rate_limit_key(court_id)
             
-            # Prepare search data
-            form_data = {
-                '__VIEWSTATE': viewstate,
-                'ctl00$ContentPlaceHolder1$DropDownList1': court_id,
-                'ctl00$ContentPlaceHolder1$DropDownList2': case_type,
-                'ctl00$ContentPlaceHolder1$TextBox1': case_number,
-                'ctl00$ContentPlaceHolder1$TextBox2': filing_year,
-                'ctl00$ContentPlaceHolder1$Button1': 'Go'
-            }
+            # Form tokens (viewstate + session) are reused across searches
+            tokens = await self._get_form_tokens(search_url, limit_key)
+            if 'fields' not in tokens:
+                return tokens
             
-            # Submit search
-            response = self.session.post(search_url, data=form_data)
+            for attempt in range(2):
+                # Prepare search data
+                form_data = {
+                    **tokens['fields'],
+                    'ctl00$ContentPlaceHolder1$DropDownList1': court_id,
+                    'ctl00$ContentPlaceHolder1$DropDownList2': case_type,
+                    'ctl00$ContentPlaceHolder1$TextBox1': case_number,
+                    'ctl00$ContentPlaceHolder1$TextBox2': filing_year,
+                    'ctl00$ContentPlaceHolder1$Button1': 'Go'
+                }
+                
+                # Submit search
+                await limiter.acquire(limit_key, on_wait=self._report_wait)
+                response = await http.post(search_url, data=form_data)
+                await self._report('fetched', method='http', status_code=response.status_code)
+                
+                if response.status_code in THROTTLE_STATUSES:
+                    return await self._throttled(limit_key, response)
+                
+                # Cached tokens the portal no longer accepts: refresh once
+                if attempt == 0 and tokens['cached'] and self._is_stale_token_response(response):
+                    logger.info("Portal rejected cached form tokens; refreshing")
+                    tokens = await self._get_form_tokens(search_url, limit_key, refresh=True)
+                    if 'fields' not in tokens:
+                        return tokens
+                    continue
+                break
             
             if response.status_code == 200:
-                return self._parse_case_details(response.text)
+                await limiter.reward(limit_key)
+                result = self._parse_case_details(response.text)
+                await self._report('parsed', success=result['success'])
+                return result
             else:
                 return {'success': False, 'error': f'HTTP {response.status_code}'}
                 
@@ -86,13 +154,14 @@ class ECourtsScraper:
     
     async def _search_with_playwright(self, court_id: int, case_type: str, case_number: str, filing_year: str) -> Dict:
         """
-        Search using Playwright for JavaScript-heavy interactions
+        Search using Playwright for JavaScript-heavy interactions.
+        Pages come from the shared browser pool instead of a fresh Chromium.
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=settings.PLAYWRIGHT_HEADLESS)
-            page = await browser.new_page()
-            
-            try:
+        try:
+            # Wait for the token before borrowing a page, so the rate-limit
+            # sleep does not hold a pooled browser context
+            await get_rate_limiter().acquire(self._rate_limit_key(court_id), on_wait=self._report_wait)
+            async with get_browser_pool().page() as page:
                 # Navigate to search page
                 await page.goto(f"{self.base_url}?p=casestatus/caseno")
                 
@@ -120,20 +189,102 @@ class ECourtsScraper:
                 
                 # Get page content
                 content = await page.content()
+                await self._report('fetched', method='browser')
                 result = self._parse_case_details(content)
+                await self._report('parsed', success=result['success'])
                 
                 return result
                 
-            except Exception as e:
-                return {'success': False, 'error': str(e)}
-            finally:
-                await browser.close()
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    async def _get_form_tokens(self, search_url: str, limit_key: str, refresh: bool = False) -> Dict:
+        """
+        Hidden form fields and cookies for the search form, from the token
+        cache or a fresh GET. Returns an error result if they can't be had.
+        """
+        token_cache = get_form_token_cache()
+        key = token_cache.make_key(self.base_url, SEARCH_FORM)
+        http = get_http_client()
+        host = urlsplit(search_url).hostname
+        
+        if refresh:
+            await sync_to_async(token_cache.invalidate, thread_sensitive=False)(key)
+        else:
+            entry = await sync_to_async(token_cache.get, thread_sensitive=False)(key)
+            if entry is not None:
+                http.set_cookies(host, entry['cookies'])
+                return {'fields': entry['fields'], 'cached': True}
+        
+        # Get initial page to capture viewstate and other tokens
+        limiter = get_rate_limiter()
+        await limiter.acquire(limit_key, on_wait=self._report_wait)
+        response = await http.get(search_url)
+        if response.status_code in THROTTLE_STATUSES:
+            return await self._throttled(limit_key, response)
+        soup = self._make_soup(response.content, FormTokenFilter())
+        
+        # Extract form tokens
+        viewstate = self._extract_viewstate(soup)
+        if not viewstate:
+            return {'success': False, 'error': 'Could not extract viewstate'}
+        
+        fields = self._extract_form_tokens(soup)
+        await sync_to_async(token_cache.set, thread_sensitive=False)(key, fields, http.get_cookies(host))
+        return {'fields': fields, 'cached': False}
+    
+    async def _report(self, stage: str, **data):
+        if self.progress is not None:
+            await sync_to_async(self.progress, thread_sensitive=False)(stage, **data)
+    
+    async def _report_wait(self, seconds: float):
+        await self._report('rate_limited', wait_seconds=round(seconds, 2))
+    
+    def _is_stale_token_response(self, response) -> bool:
+        """Whether a POST was rejected because of expired viewstate/session"""
+        if response.status_code == 500:
+            return True
+        text = response.text.lower()
+        return any(marker in text for marker in STALE_TOKEN_MARKERS)
+    
+    def _rate_limit_key(self, court_id: int) -> str:
+        """Rate limiter bucket for a search: the portal host, or host and court"""
+        host = urlsplit(self.base_url).netloc
+        if settings.RATE_LIMIT_SCOPE == 'court':
+            return f"{host}/{court_id}"
+        return host
+    
+    async def _throttled(self, limit_key: str, response) -> Dict:
+        """Back off after a 429/503 and report it without falling back"""
+        retry_after = response.headers.get('Retry-After')
+        await get_rate_limiter().penalize(
+            limit_key, float(retry_after) if retry_after and retry_after.isdigit() else None
+        )
+        return {'success': False, 'throttled': True, 'error': f'HTTP {response.status_code}'}
+    
+    def _make_soup(self, markup, element_filter: Optional[ElementFilter] = None) -> BeautifulSoup:
+        """
+        Parse HTML with the configured backend (HTML_PARSER: 'auto' picks lxml
+        when installed), building only the elements the filter allows.
+        """
+        parser = settings.HTML_PARSER
+        if parser == 'auto':
+            parser = 'lxml' if LXML_AVAILABLE else 'html.parser'
+        return BeautifulSoup(markup, parser, parse_only=element_filter)
     
     def _extract_viewstate(self, soup: BeautifulSoup) -> Optional[str]:
         """Extract ASP.NET ViewState from page"""
         viewstate_input = soup.find('input', {'name': '__VIEWSTATE'})
         return viewstate_input['value'] if viewstate_input else None
     
+    def _extract_form_tokens(self, soup: BeautifulSoup) -> Dict[str, str]:
+        """Extract all ASP.NET hidden state fields (__VIEWSTATE, __EVENTVALIDATION, ...)"""
+        return {
+            field['name']: field.get('value', '')
+            for field in soup.find_all('input', {'type': 'hidden'})
+            if field.get('name', '').startswith('__')
+        }
+    
     async def _solve_captcha(self, page, captcha_element) -> Optional[str]:
         """
         Solve CAPTCHA using various methods
@@ -162,7 +313,7 @@ class ECourtsScraper:
         """
         Parse case details from HTML response
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = self._make_soup(html_content, ResultsPageFilter())
         
         try:
             # Check for error messages
@@ -175,7 +326,7 @@ class ECourtsScraper:
                 }
             
             # Extract case details from table
-            details_table = soup.find('table', {'id': 'ctl00_ContentPlaceHolder1_GridView1'})
+            details_table = soup.find('table', {'id': RESULTS_TABLE_ID})
             if not details_table:
                 return {
                     'success': False,
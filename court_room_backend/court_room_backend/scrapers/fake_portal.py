@@ -0,0 +1,248 @@
+import hashlib
+import html
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .ecourts_scraper import RESULTS_TABLE_ID
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = 'ASP.NET_SessionId'
+
+# Smallest PDF most viewers will open
+PDF_BODY = (
+    b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+    b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+    b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n'
+    b'trailer<</Root 1 0 R>>\n%%EOF\n'
+)
+
+
+class FakePortal:
+    """
+    Local stand-in for the eCourts `?p=casestatus/caseno` endpoint, for load
+    tests that must not touch the real portal.
+
+    GET serves the search form with a fresh ViewState tied to a session
+    cookie; POST checks both (answering unknown ones the way ASP.NET does)
+    and returns a GridView results page with PDF links, deterministic per
+    case. Latency, server errors, CAPTCHA pages, not-found results and 429
+    throttling are injected at the configured rates.
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.1, error_rate: float = 0.0,
+                 captcha_rate: float = 0.0, throttle_rate: float = 0.0, not_found_rate: float = 0.0,
+                 documents: int = 5, retry_after: int = 5, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+        self.throttle_rate = throttle_rate
+        self.not_found_rate = not_found_rate
+        self.documents = documents
+        self.retry_after = retry_after
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._sessions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/ecourtindia_v6/'
+
+    def serve(self, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+        """Bind the server (port 0 picks a free one); call serve_forever() on the result"""
+        handler = type('PortalHandler', (_PortalHandler,), {'portal': self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        return self._server
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Serve from a background thread; returns the base URL"""
+        server = self.serve(host, port)
+        threading.Thread(target=server.serve_forever, name='fake-portal', daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def count(self, outcome: str):
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+    def delay(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, delay))
+
+    def new_session(self) -> tuple:
+        session_id, viewstate = uuid.uuid4().hex[:24], uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = viewstate
+        return session_id, viewstate
+
+    def valid_viewstate(self, session_id: Optional[str], viewstate: Optional[str]) -> bool:
+        with self._lock:
+            return session_id is not None and self._sessions.get(session_id) == viewstate
+
+    # Pages
+
+    def search_form_page(self, viewstate: str, extra: str = '') -> str:
+        return f'''<!DOCTYPE html>
+<html><head><title>eCourts Services - Case Status : Search by Case Number</title></head>
+<body>
+<form name="aspnetForm" method="post" action="./?p=casestatus/caseno" id="aspnetForm">
+<div class="aspNetHidden">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="CA0B0334" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="ev{viewstate[:16]}" />
+</div>
+<select name="ctl00$ContentPlaceHolder1$DropDownList1" id="ctl00_ContentPlaceHolder1_DropDownList1"></select>
+<select name="ctl00$ContentPlaceHolder1$DropDownList2" id="ctl00_ContentPlaceHolder1_DropDownList2"></select>
+<input name="ctl00$ContentPlaceHolder1$TextBox1" type="text" id="ctl00_ContentPlaceHolder1_TextBox1" />
+<input name="ctl00$ContentPlaceHolder1$TextBox2" type="text" id="ctl00_ContentPlaceHolder1_TextBox2" />
+<input type="submit" name="ctl00$ContentPlaceHolder1$Button1" value="Go" id="ctl00_ContentPlaceHolder1_Button1" />
+{extra}
+</form>
+</body></html>
+'''
+
+    def captcha_page(self, viewstate: str) -> str:
+        return self.search_form_page(
+            viewstate,
+            '<img src="securimage/securimage_show.php?captcha" id="captcha_image" />'
+            '<input name="captcha" type="text" />\n<span color="red">Invalid Captcha</span>',
+        )
+
+    def not_found_page(self, viewstate: str) -> str:
+        return self.search_form_page(
+            viewstate, '<div class="alert error"><span>This Case Code does not exist - Record not found</span></div>'
+        )
+
+    def results_page(self, viewstate: str, court_id: str, case_type: str, case_number: str, filing_year: str) -> str:
+        digest = hashlib.sha1(f'{court_id}/{case_type}/{case_number}/{filing_year}'.encode()).hexdigest()
+        cnr = f'FAKE{int(digest[:10], 16) % 10 ** 12:012d}'
+        rows = [
+            ('CNR Number', cnr),
+            ('Case Type', case_type),
+            ('Filing Number', f'{case_number}/{filing_year}'),
+            ('Filing Date', f'15/01/{filing_year}'),
+            ('Petitioner and Advocate', f'PETITIONER {digest[:6].upper()}'),
+            ('Respondent and Advocate', 'STATE'),
+            ('Case Status', 'Pending'),
+            ('Next Hearing Date', f'{int(digest[6:8], 16) % 28 + 1:02d}/12/2026'),
+            ('Court Number and Judge', f'Court Hall {int(digest[8:10], 16) % 20 + 1}'),
+        ]
+        table = ''.join(f'<tr><td>{html.escape(k)}</td><td>{html.escape(v)}</td></tr>\n' for k, v in rows)
+        orders = ''.join(
+            f'<tr><td>{i}</td><td><a href="/ecourtindia_v6/orders/{cnr}_{i}.pdf" target="_blank">'
+            f'{"Order" if i % 3 else "Judgment"} dated {i % 28 + 1:02d}/{i % 12 + 1:02d}/{filing_year}</a></td></tr>\n'
+            for i in range(1, self.documents + 1)
+        )
+        return self.search_form_page(viewstate, f'''
+<table id="{RESULTS_TABLE_ID}">
+<tr><th>Particulars</th><th>Details</th></tr>
+{table}</table>
+<table class="order_table"><tr><th>No.</th><th>Order</th></tr>
+{orders}</table>''')
+
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    portal: FakePortal = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def do_GET(self):
+        self.portal.count('get')
+        path = urlsplit(self.path).path
+        if path == '/__stats':
+            return self.respond(200, json.dumps(self.portal.stats), 'application/json')
+
+        self.portal.delay()
+        if self.injected_failure():
+            return
+        if path.lower().endswith('.pdf'):
+            self.portal.count('pdf')
+            return self.respond(200, PDF_BODY, 'application/pdf')
+
+        session_id, viewstate = self.portal.new_session()
+        self.respond(200, self.portal.search_form_page(viewstate),
+                     headers={'Set-Cookie': f'{SESSION_COOKIE}={session_id}; path=/; HttpOnly'})
+
+    def do_POST(self):
+        self.portal.count('post')
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8', 'replace')).items()}
+
+        self.portal.delay()
+        if self.injected_failure():
+            return
+
+        viewstate = form.get('__VIEWSTATE')
+        if not self.portal.valid_viewstate(self.session_id(), viewstate):
+            self.portal.count('stale')
+            return self.respond(500, '<h2>Validation of viewstate MAC failed.</h2>')
+
+        if self.portal.roll(self.portal.captcha_rate):
+            self.portal.count('captcha')
+            return self.respond(200, self.portal.captcha_page(viewstate))
+        if self.portal.roll(self.portal.not_found_rate):
+            self.portal.count('not_found')
+            return self.respond(200, self.portal.not_found_page(viewstate))
+
+        self.portal.count('results')
+        self.respond(200, self.portal.results_page(
+            viewstate,
+            form.get('ctl00$ContentPlaceHolder1$DropDownList1', ''),
+            form.get('ctl00$ContentPlaceHolder1$DropDownList2', ''),
+            form.get('ctl00$ContentPlaceHolder1$TextBox1', ''),
+            form.get('ctl00$ContentPlaceHolder1$TextBox2', ''),
+        ))
+
+    def injected_failure(self) -> bool:
+        if self.portal.roll(self.portal.throttle_rate):
+            self.portal.count('throttled')
+            self.respond(429, 'Too Many Requests', 'text/plain', {'Retry-After': str(self.portal.retry_after)})
+            return True
+        if self.portal.roll(self.portal.error_rate):
+            self.portal.count('error')
+            self.respond(502, 'Bad Gateway', 'text/plain')
+            return True
+        return False
+
+    def session_id(self) -> Optional[str]:
+        for part in (self.headers.get('Cookie') or '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == SESSION_COOKIE:
+                return value
+        return None
+
+    def respond(self, status: int, body, content_type: str = 'text/html; charset=utf-8', headers=None):
+        body = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
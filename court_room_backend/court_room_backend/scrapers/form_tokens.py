@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class FormTokenCache:
+    """
+    Reusable ASP.NET form state (hidden `__*` fields plus session cookies)
+    per portal form.
+
+    Saves the GET that would otherwise precede every search POST. Entries
+    expire after `ttl` seconds (keep it below the portal's session timeout)
+    and are dropped early when the portal rejects them. Entries are kept
+    locally and, when an alias is configured, in a shared cache so every
+    worker can reuse them.
+    """
+
+    def __init__(self, ttl: int, alias: str = ''):
+        self.ttl = ttl
+        self.alias = alias
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(base_url: str, form: str) -> str:
+        return f'form-tokens:{base_url}:{form}'
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] > now:
+                return entry
+            self._entries.pop(key, None)
+
+        if self.shared is None:
+            return None
+
+        try:
+            entry = self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Shared form token cache unavailable: {str(e)}")
+            return None
+
+        if not entry or entry['expires_at'] <= now:
+            return None
+
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def set(self, key: str, fields: Dict[str, str], cookies: Dict[str, str]) -> Dict:
+        entry = {'fields': fields, 'cookies': cookies, 'expires_at': time.time() + self.ttl}
+        with self._lock:
+            self._entries[key] = entry
+
+        if self.shared is not None:
+            try:
+                self.shared.set(key, entry, timeout=self.ttl)
+            except Exception as e:
+                logger.warning(f"Shared form token cache unavailable: {str(e)}")
+        return entry
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if self.shared is not None:
+            try:
+                self.shared.delete(key)
+            except Exception as e:
+                logger.warning(f"Shared form token cache unavailable: {str(e)}")
+
+
+_form_tokens = None
+
+
+def get_form_token_cache() -> FormTokenCache:
+    """Return the process-wide form token cache"""
+    global _form_tokens
+    if _form_tokens is None:
+        _form_tokens = FormTokenCache(
+            ttl=settings.FORM_TOKEN_TTL,
+            alias=settings.CASE_CACHE_SHARED_ALIAS,
+        )
+    return _form_tokens
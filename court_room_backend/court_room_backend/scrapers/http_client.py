@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+from django.conf import settings
+
+from . import runtime
+from .browser_pool import USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class PooledHTTPClient:
+    """
+    Process-wide non-blocking HTTP client for upstream portals.
+
+    Wraps one httpx.AsyncClient so TCP/TLS connections are kept alive and
+    reused across searches, and caps concurrent requests per host on top of
+    httpx's global connection limits. HTTP/2 is used when `h2` is installed.
+
+    `transport` replaces the network transport (and with it the connection
+    limits); tests pass an httpx.MockTransport.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive: int, keepalive_expiry: float,
+                 per_host_limit: int, connect_timeout: float, read_timeout: float, http2: bool = True,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.per_host_limit = per_host_limit
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._client = httpx.AsyncClient(
+            http2=http2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            headers={'User-Agent': USER_AGENT},
+            follow_redirects=True,
+            transport=transport,
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = httpx.URL(url).host
+        async with self._host_limit(host):
+            return await self._client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Response whose body is read incrementally (aiter_bytes); holds the host slot until exit"""
+        host = httpx.URL(url).host
+        async with self._host_limit(host):
+            async with self._client.stream(method, url, **kwargs) as response:
+                yield response
+
+    def get_cookies(self, host: str) -> Dict[str, str]:
+        """Cookies the shared jar would send to `host`"""
+        return {
+            cookie.name: cookie.value
+            for cookie in self._client.cookies.jar
+            if host == cookie.domain.lstrip('.') or host.endswith(cookie.domain)
+        }
+
+    def set_cookies(self, host: str, cookies: Dict[str, str]):
+        """Adopt cookies (e.g. a session obtained by another worker) for `host`"""
+        for name, value in cookies.items():
+            self._client.cookies.set(name, value, domain=host)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphore
+
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> PooledHTTPClient:
+    """Return the HTTP client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client: Optional[PooledHTTPClient] = _clients.get(loop)
+    if client is None:
+        client = PooledHTTPClient(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            per_host_limit=settings.HTTP_PER_HOST_LIMIT,
+            connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.HTTP_READ_TIMEOUT,
+            http2=settings.HTTP2_ENABLED,
+        )
+        _clients[loop] = client
+        if runtime.on_scraper_loop():
+            runtime.register_cleanup(client.aclose)
+    return client
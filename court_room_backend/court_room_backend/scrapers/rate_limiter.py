@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Token buckets for upstream requests, shared across workers.
+
+    Each bucket refills at `rate` tokens per second up to `burst`. A caller
+    reserves a token and sleeps until it is due, so an idle portal answers
+    immediately and a busy one gets requests spaced at the long-run rate.
+    Tokens may go negative; the deficit is the queue of reserved requests.
+
+    A 429/503 from upstream halves the bucket's rate (down to `min_factor`)
+    and blocks it for Retry-After or an exponential backoff; successes
+    restore the rate gradually.
+
+    Bucket state lives in a Django cache alias when one is configured, so
+    every worker draws from the same buckets; otherwise it is per process.
+    """
+
+    def __init__(self, rate: float, burst: float, alias: str = '', backoff_base: float = 5,
+                 backoff_max: float = 300, min_factor: float = 0.1, recovery: float = 0.05):
+        self.rate = rate
+        self.burst = burst
+        self.alias = alias
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_factor = min_factor
+        self.recovery = recovery
+        self._local_state: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._waiting: Dict[str, int] = {}
+        self._last_wait: Dict[str, float] = {}
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    async def acquire(self, key: str, on_wait=None) -> float:
+        """
+        Wait for a token for `key`; returns the seconds spent waiting.
+        `on_wait(seconds)` is awaited first if the token is not yet due.
+        """
+        started = time.monotonic()
+        # Also read by snapshot() from request threads
+        with self._lock:
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            wait = await sync_to_async(self._reserve, thread_sensitive=False)(key)
+            if wait > 0 and on_wait is not None:
+                await on_wait(wait)
+            while wait > 0:
+                await asyncio.sleep(wait)
+                # A backoff may have been applied while we slept
+                wait = await sync_to_async(self._blocked_for, thread_sensitive=False)(key)
+        finally:
+            with self._lock:
+                self._waiting[key] -= 1
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._last_wait[key] = waited
+        return waited
+
+    async def penalize(self, key: str, retry_after: Optional[float] = None):
+        """Back off after the portal throttled us (429/503)"""
+        await sync_to_async(self._penalize, thread_sensitive=False)(key, retry_after)
+
+    async def reward(self, key: str):
+        """Recover rate after a successful request"""
+        state = await sync_to_async(self._read, thread_sensitive=False)(key)
+        if state['factor'] < 1 or state['strikes']:
+            await sync_to_async(self._reward, thread_sensitive=False)(key)
+
+    def _penalize(self, key: str, retry_after: Optional[float]):
+        with self._state(key) as state:
+            state['factor'] = max(self.min_factor, state['factor'] / 2)
+            state['strikes'] += 1
+            if retry_after is None:
+                retry_after = min(self.backoff_max, self.backoff_base * 2 ** (state['strikes'] - 1))
+            state['blocked_until'] = max(state['blocked_until'], time.time() + retry_after)
+        logger.warning(f"Upstream throttled {key}; backing off {retry_after:.0f}s")
+
+    def _reward(self, key: str):
+        with self._state(key) as state:
+            state['factor'] = min(1.0, state['factor'] + self.recovery)
+            state['strikes'] = 0
+
+    def snapshot(self, keys=()) -> Dict[str, Dict]:
+        """
+        Queue depth and wait times per bucket, for monitoring: `keys` plus
+        the buckets this process has used. Bucket state comes from the
+        shared cache when there is one, so it covers every worker;
+        `this_process` counts only this process's callers.
+        """
+        with self._lock:
+            waiting, last_wait = dict(self._waiting), dict(self._last_wait)
+
+        snapshot = {}
+        for key in set(keys) | set(waiting) | set(last_wait):
+            state = self._read(key)
+            now = time.time()
+            tokens = self._refill(state, now)
+            rate = self.rate * state['factor']
+            backlog = max(0.0, -tokens)
+            snapshot[key] = {
+                'queue_depth': backlog,
+                'expected_wait': max(backlog / rate, state['blocked_until'] - now, 0.0),
+                'rate': rate,
+                'shared': self.shared is not None,
+                'this_process': {
+                    'waiting': waiting.get(key, 0),
+                    'last_wait': round(last_wait.get(key, 0.0), 3),
+                },
+            }
+        return snapshot
+
+    def _reserve(self, key: str) -> float:
+        with self._state(key) as state:
+            now = time.time()
+            state['tokens'] = self._refill(state, now) - 1
+            state['updated'] = now
+
+            wait = max(0.0, -state['tokens'] / (self.rate * state['factor']))
+            return max(wait, state['blocked_until'] - now)
+
+    def _blocked_for(self, key: str) -> float:
+        return max(0.0, self._read(key)['blocked_until'] - time.time())
+
+    def _refill(self, state: Dict, now: float) -> float:
+        elapsed = max(0.0, now - state['updated'])
+        return min(self.burst, state['tokens'] + elapsed * self.rate * state['factor'])
+
+    def _fresh_state(self) -> Dict:
+        return {'tokens': self.burst, 'updated': time.time(), 'factor': 1.0, 'strikes': 0, 'blocked_until': 0.0}
+
+    def _read(self, key: str) -> Dict:
+        shared = self.shared
+        if shared is None:
+            with self._lock:
+                return dict(self._local_state.get(key) or self._fresh_state())
+        return shared.get(f'ratelimit:{key}') or self._fresh_state()
+
+    @contextmanager
+    def _state(self, key: str):
+        """Read-modify-write a bucket under a lock"""
+        shared = self.shared
+        if shared is None:
+            with self._lock:
+                state = self._local_state.setdefault(key, self._fresh_state())
+                yield state
+            return
+
+        state_key = f'ratelimit:{key}'
+        lock_key = f'ratelimit:lock:{key}'
+        locked = False
+        for _ in range(50):
+            if shared.add(lock_key, 1, timeout=2):
+                locked = True
+                break
+            time.sleep(0.01)
+        if not locked:
+            logger.warning(f"Rate limiter lock for {key} timed out; proceeding unlocked")
+
+        try:
+            state = shared.get(state_key) or self._fresh_state()
+            yield state
+            shared.set(state_key, state, timeout=24 * 60 * 60)
+        finally:
+            if locked:
+                shared.delete(lock_key)
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide upstream rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(
+            rate=settings.RATE_LIMIT_RATE,
+            burst=settings.RATE_LIMIT_BURST,
+            alias=settings.CASE_CACHE_SHARED_ALIAS,
+            backoff_base=settings.RATE_LIMIT_BACKOFF_BASE,
+            backoff_max=settings.RATE_LIMIT_BACKOFF_MAX,
+            min_factor=settings.RATE_LIMIT_MIN_FACTOR,
+            recovery=settings.RATE_LIMIT_RECOVERY,
+        )
+    return _rate_limiter
@@ -0,0 +1,148 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class CaseResultCache:
+    """
+    Two-tier cache of scraper results keyed on
+    (court, case type code, case number, filing year).
+
+    The first tier is an in-process LRU; the optional second tier is a
+    Django cache alias (Redis, database, ...) shared between workers.
+    Entries carry their own expiry so both tiers agree on freshness.
+    """
+
+    def __init__(self, max_entries: int, shared_alias: str = ''):
+        self.max_entries = max_entries
+        self.shared_alias = shared_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(court_id, case_type: str, case_number: str, filing_year: str) -> str:
+        return 'case-result:{}:{}:{}:{}'.format(
+            court_id,
+            str(case_type).strip().upper(),
+            str(case_number).strip().upper(),
+            str(filing_year).strip()
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a fresh cached result or None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry['expires_at'] > now:
+                    self._entries.move_to_end(key)
+                    return copy.deepcopy(entry['result'])
+                del self._entries[key]
+
+        if self.shared is None:
+            return None
+
+        try:
+            entry = self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Shared result cache unavailable: {str(e)}")
+            return None
+
+        if not entry or entry['expires_at'] <= now:
+            return None
+
+        self._store_local(key, entry)
+        return copy.deepcopy(entry['result'])
+
+    def set(self, key: str, result: Dict):
+        """Cache a scraper result for as long as its content allows"""
+        ttl = self.ttl_for(result)
+        if ttl <= 0:
+            return
+
+        entry = {'result': copy.deepcopy(result), 'expires_at': time.time() + ttl}
+        self._store_local(key, entry)
+
+        if self.shared is not None:
+            try:
+                self.shared.set(key, entry, timeout=ttl)
+            except Exception as e:
+                logger.warning(f"Shared result cache unavailable: {str(e)}")
+
+    def invalidate(self, key: str):
+        """Drop a key from both tiers"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if self.shared is not None:
+            try:
+                self.shared.delete(key)
+            except Exception as e:
+                logger.warning(f"Shared result cache unavailable: {str(e)}")
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
+
+    def ttl_for(self, result: Dict) -> int:
+        """
+        Seconds a result may be served from cache.
+
+        Cases with a hearing coming up (or just past) change often, so they
+        get the short hearing TTL; "not found" answers get the negative TTL;
+        other failures are never cached.
+        """
+        if not result.get('success'):
+            if result.get('error') == 'Case not found':
+                return settings.CASE_CACHE_NEGATIVE_TTL
+            return 0
+
+        case_details = (result.get('data') or {}).get('case_details') or {}
+        next_hearing = case_details.get('next_hearing_date')
+        if next_hearing:
+            try:
+                hearing_date = date.fromisoformat(next_hearing)
+            except ValueError:
+                hearing_date = None
+
+            window = timedelta(days=settings.CASE_CACHE_HEARING_WINDOW_DAYS)
+            if hearing_date and hearing_date - timezone.localdate() <= window:
+                return settings.CASE_CACHE_HEARING_TTL
+
+        return settings.CASE_CACHE_TTL
+
+    def _store_local(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_result_cache = None
+
+
+def get_result_cache() -> CaseResultCache:
+    """Return the process-wide case result cache"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = CaseResultCache(
+            max_entries=settings.CASE_CACHE_MAX_ENTRIES,
+            shared_alias=settings.CASE_CACHE_SHARED_ALIAS,
+        )
+    return _result_cache
@@ -0,0 +1,69 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_loop = None
+_loop_pid = None
+_cleanups: List[Callable[[], Awaitable]] = []
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide scraper event loop, starting it if needed.
+
+    Long-lived async resources (browser pool, HTTP client) are bound to this
+    loop, so every scrape in the process should run on it. The loop is
+    recreated after a fork (e.g. Celery prefork workers).
+    """
+    global _loop, _loop_pid
+
+    with _lock:
+        if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='scraper-loop', daemon=True)
+            thread.start()
+            _loop = loop
+            _loop_pid = os.getpid()
+    return _loop
+
+
+def on_scraper_loop() -> bool:
+    """True when called from a coroutine running on the scraper loop"""
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
+
+
+def submit(coro):
+    """Schedule a coroutine on the scraper loop, returning a concurrent Future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro, timeout: float = None):
+    """Run a coroutine on the scraper loop from sync code and wait for it"""
+    return submit(coro).result(timeout)
+
+
+def register_cleanup(func: Callable[[], Awaitable]):
+    """Register an async callable to run on the scraper loop at exit"""
+    _cleanups.append(func)
+
+
+@atexit.register
+def _shutdown():
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        return
+
+    for func in reversed(_cleanups):
+        try:
+            run(func(), timeout=10)
+        except Exception as e:
+            logger.warning(f"Scraper cleanup failed: {str(e)}")
+    _loop.call_soon_threadsafe(_loop.stop)
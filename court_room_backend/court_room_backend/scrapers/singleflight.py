@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+from typing import Awaitable, Callable, Dict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """An in-process scrape that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent fetches of the same key into one.
+
+    Within a process, threads asking for a key that is already being fetched
+    wait on that fetch. Across processes, the leader holds a lock in the
+    shared cache (`cache.add` is atomic on Redis, memcached and the DB
+    backend) and publishes its result under the lock's token; followers
+    poll for it. If the leader dies or takes longer than `wait_timeout`,
+    followers fall back to fetching themselves.
+    """
+
+    def __init__(self, alias: str, lock_timeout: int, wait_timeout: float, poll_interval: float):
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._flights: Dict[str, _Flight] = {}
+        # Per event loop: a future can only be awaited on the loop it belongs to
+        self._async_flights = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def run(self, key: str, fetch: Callable[[], Dict]) -> Dict:
+        """Return fetch()'s result, sharing it with concurrent callers"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._run_shared(key, fetch)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def arun(self, key: str, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        """
+        Async counterpart of run(). Callers on the same event loop share
+        one fetch; callers on other loops (each async view under WSGI gets
+        its own) coalesce through the shared cache like other processes.
+
+        The fetch runs as its own task, so a caller that goes away (e.g. a
+        disconnected client) does not cancel it for the others. Waiting never
+        blocks the loop; shared-cache calls run in threads.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flights = self._async_flights.setdefault(loop, {})
+            flight = flights.get(key)
+            if flight is None:
+                flight = flights[key] = loop.create_task(self._arun_shared(key, fetch))
+                flight.add_done_callback(lambda task: self._finish_async_flight(flights, key, task))
+        return await asyncio.shield(flight)
+
+    def _finish_async_flight(self, flights: Dict[str, asyncio.Future], key: str, task: asyncio.Future):
+        with self._lock:
+            if flights.get(key) is task:
+                del flights[key]
+        # Mark the exception retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def _run_shared(self, key: str, fetch: Callable[[], Dict]) -> Dict:
+        shared = self.shared
+        if shared is None:
+            return fetch()
+
+        lock_key = f'singleflight:lock:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                acquired = shared.add(lock_key, token, timeout=self.lock_timeout)
+            except Exception as e:
+                logger.warning(f"Single-flight lock unavailable: {str(e)}")
+                return fetch()
+
+            if acquired:
+                return self._lead(shared, lock_key, token, fetch)
+
+            # Someone else is fetching; wait for their result
+            leader_token = shared.get(lock_key)
+            while leader_token is not None and time.monotonic() < deadline:
+                result = shared.get(f'singleflight:result:{leader_token}')
+                if result is not None:
+                    return result
+                time.sleep(self.poll_interval)
+                if shared.get(lock_key) != leader_token:
+                    # Leader finished (or its lock expired); check once more
+                    result = shared.get(f'singleflight:result:{leader_token}')
+                    if result is not None:
+                        return result
+                    break
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for in-flight fetch of {key}")
+                return fetch()
+
+    async def _arun_shared(self, key: str, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        shared = self.shared
+        if shared is None:
+            return await fetch()
+
+        lock_key = f'singleflight:lock:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+        cache_add = sync_to_async(shared.add, thread_sensitive=False)
+        cache_get = sync_to_async(shared.get, thread_sensitive=False)
+
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                acquired = await cache_add(lock_key, token, timeout=self.lock_timeout)
+            except Exception as e:
+                logger.warning(f"Single-flight lock unavailable: {str(e)}")
+                return await fetch()
+
+            if acquired:
+                try:
+                    result = await fetch()
+                    await sync_to_async(shared.set, thread_sensitive=False)(
+                        f'singleflight:result:{token}', result, timeout=self.lock_timeout
+                    )
+                    return result
+                finally:
+                    await sync_to_async(self._unlock, thread_sensitive=False)(shared, lock_key, token)
+
+            # Someone else is fetching; wait for their result
+            leader_token = await cache_get(lock_key)
+            while leader_token is not None and time.monotonic() < deadline:
+                result = await cache_get(f'singleflight:result:{leader_token}')
+                if result is not None:
+                    return result
+                await asyncio.sleep(self.poll_interval)
+                if await cache_get(lock_key) != leader_token:
+                    result = await cache_get(f'singleflight:result:{leader_token}')
+                    if result is not None:
+                        return result
+                    break
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for in-flight fetch of {key}")
+                return await fetch()
+
+    @staticmethod
+    def _unlock(shared, lock_key: str, token: str):
+        if shared.get(lock_key) == token:
+            shared.delete(lock_key)
+
+    def _lead(self, shared, lock_key: str, token: str, fetch: Callable[[], Dict]) -> Dict:
+        try:
+            result = fetch()
+            shared.set(f'singleflight:result:{token}', result, timeout=self.lock_timeout)
+            return result
+        finally:
+            self._unlock(shared, lock_key, token)
+
+
+_single_flight = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight coordinator"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight(
+            alias=settings.CASE_CACHE_SHARED_ALIAS,
+            lock_timeout=settings.SINGLE_FLIGHT_LOCK_TIMEOUT,
+            wait_timeout=settings.SINGLE_FLIGHT_WAIT_TIMEOUT,
+            poll_interval=settings.SINGLE_FLIGHT_POLL_INTERVAL,
+        )
+    return _single_flight
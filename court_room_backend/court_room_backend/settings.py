@@ -91,6 +91,16 @@ DATABASES = {
     }
 }
 
+# Cache
+# Point CACHE_BACKEND at django.core.cache.backends.redis.RedisCache in
+# production so workers share cached results and locks
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -105,6 +115,9 @@ REST_FRAMEWORK = {
     }
 }
 
+# case-history pagination: 'cursor' (keyset, no COUNT/OFFSET) or 'page'
+CASE_HISTORY_PAGINATION = config('CASE_HISTORY_PAGINATION', default='cursor')
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -165,9 +178,113 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CAPTCHA_API_KEY = config('CAPTCHA_API_KEY', default='')
 CAPTCHA_ENABLED = config('CAPTCHA_ENABLED', default=False, cast=bool)
 PLAYWRIGHT_HEADLESS = config('PLAYWRIGHT_HEADLESS', default=True, cast=bool)
-REQUEST_DELAY_MIN = config('REQUEST_DELAY_MIN', default=2, cast=int)
-REQUEST_DELAY_MAX = config('REQUEST_DELAY_MAX', default=5, cast=int)
+# Portal to scrape; point at `manage.py run_fake_portal` for load tests
+ECOURTS_BASE_URL = config('ECOURTS_BASE_URL', default='https://services.ecourts.gov.in/ecourtindia_v6/')
+# BeautifulSoup backend for portal pages: 'auto' (lxml if installed), 'lxml' or 'html.parser'
+HTML_PARSER = config('HTML_PARSER', default='auto')
+# Pooled browser contexts for the Playwright fallback
+PLAYWRIGHT_POOL_SIZE = config('PLAYWRIGHT_POOL_SIZE', default=2, cast=int)
+PLAYWRIGHT_CONTEXT_MAX_PAGES = config('PLAYWRIGHT_CONTEXT_MAX_PAGES', default=50, cast=int)
+PLAYWRIGHT_CONTEXT_MAX_AGE = config('PLAYWRIGHT_CONTEXT_MAX_AGE', default=600, cast=int)  # seconds
+PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT = config('PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT', default=30, cast=int)  # seconds
+PLAYWRIGHT_POOL_MAX_WAITERS = config('PLAYWRIGHT_POOL_MAX_WAITERS', default=20, cast=int)
+
+# Upstream rate limiting: token bucket per portal host (or host and court)
+RATE_LIMIT_RATE = config('RATE_LIMIT_RATE', default=1.0, cast=float)  # requests per second
+RATE_LIMIT_BURST = config('RATE_LIMIT_BURST', default=5, cast=float)
+RATE_LIMIT_SCOPE = config('RATE_LIMIT_SCOPE', default='host')  # 'host' or 'court'
+RATE_LIMIT_BACKOFF_BASE = config('RATE_LIMIT_BACKOFF_BASE', default=5, cast=float)  # seconds
+RATE_LIMIT_BACKOFF_MAX = config('RATE_LIMIT_BACKOFF_MAX', default=300, cast=float)  # seconds
+RATE_LIMIT_MIN_FACTOR = config('RATE_LIMIT_MIN_FACTOR', default=0.1, cast=float)
+RATE_LIMIT_RECOVERY = config('RATE_LIMIT_RECOVERY', default=0.05, cast=float)
+
+# Reuse of portal form tokens (viewstate + session cookies), in seconds;
+# keep below the portal's session timeout
+FORM_TOKEN_TTL = config('FORM_TOKEN_TTL', default=10 * 60, cast=int)
+
+# Bulk case search fan-out
+BULK_SEARCH_MAX_ITEMS = config('BULK_SEARCH_MAX_ITEMS', default=500, cast=int)
+BULK_SEARCH_CONCURRENCY = config('BULK_SEARCH_CONCURRENCY', default=8, cast=int)
+BULK_SEARCH_PER_HOST_CONCURRENCY = config('BULK_SEARCH_PER_HOST_CONCURRENCY', default=4, cast=int)
+
+# Re-searching a known case updates its stored detail in place and logs the changes;
+# history then shows every lookup of a case with its latest values
+CASE_INCREMENTAL_REFRESH = config('CASE_INCREMENTAL_REFRESH', default=True, cast=bool)
+
+# Which scraper results to keep (compressed, in CaseQueryPayload): 'none', 'errors' or 'full'
+RAW_RESPONSE_RETENTION = config('RAW_RESPONSE_RETENTION', default='errors')
+
+# Search history older than this moves to ArchivedCaseQuery (0 keeps everything hot)
+HISTORY_HOT_DAYS = config('HISTORY_HOT_DAYS', default=180, cast=int)
+HISTORY_ARCHIVE_BATCH_SIZE = config('HISTORY_ARCHIVE_BATCH_SIZE', default=500, cast=int)
+HISTORY_ARCHIVE_EXPORT_DIR = config('HISTORY_ARCHIVE_EXPORT_DIR', default='')  # also write gzipped JSON lines here
+
+# Scheduled refresh of watched cases
+WATCH_REFRESH_TICK = config('WATCH_REFRESH_TICK', default=5 * 60, cast=int)  # seconds
+WATCH_REFRESH_DAILY_BUDGET = config('WATCH_REFRESH_DAILY_BUDGET', default=2000, cast=int)  # searches per day
+WATCH_REFRESH_INTERVAL = config('WATCH_REFRESH_INTERVAL', default=24 * 60 * 60, cast=int)  # seconds
+WATCH_REFRESH_HEARING_INTERVAL = config('WATCH_REFRESH_HEARING_INTERVAL', default=4 * 60 * 60, cast=int)  # seconds
+WATCH_HEARING_WINDOW_DAYS = config('WATCH_HEARING_WINDOW_DAYS', default=2, cast=int)
+WATCH_REFRESH_JITTER = config('WATCH_REFRESH_JITTER', default=0.2, cast=float)  # fraction of the interval
+
+# Background download of case PDFs once a search has stored them
+DOCUMENT_PREFETCH_ENABLED = config('DOCUMENT_PREFETCH_ENABLED', default=False, cast=bool)
+DOCUMENT_PREFETCH_CONCURRENCY = config('DOCUMENT_PREFETCH_CONCURRENCY', default=4, cast=int)
+DOCUMENT_PREFETCH_CLAIM_TIMEOUT = config('DOCUMENT_PREFETCH_CLAIM_TIMEOUT', default=10 * 60, cast=int)  # seconds
+DOCUMENT_MAX_BYTES = config('DOCUMENT_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+
+# Shared upstream HTTP client
+HTTP_MAX_CONNECTIONS = config('HTTP_MAX_CONNECTIONS', default=100, cast=int)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = config('HTTP_MAX_KEEPALIVE_CONNECTIONS', default=20, cast=int)
+HTTP_KEEPALIVE_EXPIRY = config('HTTP_KEEPALIVE_EXPIRY', default=30, cast=float)  # seconds
+HTTP_PER_HOST_LIMIT = config('HTTP_PER_HOST_LIMIT', default=10, cast=int)
+HTTP_CONNECT_TIMEOUT = config('HTTP_CONNECT_TIMEOUT', default=5, cast=float)  # seconds
+HTTP_READ_TIMEOUT = config('HTTP_READ_TIMEOUT', default=20, cast=float)  # seconds
+HTTP2_ENABLED = config('HTTP2_ENABLED', default=True, cast=bool)
+
+# Case result cache: in-process LRU in front of CASE_CACHE_SHARED_ALIAS
+CASE_CACHE_MAX_ENTRIES = config('CASE_CACHE_MAX_ENTRIES', default=1024, cast=int)
+CASE_CACHE_SHARED_ALIAS = config('CASE_CACHE_SHARED_ALIAS', default='default')
+CASE_CACHE_TTL = config('CASE_CACHE_TTL', default=6 * 60 * 60, cast=int)  # seconds
+CASE_CACHE_HEARING_TTL = config('CASE_CACHE_HEARING_TTL', default=15 * 60, cast=int)  # seconds
+CASE_CACHE_HEARING_WINDOW_DAYS = config('CASE_CACHE_HEARING_WINDOW_DAYS', default=2, cast=int)
+CASE_CACHE_NEGATIVE_TTL = config('CASE_CACHE_NEGATIVE_TTL', default=5 * 60, cast=int)  # seconds
+
+# Courts and case types: versioned cache in front of REFERENCE_CACHE_ALIAS, plus HTTP caching
+REFERENCE_CACHE_ALIAS = config('REFERENCE_CACHE_ALIAS', default='default')
+REFERENCE_CACHE_MAX_ENTRIES = config('REFERENCE_CACHE_MAX_ENTRIES', default=256, cast=int)
+REFERENCE_CACHE_TTL = config('REFERENCE_CACHE_TTL', default=24 * 60 * 60, cast=int)  # seconds
+REFERENCE_CACHE_MAX_AGE = config('REFERENCE_CACHE_MAX_AGE', default=6 * 60 * 60, cast=int)  # seconds, Cache-Control
+# Longest a process whose cache missed a bump serves old reference data
+REFERENCE_CACHE_VERSION_TTL = config('REFERENCE_CACHE_VERSION_TTL', default=10 * 60, cast=int)  # seconds
+
+# Single-flight: concurrent identical searches share one scrape
+SINGLE_FLIGHT_LOCK_TIMEOUT = config('SINGLE_FLIGHT_LOCK_TIMEOUT', default=120, cast=int)  # seconds
+SINGLE_FLIGHT_WAIT_TIMEOUT = config('SINGLE_FLIGHT_WAIT_TIMEOUT', default=90, cast=int)  # seconds
+SINGLE_FLIGHT_POLL_INTERVAL = config('SINGLE_FLIGHT_POLL_INTERVAL', default=0.5, cast=float)  # seconds
+
+# Search progress: stage events for case-search/<id>/events/, kept in SEARCH_PROGRESS_CACHE_ALIAS
+SEARCH_PROGRESS_CACHE_ALIAS = config('SEARCH_PROGRESS_CACHE_ALIAS', default='default')
+SEARCH_PROGRESS_TTL = config('SEARCH_PROGRESS_TTL', default=30 * 60, cast=int)  # seconds
+SEARCH_EVENTS_POLL_INTERVAL = config('SEARCH_EVENTS_POLL_INTERVAL', default=0.5, cast=float)  # seconds
+SEARCH_EVENTS_HEARTBEAT = config('SEARCH_EVENTS_HEARTBEAT', default=15, cast=int)  # seconds
+SEARCH_EVENTS_MAX_DURATION = config('SEARCH_EVENTS_MAX_DURATION', default=55, cast=int)  # seconds per stream
 
 # Celery
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Run tasks in-process (no broker needed) for local development and tests
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_BEAT_SCHEDULE = {
+    'refresh-watched-cases': {
+        'task': 'api.tasks.refresh_watched_cases',
+        'schedule': WATCH_REFRESH_TICK,
+    },
+    'archive-case-history': {
+        'task': 'api.tasks.archive_case_history',
+        'schedule': 24 * 60 * 60,
+    },
+}
@@ -5,12 +5,24 @@ import {
 } from 'lucide-react';
 
 const API_BASE_URL = 'http://localhost:8000/api';
+const POLL_INTERVAL_MS = 1000;
+
+// Labels for the stages case-search/<id>/events/ reports
+const SEARCH_STAGE_LABELS = {
+  queued: 'Queued...',
+  started: 'Searching...',
+  rate_limited: 'Waiting for eCourts...',
+  fetched: 'Reading results...',
+  parsed: 'Reading results...',
+  persisted: 'Saving...'
+};
 
 const App = () => {
   const [courts, setCourts] = useState([]);
   const [caseTypes, setCaseTypes] = useState([]);
   const [searchHistory, setSearchHistory] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [searchStage, setSearchStage] = useState('');
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
   
@@ -77,9 +89,50 @@ const App = () => {
     }));
   };
 
+  const pollSearchResult = async (queryId) => {
+    while (true) {
+      const response = await fetch(`${API_BASE_URL}/case-detail/${queryId}/`);
+      const data = await response.json();
+
+      if (data.status === 'completed' || data.status === 'failed') {
+        return data;
+      }
+      await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+  };
+
+  // Follow a queued search over server-sent events. EventSource reconnects
+  // on its own and resumes from the last event, so a dropped connection
+  // never starts another scrape. Falls back to polling without SSE.
+  const followSearch = (queryId) => {
+    if (typeof EventSource === 'undefined') {
+      return pollSearchResult(queryId);
+    }
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${API_BASE_URL}/case-search/${queryId}/events/`);
+
+      source.addEventListener('progress', (event) => {
+        const { stage } = JSON.parse(event.data);
+        setSearchStage(SEARCH_STAGE_LABELS[stage] || '');
+      });
+      source.addEventListener('result', (event) => {
+        source.close();
+        resolve(JSON.parse(event.data).result);
+      });
+      source.onerror = () => {
+        // CLOSED means the server refused the stream; anything else is a retry
+        if (source.readyState === EventSource.CLOSED) {
+          pollSearchResult(queryId).then(resolve, reject);
+        }
+      };
+    });
+  };
+
   const handleSearch = async (e) => {
     e.preventDefault();
     setLoading(true);
+    setSearchStage('');
     setError('');
     setSuccess('');
     setSearchResult(null);
@@ -95,17 +148,28 @@ const App = () => {
 
       const data = await response.json();
 
-      if (data.success) {
-        setSearchResult(data.data);
+      if (!data.success) {
+        setError(data.error || data.data?.error_message || 'Search failed');
+        return;
+      }
+
+      // Cached results come back at once; otherwise follow the search until it finishes
+      const result = data.status === 'completed'
+        ? data.data
+        : await followSearch(data.query_id);
+
+      if (result.success) {
+        setSearchResult(result);
         setSuccess('Case details retrieved successfully!');
-        loadSearchHistory(); // Refresh history
       } else {
-        setError(data.error || 'Search failed');
+        setError(result.error_message || 'Search failed');
       }
+      loadSearchHistory(); // Refresh history
     } catch (err) {
       setError('Network error. Please try again.');
     } finally {
       setLoading(false);
+      setSearchStage('');
     }
   };
 
@@ -314,7 +378,7 @@ const App = () => {
                     {loading ? (
                       <>
                         <div className="animate-spin rounded-full h-5 w-5 border-b-2 border-white mr-2"></div>
-                        Searching...
+                        {searchStage || 'Searching...'}
                       </>
                     ) : (
                       <>